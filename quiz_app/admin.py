@@ -1,6 +1,11 @@
 # quiz_app/admin.py
 from django.contrib import admin
-from .models import Category, Quiz, Question, QuizSubmission, SubmissionAnswer
+from django.db.models import Q
+from .regrade import regrade_quiz
+from .search import search_quiz_ids, search_question_ids
+from .models import (
+    Category, Quiz, Question, QuizSubmission, SubmissionAnswer, PendingSubmission, AttemptSession, UserProgress
+)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -25,11 +30,23 @@ class QuizAdmin(admin.ModelAdmin):
     """
     Admin configuration for Quiz model
     """
-    list_display = ('title', 'category', 'created_by', 'is_active', 'total_questions', 'created_at')
+    list_display = ('title', 'category', 'created_by', 'is_active', 'pool_size', 'time_limit_minutes', 'total_questions', 'created_at')
     list_filter = ('is_active', 'category', 'created_at', 'created_by')
     search_fields = ('title', 'description')
     readonly_fields = ('created_at', 'updated_at', 'total_questions')
     inlines = [QuestionInline]
+    actions = ['regrade_submissions']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index instead of LIKE scans over descriptions
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=search_quiz_ids(search_term, include_inactive=True, limit=None)), False
+
+    @admin.action(description="Regrade submissions of selected quizzes")
+    def regrade_submissions(self, request, queryset):
+        changed = sum(regrade_quiz(quiz_id) for quiz_id in queryset.values_list('id', flat=True))
+        self.message_user(request, f"Regraded {queryset.count()} quiz(zes): {changed} score(s) changed")
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
@@ -41,6 +58,13 @@ class QuestionAdmin(admin.ModelAdmin):
     search_fields = ('question_text', 'quiz__title')
     readonly_fields = ('created_at', 'updated_at')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Question texts are matched through the full-text index
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        matches = Q(pk__in=search_question_ids(search_term)) | Q(quiz__title__icontains=search_term)
+        return queryset.filter(matches), False
+
 class SubmissionAnswerInline(admin.TabularInline):
     """
     Inline admin for SubmissionAnswers within QuizSubmission admin
@@ -55,9 +79,9 @@ class QuizSubmissionAdmin(admin.ModelAdmin):
     Admin configuration for QuizSubmission model
     """
     list_display = ('user', 'quiz', 'score', 'total_questions', 'percentage_score', 'submitted_at')
-    list_filter = ('submitted_at', 'quiz', 'score')
+    list_filter = ('submitted_at', 'quiz', 'score', 'answer_storage')
     search_fields = ('user__username', 'quiz__title')
-    readonly_fields = ('submitted_at', 'percentage_score')
+    readonly_fields = ('submitted_at', 'percentage_score', 'answer_storage', 'draw_seed')
     inlines = [SubmissionAnswerInline]
 
 @admin.register(SubmissionAnswer)
@@ -67,4 +91,33 @@ class SubmissionAnswerAdmin(admin.ModelAdmin):
     """
     list_display = ('submission', 'question', 'selected_answer', 'is_correct')
     list_filter = ('is_correct', 'selected_answer')
-    search_fields = ('submission__user__username', 'question__question_text')
\ No newline at end of file
+    search_fields = ('submission__user__username', 'question__question_text')
+
+@admin.register(AttemptSession)
+class AttemptSessionAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for AttemptSession model
+    """
+    list_display = ('user', 'quiz', 'status', 'started_at', 'deadline', 'draft_saved_at')
+    list_filter = ('status', 'started_at')
+    search_fields = ('user__username', 'quiz__title')
+    readonly_fields = ('user', 'quiz', 'started_at', 'deadline', 'draft_answers', 'draft_version', 'draft_saved_at', 'submission')
+
+@admin.register(PendingSubmission)
+class PendingSubmissionAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for PendingSubmission model
+    """
+    list_display = ('user', 'quiz', 'status', 'created_at', 'processed_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__username', 'quiz__title')
+    readonly_fields = ('user', 'quiz', 'answers', 'submission', 'created_at', 'processed_at')
+
+@admin.register(UserProgress)
+class UserProgressAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for UserProgress model (rebuilt with rebuild_user_progress)
+    """
+    list_display = ('user', 'quizzes_taken', 'average_percentage', 'best_category', 'longest_streak', 'last_submission_at')
+    search_fields = ('user__username',)
+    readonly_fields = [field.name for field in UserProgress._meta.fields] + ['average_percentage']
@@ -0,0 +1,177 @@
+# quiz_app/analytics.py
+import math
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from .db import rebuild_on_commit
+from .models import Question, QuestionStats, Quiz, QuizSubmission, SubmissionAnswer
+from .packing import unpack_answers
+
+OPTIONS = ('A', 'B', 'C', 'D')
+OPTION_COUNT_FIELDS = {option: f'option_{option.lower()}_count' for option in OPTIONS}
+
+
+def _increment_for(question_ids, amount=1, default=0):
+    # Adds `amount` to the rows whose question is in question_ids, `default` to the others
+    return Case(When(question_id__in=question_ids, then=Value(amount)), default=Value(default))
+
+
+def record_answers(graded, score, total_questions):
+    """
+    Update the counters of every answered question in one UPDATE
+    graded is a list of (question_id, selected_answer, is_correct)
+    """
+    if not graded:
+        return
+    question_ids = [question_id for question_id, _, _ in graded]
+    correct_ids = [question_id for question_id, _, is_correct in graded if is_correct]
+    fraction = score / total_questions if total_questions else 0.0
+
+    # Counter rows are created lazily the first time a question is answered
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=question_id) for question_id in question_ids],
+        ignore_conflicts=True
+    )
+
+    option_updates = {
+        field: F(field) + _increment_for([qid for qid, selected, _ in graded if selected == option])
+        for option, field in OPTION_COUNT_FIELDS.items()
+    }
+    QuestionStats.objects.filter(question_id__in=question_ids).update(
+        attempts=F('attempts') + 1,
+        correct_count=F('correct_count') + _increment_for(correct_ids),
+        score_sum=F('score_sum') + fraction,
+        score_sq_sum=F('score_sq_sum') + fraction * fraction,
+        correct_score_sum=F('correct_score_sum') + _increment_for(correct_ids, fraction, 0.0),
+        **option_updates
+    )
+
+
+def discrimination_index(attempts, correct_count, score_sum, score_sq_sum, correct_score_sum):
+    """
+    Point-biserial correlation between answering an item correctly and the total score
+    Returns None when it isn't defined (no attempts, everyone right or wrong, no score spread)
+    """
+    incorrect_count = attempts - correct_count
+    if not attempts or not correct_count or not incorrect_count:
+        return None
+    mean = score_sum / attempts
+    variance = score_sq_sum / attempts - mean * mean
+    if variance <= 1e-12:
+        return None
+    mean_correct = correct_score_sum / correct_count
+    mean_incorrect = (score_sum - correct_score_sum) / incorrect_count
+    p = correct_count / attempts
+    return (mean_correct - mean_incorrect) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+def item_statistics(quiz_id):
+    """
+    Item statistics of every question in a quiz, computed in one pass over the counters
+    Reads one row per question - never the answer rows
+    """
+    rows = (
+        Question.objects.filter(quiz_id=quiz_id)
+        .order_by('id')
+        .values(
+            'id', 'question_text', 'correct_answer', 'is_active',
+            'stats__attempts', 'stats__correct_count',
+            'stats__option_a_count', 'stats__option_b_count',
+            'stats__option_c_count', 'stats__option_d_count',
+            'stats__score_sum', 'stats__score_sq_sum', 'stats__correct_score_sum'
+        )
+    )
+    results = []
+    for row in rows:
+        attempts = row['stats__attempts'] or 0
+        correct_count = row['stats__correct_count'] or 0
+        option_counts = {option: row[f'stats__{field}'] or 0 for option, field in OPTION_COUNT_FIELDS.items()}
+        results.append({
+            'question': row['id'],
+            'question_text': row['question_text'],
+            'correct_answer': row['correct_answer'],
+            'is_active': row['is_active'],
+            'attempts': attempts,
+            'correct_count': correct_count,
+            'percent_correct': (correct_count / attempts) * 100 if attempts else None,
+            'option_counts': option_counts,
+            'option_percentages': {
+                option: (count / attempts) * 100 if attempts else None
+                for option, count in option_counts.items()
+            },
+            'discrimination_index': discrimination_index(
+                attempts, correct_count,
+                row['stats__score_sum'] or 0.0,
+                row['stats__score_sq_sum'] or 0.0,
+                row['stats__correct_score_sum'] or 0.0
+            ),
+        })
+    return results
+
+
+def iter_quiz_answers(quiz_id, chunk_size=5000):
+    """
+    Stream every stored answer of a quiz as
+    (question_id, selected_answer, is_correct, score, total_questions),
+    whether it lives in answer rows or in packed submissions
+    """
+    rows = (
+        SubmissionAnswer.objects.filter(submission__quiz_id=quiz_id)
+        .values_list('question_id', 'selected_answer', 'is_correct',
+                     'submission__score', 'submission__total_questions')
+    )
+    yield from rows.iterator(chunk_size=chunk_size)
+
+    packed = (
+        QuizSubmission.objects.filter(quiz_id=quiz_id, answer_storage=QuizSubmission.PACKED)
+        .values_list('score', 'total_questions', 'packed_question_ids', 'packed_answers', 'correct_bitmap')
+    )
+    for score, total_questions, *packed_columns in packed.iterator(chunk_size=chunk_size):
+        for question_id, selected, is_correct in unpack_answers(*packed_columns):
+            yield question_id, selected, is_correct, score, total_questions
+
+
+def rebuild_question_stats(quiz_id):
+    """
+    Recompute the counters of a quiz from its stored answers
+    Batch operation for backfills and regrades - streams the answer rows once
+    """
+    counters = defaultdict(lambda: {
+        'attempts': 0, 'correct_count': 0, 'score_sum': 0.0, 'score_sq_sum': 0.0,
+        'correct_score_sum': 0.0, **{field: 0 for field in OPTION_COUNT_FIELDS.values()}
+    })
+    for question_id, selected, is_correct, score, total_questions in iter_quiz_answers(quiz_id):
+        fraction = score / total_questions if total_questions else 0.0
+        counter = counters[question_id]
+        counter['attempts'] += 1
+        counter['score_sum'] += fraction
+        counter['score_sq_sum'] += fraction * fraction
+        if selected in OPTION_COUNT_FIELDS:
+            counter[OPTION_COUNT_FIELDS[selected]] += 1
+        if is_correct:
+            counter['correct_count'] += 1
+            counter['correct_score_sum'] += fraction
+
+    with transaction.atomic():
+        QuestionStats.objects.filter(question__quiz_id=quiz_id).delete()
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(question_id=question_id, **counter) for question_id, counter in counters.items()],
+            batch_size=1000
+        )
+    return len(counters)
+
+
+def rebuild_quizzes_question_stats(quiz_ids):
+    """
+    Recompute the counters of the given quizzes that still exist
+    """
+    for quiz_id in Quiz.objects.filter(pk__in=quiz_ids).order_by('pk').values_list('pk', flat=True):
+        rebuild_question_stats(quiz_id)
+
+
+def rebuild_question_stats_on_commit(quiz_ids):
+    """
+    Rebuild the quizzes' counters once the current transaction commits
+    The counters only add up submissions, so deletes recompute them from the answers left
+    """
+    rebuild_on_commit(rebuild_quizzes_question_stats, quiz_ids)
@@ -0,0 +1,10 @@
+# quiz_app/async_urls.py
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('quizzes/', async_views.quiz_list, name='async-quiz-list'),
+    path('quizzes/<int:pk>/', async_views.quiz_detail, name='async-quiz-detail'),
+    path('quizzes/<int:quiz_id>/submit/', async_views.submit_quiz, name='async-submit-quiz'),
+    path('my-submissions/', async_views.user_submissions, name='async-user-submissions'),
+]
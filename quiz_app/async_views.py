@@ -0,0 +1,169 @@
+# quiz_app/async_views.py
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from users.async_views import async_api_view, api_response
+from users.authentication import resolve_user
+from .models import Quiz, QuizSubmission, PendingSubmission
+from .serializers import (
+    QuizSerializer, QuizSubmissionSerializer, QuizAttemptSerializer, PendingSubmissionSerializer
+)
+from .projections import QuizListProjection, SubmissionProjection
+from .ingestion import AlreadySubmitted, enqueue_submission
+from .pagination import QuizPagination, SubmissionPagination
+from .grading import (
+    collect_selections, load_answer_key, create_submission, prefetch_submission_answers
+)
+from .payloads import student_payload
+from .views import quiz_etag, etag_matches, set_etag
+
+# Async counterparts of the read and submit hot paths, for ASGI deployments.
+# Single queries use the async ORM directly. Multi-query sync code (DRF's cursor
+# paginator, the grading transaction) runs in one sync_to_async hop - the async
+# ORM runs queries on the same thread-sensitive executor anyway.
+
+
+def visible_quizzes(user):
+    return Quiz.objects.all() if user.is_admin else Quiz.objects.filter(is_active=True)
+
+
+def paginated_data(request, paginator, queryset, projection):
+    """
+    Fetch and render one cursor page - sync, called through sync_to_async
+    """
+    drf_request = Request(request)
+    page = paginator.paginate_queryset(projection.project(queryset), drf_request)
+    return paginator.get_paginated_response(projection.represent(page)).data
+
+
+@async_api_view(['GET'])
+async def quiz_list(request):
+    """
+    List quizzes - normal users see only active quizzes, admins see all
+    """
+    data = await sync_to_async(paginated_data)(
+        request, QuizPagination(), visible_quizzes(request.user), QuizListProjection()
+    )
+    return api_response(data)
+
+
+@async_api_view(['GET'])
+async def quiz_detail(request, pk):
+    """
+    Retrieve a quiz with its questions, honouring If-None-Match like the sync view
+    """
+    quizzes = visible_quizzes(request.user)
+    row = await quizzes.filter(pk=pk).values_list('version', 'pool_size', 'created_at').afirst()
+    etag = None
+    if row is not None:
+        version, pool_size, created_at = row
+        etag = quiz_etag(pk, version, request.user, pooled=bool(pool_size))
+        if etag_matches(request, etag):
+            return set_etag(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag)
+        if not request.user.is_admin:
+            # Pre-rendered payload - a cache read, plus one render per quiz version
+            content = await sync_to_async(student_payload)(pk, version, created_at, request.user.id)
+            if content is not None:
+                return set_etag(HttpResponse(content, content_type='application/json'), etag)
+
+    quiz = await aget_object_or_404(
+        quizzes.select_related('category', 'created_by').prefetch_related('questions'), pk=pk
+    )
+    # Everything is loaded, so serializing doesn't touch the database
+    response = api_response(QuizSerializer(quiz, context={'request': request}).data)
+    if etag is not None:
+        set_etag(response, etag)
+    return response
+
+
+@async_api_view(['GET'])
+async def user_submissions(request):
+    """
+    List all quiz submissions for the current user
+    """
+    data = await sync_to_async(paginated_data)(
+        request, SubmissionPagination(), QuizSubmission.objects.filter(user_id=request.user.id),
+        SubmissionProjection()
+    )
+    return api_response(data)
+
+
+def store_submission(user, quiz, answer_key, selections):
+    """
+    Grade and store a submission in one transaction - sync, called through sync_to_async
+    """
+    submission = create_submission(resolve_user(user), quiz, answer_key, selections)
+    prefetch_submission_answers(submission)
+    return QuizSubmissionSerializer(submission).data
+
+
+@async_api_view(['POST'])
+async def submit_quiz(request, quiz_id):
+    """
+    Submit answers for a quiz - same rules and responses as the sync submit view
+    """
+    if request.user.is_admin:
+        return api_response(
+            {"detail": "Admin users cannot submit quiz attempts."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    quiz = await aget_object_or_404(Quiz, id=quiz_id, is_active=True)
+
+    if quiz.time_limit_minutes:
+        return api_response(
+            {"detail": "This quiz is timed. Start an attempt and finalize it instead."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    already_queued = PendingSubmission.objects.filter(
+        user_id=request.user.id, quiz=quiz
+    ).exclude(status=PendingSubmission.FAILED)
+    if (await QuizSubmission.objects.filter(user_id=request.user.id, quiz=quiz).aexists()
+            or await already_queued.aexists()):
+        return api_response(
+            {"detail": "You have already submitted this quiz."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = QuizAttemptSerializer(data=request.data)
+    if not serializer.is_valid():
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    selections = collect_selections(serializer.validated_data['answers'])
+    answer_key = await sync_to_async(load_answer_key)(quiz, request.user.id)
+
+    if set(selections) != set(answer_key):
+        return api_response(
+            {"detail": "You must answer all questions."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if getattr(settings, 'QUIZ_ASYNC_SUBMISSIONS', False):
+        try:
+            pending = await sync_to_async(enqueue_submission)(
+                await sync_to_async(resolve_user)(request.user), quiz, selections
+            )
+        except AlreadySubmitted:
+            return api_response(
+                {"detail": "You have already submitted this quiz."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = PendingSubmissionSerializer(pending).data
+        data['status_url'] = request.build_absolute_uri(
+            reverse('pending-submission-detail', kwargs={'pk': pending.pk})
+        )
+        return api_response(data, status=status.HTTP_202_ACCEPTED)
+
+    try:
+        data = await sync_to_async(store_submission)(request.user, quiz, answer_key, selections)
+    except Exception as e:
+        return api_response(
+            {"detail": f"Error processing submission: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return api_response(data, status=status.HTTP_201_CREATED)
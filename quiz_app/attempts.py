@@ -0,0 +1,289 @@
+# quiz_app/attempts.py
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from .models import AttemptSession
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptClosed(Exception):
+    """
+    Raised when saving to or finalizing an attempt that is no longer open
+    """
+
+
+def decode_answers(draft_answers):
+    # JSON object keys are strings
+    return {int(question_id): selected for question_id, selected in draft_answers.items()}
+
+
+def encode_answers(answers):
+    return {str(question_id): selected for question_id, selected in answers.items()}
+
+
+class Draft:
+    """
+    In-memory state of an attempt session - everything the autosave path needs,
+    so saving a draft and checking the deadline don't write to the database
+    `answers` is the stored draft as of `version` plus `pending`, the answers
+    saved through this process that haven't been flushed yet
+    """
+    __slots__ = ('id', 'user_id', 'quiz_id', 'status', 'started_at', 'deadline', 'answers', 'pending', 'version')
+
+    def __init__(self, attempt):
+        self.id = attempt.pk
+        self.user_id = attempt.user_id
+        self.quiz_id = attempt.quiz_id
+        self.started_at = attempt.started_at
+        self.deadline = attempt.deadline
+        self.pending = {}
+        self.load(attempt.status, attempt.draft_answers, attempt.draft_version)
+
+    def load(self, status, draft_answers, version):
+        """
+        Take the stored state of the attempt, keeping unflushed answers on top
+        """
+        self.status = status
+        self.answers = {**decode_answers(draft_answers), **self.pending}
+        self.version = version
+
+    def is_expired(self, now=None):
+        if self.deadline is None:
+            return False
+        grace = timedelta(seconds=getattr(settings, 'QUIZ_ATTEMPT_GRACE_SECONDS', 5))
+        return (now or timezone.now()) > self.deadline + grace
+
+    def check_open(self):
+        if self.status == AttemptSession.SUBMITTED:
+            raise AttemptClosed("This attempt has already been submitted.")
+        if self.status == AttemptSession.EXPIRED or self.is_expired():
+            raise AttemptClosed("The time limit for this attempt has passed.")
+
+
+class DraftStore:
+    """
+    Bounded write-back cache of drafts
+    Saves only add to a draft's pending answers; pending answers are written at
+    most QUIZ_DRAFT_FLUSH_INTERVAL seconds later by a timer, when evicted, on
+    finalize and at exit. A flush merges them key by key into the stored draft,
+    so workers never overwrite each other's answers, and bumps draft_version;
+    drafts are checked against the stored version whenever they're used
+    """
+    def __init__(self, maxsize, flush_interval):
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def get(self, attempt_id):
+        with self._lock:
+            try:
+                self._data.move_to_end(attempt_id)
+            except KeyError:
+                return None
+            return self._data[attempt_id]
+
+    def add(self, draft):
+        with self._lock:
+            self._data[draft.id] = draft
+            self._data.move_to_end(draft.id)
+            evicted = []
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[1])
+        self.write([d for d in evicted if d.pending])
+
+    def pop(self, attempt_id):
+        with self._lock:
+            return self._data.pop(attempt_id, None)
+
+    def mark_dirty(self, draft, selections):
+        with self._lock:
+            draft.answers.update(selections)
+            draft.pending.update(selections)
+            self._schedule()
+
+    def _schedule(self):
+        # Called with the lock held
+        if self._timer is None and self.flush_interval:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            # Pending answers are kept and retried on the next timer
+            logger.exception("Flushing attempt drafts failed")
+        finally:
+            # The timer thread has its own connections
+            connections.close_all()
+        with self._lock:
+            if any(draft.pending for draft in self._data.values()):
+                self._schedule()
+
+    def flush(self):
+        """
+        Write every draft with pending answers in one batched UPDATE
+        Returns the number of drafts written
+        """
+        with self._lock:
+            dirty = [draft for draft in self._data.values() if draft.pending]
+        return self.write(dirty)
+
+    def write(self, drafts):
+        """
+        Merge the pending answers of drafts into their stored drafts and reload them
+        Drafts of attempts closed elsewhere drop their pending answers. Returns the
+        number of drafts written
+        """
+        with self._lock:
+            batch = [(draft, dict(draft.pending)) for draft in drafts]
+        if not batch:
+            return 0
+        with transaction.atomic():
+            stored = {
+                attempt_id: (status, draft_answers, version)
+                for attempt_id, status, draft_answers, version in
+                AttemptSession.objects.select_for_update()
+                .filter(pk__in=[draft.id for draft, _ in batch])
+                .values_list('id', 'status', 'draft_answers', 'draft_version')
+            }
+            now = timezone.now()
+            attempts = []
+            for draft, pending in batch:
+                status, draft_answers, version = stored.get(draft.id, (AttemptSession.EXPIRED, {}, draft.version))
+                if pending and status == AttemptSession.IN_PROGRESS:
+                    draft_answers = {**draft_answers, **encode_answers(pending)}
+                    version += 1
+                    attempts.append(AttemptSession(
+                        pk=draft.id, draft_answers=draft_answers, draft_version=version, draft_saved_at=now
+                    ))
+                stored[draft.id] = (status, draft_answers, version)
+            AttemptSession.objects.bulk_update(attempts, ['draft_answers', 'draft_version', 'draft_saved_at'])
+
+        with self._lock:
+            for draft, pending in batch:
+                # Answers saved again while the flush ran stay pending
+                for question_id, selected in pending.items():
+                    if draft.pending.get(question_id) == selected:
+                        del draft.pending[question_id]
+                draft.load(*stored[draft.id])
+        return len(attempts)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+drafts = DraftStore(
+    getattr(settings, 'QUIZ_DRAFT_CACHE_SIZE', 10000),
+    getattr(settings, 'QUIZ_DRAFT_FLUSH_INTERVAL', 30)
+)
+
+
+@atexit.register
+def flush_drafts_at_exit():
+    try:
+        drafts.flush()
+    except Exception:
+        logger.exception("Flushing attempt drafts at exit failed")
+
+
+def cached_draft(attempt_id):
+    """
+    The draft of an attempt, reloaded when another worker flushed newer answers
+    Costs one single-row lookup; returns None when the attempt doesn't exist
+    """
+    draft = drafts.get(attempt_id)
+    if draft is not None:
+        state = AttemptSession.objects.filter(pk=attempt_id).values_list('status', 'draft_version').first()
+        if state is None:
+            drafts.pop(attempt_id)
+            return None
+        if state == (draft.status, draft.version):
+            return draft
+    attempt = AttemptSession.objects.filter(pk=attempt_id).first()
+    if attempt is None:
+        return None
+    if draft is None:
+        draft = Draft(attempt)
+        drafts.add(draft)
+    else:
+        draft.load(attempt.status, attempt.draft_answers, attempt.draft_version)
+    return draft
+
+
+def start_attempt(user, quiz):
+    """
+    Start an attempt session, or return the user's existing one
+    Returns (draft, created)
+    """
+    attempt_id = AttemptSession.objects.filter(user_id=user.id, quiz=quiz).values_list('id', flat=True).first()
+    created = attempt_id is None
+    if created:
+        deadline = None
+        if quiz.time_limit_minutes:
+            deadline = timezone.now() + timedelta(minutes=quiz.time_limit_minutes)
+        try:
+            with transaction.atomic():
+                attempt = AttemptSession.objects.create(user_id=user.id, quiz=quiz, deadline=deadline)
+            draft = Draft(attempt)
+            drafts.add(draft)
+            return draft, True
+        except IntegrityError:
+            # Started concurrently by another request
+            attempt_id = AttemptSession.objects.get(user_id=user.id, quiz=quiz).pk
+    return cached_draft(attempt_id), False
+
+
+def get_draft(attempt_id, user_id):
+    """
+    Return the user's current draft
+    Returns None when the attempt doesn't exist or belongs to someone else
+    """
+    draft = cached_draft(attempt_id)
+    if draft is None or draft.user_id != user_id:
+        return None
+    return draft
+
+
+def save_draft(draft, selections):
+    """
+    Merge selections into a draft - raises AttemptClosed after submission or the deadline
+    """
+    draft.check_open()
+    drafts.mark_dirty(draft, selections)
+
+
+def flush_draft(draft):
+    """
+    Write the draft's pending answers now and reload it with every answer stored
+    for the attempt, whichever worker saved them. Call inside a transaction to
+    keep the attempt row locked until it's graded
+    """
+    drafts.write([draft])
+
+
+def close_attempt(draft, status, submission_id=None):
+    """
+    Record the final state of an attempt and drop its draft from memory
+    Pending answers are flushed first, so the stored draft is complete
+    """
+    with transaction.atomic():
+        flush_draft(draft)
+        AttemptSession.objects.filter(pk=draft.id).update(status=status, submission_id=submission_id)
+    draft.status = status
+    drafts.pop(draft.id)
@@ -0,0 +1,441 @@
+# quiz_app/benchmark.py
+import itertools
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.authentication import QuizRefreshToken
+from .models import Category, Quiz, Question, QuizSubmission
+from .synthetic import SYNTHETIC_PASSWORD
+from .ingestion import enqueue_submission
+from .attempts import start_attempt
+from .metrics import RequestTimer, request_timer
+from .middleware import install_query_timers
+
+User = get_user_model()
+
+# Benchmarked URL namespaces: every route of these URLconfs must have at least one case
+BENCHMARKED_URLCONFS = ('users.urls', 'quiz_app.urls', 'users.async_urls', 'quiz_app.async_urls')
+
+CASES = {}
+
+
+def case(route, label):
+    """
+    Register a benchmark case for a named route
+    The decorated function prepares one request - its own work isn't timed
+    """
+    def register(func):
+        CASES.setdefault(route, []).append((label, func))
+        return func
+    return register
+
+
+class BenchmarkRequest:
+    def __init__(self, client, method, path, data=None, format='json', headers=None):
+        self.client = client
+        self.method = method
+        self.path = path
+        self.data = data
+        self.format = format
+        self.headers = headers or {}
+
+    def send(self):
+        kwargs = {'format': self.format} if self.data is not None else {}
+        response = getattr(self.client, self.method)(self.path, self.data, **kwargs, **self.headers)
+        if response.streaming:
+            # Streaming responses only do their work while being consumed
+            for _ in response.streaming_content:
+                pass
+        return response
+
+
+class BenchmarkContext:
+    """
+    Dataset handles and authenticated clients shared by the benchmark cases
+    """
+    def __init__(self, dataset, seed=0):
+        self.rng = random.Random(seed)
+        self.counter = itertools.count()
+        self.admin = dataset['admins'][0]
+        self.students = dataset['students']
+        self.quizzes = [quiz for quiz in dataset['quizzes'] if quiz.is_active]
+        self.anonymous = APIClient()
+        self.admin_client = self.client_for(self.admin)
+        self.student = next(
+            student for student in self.students
+            if QuizSubmission.objects.filter(user=student).exists()
+        )
+        self.student_client = self.client_for(self.student)
+        self.submission = QuizSubmission.objects.filter(user=self.student).first()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {QuizRefreshToken.for_user(user).access_token}')
+        return client
+
+    def next_id(self):
+        return next(self.counter)
+
+    def quiz(self):
+        return self.rng.choice(self.quizzes)
+
+    def new_student(self):
+        n = self.next_id()
+        return User.objects.create_user(f'bench-student-{n}', f'bench{n}@example.com', SYNTHETIC_PASSWORD)
+
+    def new_category(self):
+        return Category.objects.create(name=f'Bench category {self.next_id()}', created_by=self.admin)
+
+    def new_quiz(self):
+        quiz = self.quiz()
+        return Quiz.objects.create(title='Bench quiz', description='Benchmark quiz',
+                                   category_id=quiz.category_id, created_by=self.admin)
+
+    def new_question(self, quiz):
+        return Question.objects.create(quiz=quiz, question_text='Bench question', option_a='a',
+                                       option_b='b', option_c='c', option_d='d', correct_answer='A')
+
+    def answers_for(self, quiz):
+        question_ids = Question.objects.filter(quiz=quiz, is_active=True).values_list('id', flat=True)
+        return {'answers': [{'question_id': str(question_id), 'selected_answer': self.rng.choice('ABCD')}
+                            for question_id in question_ids]}
+
+
+QUESTION_DATA = {
+    'question_text': 'Benchmark question?', 'option_a': 'a', 'option_b': 'b',
+    'option_c': 'c', 'option_d': 'd', 'correct_answer': 'B', 'is_active': True,
+}
+
+
+# users.urls
+
+@case('register', 'POST')
+def register_case(ctx):
+    n = ctx.next_id()
+    return BenchmarkRequest(ctx.anonymous, 'post', reverse('register'), {
+        'username': f'bench-register-{n}', 'email': f'register{n}@example.com',
+        'password': SYNTHETIC_PASSWORD, 'password_confirm': SYNTHETIC_PASSWORD, 'is_admin': False,
+    })
+
+
+@case('login', 'POST')
+def login_case(ctx):
+    return BenchmarkRequest(ctx.anonymous, 'post', reverse('login'),
+                            {'username': ctx.student.username, 'password': SYNTHETIC_PASSWORD})
+
+
+@case('profile', 'GET')
+def profile_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('profile'))
+
+
+# quiz_app.urls
+
+@case('category-list-create', 'GET')
+def category_list_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('category-list-create'))
+
+
+@case('category-list-create', 'POST')
+def category_create_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'post', reverse('category-list-create'),
+                            {'name': f'Bench new category {ctx.next_id()}'})
+
+
+@case('category-detail', 'GET')
+def category_detail_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('category-detail', args=[ctx.quiz().category_id]))
+
+
+@case('category-detail', 'PATCH')
+def category_update_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'patch', reverse('category-detail', args=[ctx.quiz().category_id]),
+                            {'description': f'Updated {ctx.next_id()}'})
+
+
+@case('category-detail', 'DELETE')
+def category_delete_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'delete', reverse('category-detail', args=[ctx.new_category().pk]))
+
+
+@case('quiz-list-create', 'GET student')
+def quiz_list_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('quiz-list-create'))
+
+
+@case('quiz-list-create', 'GET admin')
+def quiz_list_admin_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('quiz-list-create'))
+
+
+@case('quiz-list-create', 'POST')
+def quiz_create_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'post', reverse('quiz-list-create'), {
+        'title': 'Bench quiz', 'description': 'Benchmark quiz', 'category': ctx.quiz().category_id,
+    })
+
+
+@case('quiz-search', 'GET student')
+def quiz_search_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('quiz-search'), {'q': 'synthetic quest'})
+
+
+@case('quiz-detail', 'GET student')
+def quiz_detail_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('quiz-detail', args=[ctx.quiz().pk]))
+
+
+@case('quiz-detail', 'GET admin')
+def quiz_detail_admin_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('quiz-detail', args=[ctx.quiz().pk]))
+
+
+@case('quiz-detail', 'GET student If-None-Match')
+def quiz_detail_conditional_case(ctx):
+    path = reverse('quiz-detail', args=[ctx.quiz().pk])
+    etag = ctx.student_client.get(path).get('ETag', '')
+    return BenchmarkRequest(ctx.student_client, 'get', path, headers={'HTTP_IF_NONE_MATCH': etag})
+
+
+@case('quiz-detail', 'PATCH')
+def quiz_update_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'patch', reverse('quiz-detail', args=[ctx.quiz().pk]),
+                            {'description': f'Updated {ctx.next_id()}'})
+
+
+@case('quiz-detail', 'DELETE')
+def quiz_delete_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'delete', reverse('quiz-detail', args=[ctx.new_quiz().pk]))
+
+
+@case('question-list-create', 'GET')
+def question_list_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('question-list-create', args=[ctx.quiz().pk]))
+
+
+@case('question-list-create', 'POST')
+def question_create_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'post', reverse('question-list-create', args=[ctx.new_quiz().pk]),
+                            QUESTION_DATA)
+
+
+@case('question-import', 'POST 100 CSV rows')
+def question_import_case(ctx):
+    header = ','.join(QUESTION_DATA)
+    row = ','.join(str(value).lower() if isinstance(value, bool) else value for value in QUESTION_DATA.values())
+    upload = SimpleUploadedFile('questions.csv', '\n'.join([header] + [row] * 100).encode(), content_type='text/csv')
+    return BenchmarkRequest(ctx.admin_client, 'post', reverse('question-import', args=[ctx.new_quiz().pk]),
+                            {'file': upload}, format='multipart')
+
+
+@case('question-detail', 'GET')
+def question_detail_case(ctx):
+    question = Question.objects.filter(quiz=ctx.quiz()).first()
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('question-detail', args=[question.pk]))
+
+
+@case('question-detail', 'PATCH')
+def question_update_case(ctx):
+    question = ctx.new_question(ctx.new_quiz())
+    return BenchmarkRequest(ctx.admin_client, 'patch', reverse('question-detail', args=[question.pk]),
+                            {'question_text': f'Updated {ctx.next_id()}'})
+
+
+@case('question-detail', 'DELETE')
+def question_delete_case(ctx):
+    question = ctx.new_question(ctx.new_quiz())
+    return BenchmarkRequest(ctx.admin_client, 'delete', reverse('question-detail', args=[question.pk]))
+
+
+@case('submit-quiz', 'POST')
+def submit_case(ctx):
+    quiz = ctx.quiz()
+    return BenchmarkRequest(ctx.client_for(ctx.new_student()), 'post',
+                            reverse('submit-quiz', args=[quiz.pk]), ctx.answers_for(quiz))
+
+
+@case('quiz-leaderboard', 'GET')
+def leaderboard_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('quiz-leaderboard', args=[ctx.quiz().pk]))
+
+
+@case('quiz-analytics', 'GET')
+def analytics_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('quiz-analytics', args=[ctx.quiz().pk]))
+
+
+@case('user-submissions', 'GET')
+def user_submissions_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('user-submissions'))
+
+
+@case('my-stats', 'GET')
+def my_stats_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('my-stats'))
+
+
+@case('all-submissions', 'GET')
+def all_submissions_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('all-submissions'))
+
+
+@case('submission-export', 'GET csv')
+def submission_export_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('submission-export'))
+
+
+@case('submission-detail', 'GET')
+def submission_detail_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('submission-detail', args=[ctx.submission.pk]))
+
+
+@case('pending-submission-detail', 'GET')
+def pending_submission_case(ctx):
+    student, quiz = ctx.new_student(), ctx.quiz()
+    selections = {int(answer['question_id']): answer['selected_answer'] for answer in ctx.answers_for(quiz)['answers']}
+    pending = enqueue_submission(student, quiz, selections)
+    return BenchmarkRequest(ctx.client_for(student), 'get', reverse('pending-submission-detail', args=[pending.pk]))
+
+
+@case('attempt-start', 'POST')
+def attempt_start_case(ctx):
+    return BenchmarkRequest(ctx.client_for(ctx.new_student()), 'post', reverse('attempt-start', args=[ctx.quiz().pk]))
+
+
+def new_attempt(ctx):
+    student, quiz = ctx.new_student(), ctx.quiz()
+    draft, _ = start_attempt(student, quiz)
+    return ctx.client_for(student), quiz, draft
+
+
+@case('attempt-detail', 'GET')
+def attempt_detail_case(ctx):
+    client, _, draft = new_attempt(ctx)
+    return BenchmarkRequest(client, 'get', reverse('attempt-detail', args=[draft.id]))
+
+
+@case('attempt-detail', 'PATCH autosave')
+def attempt_save_case(ctx):
+    client, quiz, draft = new_attempt(ctx)
+    return BenchmarkRequest(client, 'patch', reverse('attempt-detail', args=[draft.id]),
+                            {'answers': ctx.answers_for(quiz)['answers'][:3]})
+
+
+@case('attempt-finalize', 'POST')
+def attempt_finalize_case(ctx):
+    client, quiz, draft = new_attempt(ctx)
+    return BenchmarkRequest(client, 'post', reverse('attempt-finalize', args=[draft.id]), ctx.answers_for(quiz))
+
+
+@case('request-metrics', 'GET')
+def request_metrics_case(ctx):
+    return BenchmarkRequest(ctx.admin_client, 'get', reverse('request-metrics'))
+
+
+# users.async_urls and quiz_app.async_urls
+
+@case('async-login', 'POST')
+def async_login_case(ctx):
+    return BenchmarkRequest(ctx.anonymous, 'post', reverse('async-login'),
+                            {'username': ctx.student.username, 'password': SYNTHETIC_PASSWORD})
+
+
+@case('async-quiz-list', 'GET student')
+def async_quiz_list_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('async-quiz-list'))
+
+
+@case('async-quiz-detail', 'GET student')
+def async_quiz_detail_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('async-quiz-detail', args=[ctx.quiz().pk]))
+
+
+@case('async-submit-quiz', 'POST')
+def async_submit_case(ctx):
+    quiz = ctx.quiz()
+    return BenchmarkRequest(ctx.client_for(ctx.new_student()), 'post',
+                            reverse('async-submit-quiz', args=[quiz.pk]), ctx.answers_for(quiz))
+
+
+@case('async-user-submissions', 'GET')
+def async_user_submissions_case(ctx):
+    return BenchmarkRequest(ctx.student_client, 'get', reverse('async-user-submissions'))
+
+
+def route_names():
+    """
+    Names of every route in the benchmarked URLconfs
+    """
+    from importlib import import_module
+    return [
+        pattern.name
+        for urlconf in BENCHMARKED_URLCONFS
+        for pattern in import_module(urlconf).urlpatterns
+        if pattern.name
+    ]
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_case(ctx, prepare, iterations, warmup=1):
+    timings = []
+    queries = []
+    statuses = set()
+    # Counted per request through a context variable, so queries the view runs on
+    # other threads (sync_to_async, the password hashing pool) are included
+    install_query_timers()
+    for iteration in range(warmup + iterations):
+        request = prepare(ctx)
+        timer = RequestTimer()
+        token = request_timer.set(timer)
+        try:
+            start = time.perf_counter()
+            response = request.send()
+            elapsed = time.perf_counter() - start
+        finally:
+            request_timer.reset(token)
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(timer.count)
+        statuses.add(response.status_code)
+
+    timings.sort()
+    queries.sort()
+    return {
+        'iterations': iterations,
+        'status_codes': sorted(statuses),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries_p50': percentile(queries, 0.50),
+        'queries_max': queries[-1],
+    }
+
+
+def run_benchmarks(ctx, iterations=30, routes=None):
+    """
+    Run every registered case and return {route: {label: stats}}
+    Raises ValueError if a route of the benchmarked URLconfs has no case
+    """
+    names = route_names()
+    uncovered = [name for name in names if name not in CASES]
+    if uncovered:
+        raise ValueError(f"No benchmark case for route(s): {', '.join(uncovered)}")
+
+    results = {}
+    for name in names:
+        if routes and name not in routes:
+            continue
+        results[name] = {label: run_case(ctx, prepare, iterations) for label, prepare in CASES[name]}
+    return results
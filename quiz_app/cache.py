@@ -0,0 +1,82 @@
+# quiz_app/cache.py
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from .models import Question
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process cache with least-recently-used eviction
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class AnswerKey:
+    """
+    Answer key of a quiz as of a given quiz version
+    """
+    __slots__ = ('quiz_id', 'version', 'correct_answers', 'active_ids', 'sorted_active_ids', 'answers')
+
+    def __init__(self, quiz_id, version, rows):
+        self.quiz_id = quiz_id
+        self.version = version
+        # rows are (question_id, correct_answer, is_active)
+        self.correct_answers = {question_id: correct for question_id, correct, _ in rows}
+        self.active_ids = frozenset(question_id for question_id, _, is_active in rows if is_active)
+        # Stable order for seeded question draws
+        self.sorted_active_ids = tuple(sorted(self.active_ids))
+        # Answer key used for grading - active questions only
+        self.answers = {
+            question_id: correct
+            for question_id, correct in self.correct_answers.items()
+            if question_id in self.active_ids
+        }
+
+
+answer_keys = LRUCache(getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_SIZE', 256))
+
+
+def get_answer_key(quiz):
+    """
+    Return the cached answer key for a quiz, reloading it when the quiz version moved on
+    """
+    answer_key = answer_keys.get(quiz.id)
+    if answer_key is None or answer_key.version != quiz.version:
+        rows = Question.objects.filter(quiz_id=quiz.id).values_list('id', 'correct_answer', 'is_active')
+        answer_key = AnswerKey(quiz.id, quiz.version, list(rows))
+        answer_keys.set(quiz.id, answer_key)
+    return answer_key
+
+
+def invalidate_answer_key(quiz_id):
+    answer_keys.pop(quiz_id)
@@ -0,0 +1,50 @@
+# quiz_app/db.py
+from django.conf import settings
+from django.db import transaction
+from .routers import REPLICA_ALIAS
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    connection_created handler applying QUIZ_SQLITE_PRAGMAS to every new SQLite connection
+    Django 5.0 has no init_command option for SQLite, so PRAGMAs are issued here
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(getattr(settings, 'QUIZ_SQLITE_PRAGMAS', {}))
+    if connection.alias == REPLICA_ALIAS:
+        # Guard against writes reaching the replica through a misrouted query
+        pragmas['query_only'] = 'ON'
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class RebuildOnCommit:
+    """
+    on_commit callback running `rebuild` once over the ids collected during a transaction
+    """
+    def __init__(self, rebuild):
+        self.rebuild = rebuild
+        self.ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.rebuild(sorted(self.ids))
+
+
+def rebuild_on_commit(rebuild, ids):
+    """
+    Call rebuild(ids) once the current transaction commits
+    Ids added during one transaction share a single call - a cascading delete
+    rebuilds once instead of once per deleted row
+    """
+    connection = transaction.get_connection()
+    for _, callback, _ in connection.run_on_commit:
+        if isinstance(callback, RebuildOnCommit) and callback.rebuild is rebuild and not callback.done:
+            callback.ids.update(ids)
+            return
+    callback = RebuildOnCommit(rebuild)
+    callback.ids.update(ids)
+    transaction.on_commit(callback)
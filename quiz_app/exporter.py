@@ -0,0 +1,121 @@
+# quiz_app/exporter.py
+import csv
+import heapq
+import json
+from .models import QuizSubmission, SubmissionAnswer
+from .packing import unpack_answers
+from .projections import datetime_formatter
+
+EXPORT_CHUNK_SIZE = 2000
+
+SUBMISSION_COLUMNS = (
+    'submission_id', 'user_id', 'username', 'quiz_id', 'quiz_title',
+    'score', 'total_questions', 'percentage_score', 'submitted_at'
+)
+ANSWER_COLUMNS = ('question_id', 'selected_answer', 'is_correct')
+
+# Database columns projected for each export column, in SUBMISSION_COLUMNS order
+SUBMISSION_FIELDS = (
+    'id', 'user_id', 'user__username', 'quiz_id', 'quiz__title',
+    'score', 'total_questions', 'submitted_at'
+)
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can feed a generator
+    """
+    def write(self, value):
+        return value
+
+
+def _submission_row(format_datetime, id, user_id, username, quiz_id, quiz_title, score, total_questions, submitted_at):
+    percentage = (score / total_questions) * 100 if total_questions else 0
+    return [id, user_id, username, quiz_id, quiz_title, score, total_questions, percentage, format_datetime(submitted_at)]
+
+
+def iter_submission_rows(submissions, include_answers):
+    """
+    Yield flat rows straight from value tuples, streaming the queryset in chunks
+    With answers there is one row per answer, prefixed by its submission columns.
+    Timestamps are formatted like the API's (e.g. a trailing Z for UTC)
+    """
+    format_datetime = datetime_formatter()
+    if not include_answers:
+        rows = submissions.order_by('id').values_list(*SUBMISSION_FIELDS)
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield _submission_row(format_datetime, *row)
+        return
+
+    answer_fields = tuple(f'submission__{field}' if field != 'id' else 'submission_id' for field in SUBMISSION_FIELDS)
+    answer_rows = (
+        SubmissionAnswer.objects.filter(submission__in=submissions)
+        .order_by('submission_id', 'id')
+        .values_list(*answer_fields, 'question_id', 'selected_answer', 'is_correct')
+    )
+    packed_rows = (
+        submissions.filter(answer_storage=QuizSubmission.PACKED)
+        .order_by('id')
+        .values_list(*SUBMISSION_FIELDS, 'packed_question_ids', 'packed_answers', 'correct_bitmap')
+    )
+    width = len(SUBMISSION_FIELDS)
+
+    def iter_packed_answers():
+        for row in packed_rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            for answer in unpack_answers(*row[width:]):
+                yield row[:width] + answer
+
+    # Both streams are ordered by submission id, so merging them keeps answers grouped
+    merged = heapq.merge(
+        answer_rows.iterator(chunk_size=EXPORT_CHUNK_SIZE),
+        iter_packed_answers(),
+        key=lambda row: row[0]
+    )
+    for row in merged:
+        yield _submission_row(format_datetime, *row[:width]) + list(row[width:])
+
+
+def stream_csv(submissions, include_answers):
+    writer = csv.writer(Echo())
+    columns = SUBMISSION_COLUMNS + (ANSWER_COLUMNS if include_answers else ())
+    yield writer.writerow(columns)
+    for row in iter_submission_rows(submissions, include_answers):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(submissions, include_answers):
+    """
+    One JSON object per submission; answers are nested when requested
+    Answer rows arrive ordered by submission, so they are grouped without buffering
+    """
+    width = len(SUBMISSION_COLUMNS)
+    current = None
+    for row in iter_submission_rows(submissions, include_answers):
+        if not include_answers:
+            yield json.dumps(dict(zip(SUBMISSION_COLUMNS, row))) + '\n'
+            continue
+        if current is None or current['submission_id'] != row[0]:
+            if current is not None:
+                yield json.dumps(current) + '\n'
+            current = dict(zip(SUBMISSION_COLUMNS, row[:width]))
+            current['answers'] = []
+        current['answers'].append(dict(zip(ANSWER_COLUMNS, row[width:])))
+    if current is not None:
+        yield json.dumps(current) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
+
+
+def export_submissions(file_type, include_answers=False, quiz_id=None):
+    """
+    Return (generator, content_type) for a streamed submissions export
+    """
+    submissions = QuizSubmission.objects.all()
+    if quiz_id is not None:
+        submissions = submissions.filter(quiz_id=quiz_id)
+    stream, content_type = EXPORT_FORMATS[file_type]
+    return stream(submissions, include_answers), content_type
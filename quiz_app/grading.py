@@ -0,0 +1,106 @@
+# quiz_app/grading.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from .models import QuizSubmission, SubmissionAnswer
+from .cache import get_answer_key
+from .pools import draw_question_ids, draw_seed
+from .leaderboard import record_submission
+from .analytics import record_answers
+from .progress import record_progress
+from .packing import pack_answers
+
+
+def load_answer_key(quiz, user_id=None):
+    """
+    Return the answer key of a quiz from the versioned cache
+    Returns {question_id: correct_answer} for active questions only - for pooled
+    quizzes, only the questions drawn for user_id
+    """
+    answer_key = get_answer_key(quiz)
+    if not quiz.pool_size:
+        return answer_key.answers
+    drawn = draw_question_ids(answer_key.sorted_active_ids, quiz.pool_size, draw_seed(quiz.id, user_id))
+    return {question_id: answer_key.answers[question_id] for question_id in drawn}
+
+
+def collect_selections(answers_data):
+    """
+    Map validated answers to {question_id: selected_answer}
+    """
+    return {int(answer['question_id']): answer['selected_answer'] for answer in answers_data}
+
+
+def grade_selections(answer_key, selections):
+    """
+    Score selections in memory against an answer key
+    Returns the graded answers as (question_id, selected_answer, is_correct) and the score
+    """
+    graded = [
+        (question_id, selected, answer_key.get(question_id) == selected)
+        for question_id, selected in selections.items()
+    ]
+    score = sum(1 for _, _, is_correct in graded if is_correct)
+    return graded, score
+
+
+def create_submission(user, quiz, answer_key, selections):
+    """
+    Grade selections and store the submission with all its answers
+    Uses one insert for the submission and one bulk insert for the answers (or a
+    single insert in packed storage mode), and updates question counters, the quiz
+    leaderboard and the user's progress rollup in the same transaction
+    """
+    graded, score = grade_selections(answer_key, selections)
+    seed = draw_seed(quiz.id, user.id) if quiz.pool_size else None
+    packed = getattr(settings, 'QUIZ_ANSWER_STORAGE', QuizSubmission.ROWS) == QuizSubmission.PACKED
+
+    with transaction.atomic():
+        if packed:
+            # Answers live in the submission row itself
+            submission = QuizSubmission.objects.create(
+                user=user,
+                quiz=quiz,
+                score=score,
+                total_questions=len(answer_key),
+                answer_storage=QuizSubmission.PACKED,
+                draw_seed=seed,
+                **pack_answers(graded)
+            )
+        else:
+            submission = QuizSubmission.objects.create(
+                user=user,
+                quiz=quiz,
+                score=score,
+                total_questions=len(answer_key),
+                draw_seed=seed
+            )
+            # bulk_create skips SubmissionAnswer.save(), so correctness is set here
+            SubmissionAnswer.objects.bulk_create([
+                SubmissionAnswer(
+                    submission=submission,
+                    question_id=question_id,
+                    selected_answer=selected,
+                    is_correct=is_correct
+                )
+                for question_id, selected, is_correct in graded
+            ])
+        record_answers(graded, score, len(answer_key))
+        record_submission(submission)
+        record_progress(submission, quiz.category_id)
+
+    return submission
+
+
+def prefetch_submission_answers(submission):
+    """
+    Load answers with their questions in one query so serializing a submission
+    doesn't hit the database once per answer
+    """
+    if submission.is_packed:
+        return submission
+    prefetch_related_objects(
+        [submission],
+        Prefetch('answers', queryset=SubmissionAnswer.objects.select_related('question'))
+    )
+    return submission
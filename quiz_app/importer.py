@@ -0,0 +1,151 @@
+# quiz_app/importer.py
+import codecs
+import csv
+import json
+from django.db import transaction
+from .models import Question
+from .serializers import QuestionSerializer
+from .signals import questions_changed
+from .search import index_questions
+from .similarity import index_question_signatures
+
+IMPORT_BATCH_SIZE = 500
+# Only the first errors are reported so the report stays small for huge broken files
+MAX_REPORTED_ERRORS = 100
+
+CSV_TYPES = ('csv',)
+NDJSON_TYPES = ('ndjson', 'jsonl')
+
+
+def detect_file_type(upload, file_type=None):
+    """
+    Work out the upload format from an explicit type, the file name or its content type
+    Returns 'csv', 'ndjson' or None
+    """
+    candidates = [file_type or '', upload.name.rsplit('.', 1)[-1], upload.content_type or '']
+    for candidate in candidates:
+        candidate = candidate.lower()
+        if any(name in candidate for name in CSV_TYPES):
+            return 'csv'
+        if any(name in candidate for name in NDJSON_TYPES):
+            return 'ndjson'
+    return None
+
+
+def iter_csv_rows(lines):
+    """
+    Yield (row_number, data, error) for a CSV stream with a header row
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # line_num is the source line the row ended on (the header is line 1)
+        yield reader.line_num, row, None
+
+
+def iter_ndjson_rows(lines):
+    """
+    Yield (row_number, data, error) for a newline-delimited JSON stream
+    """
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, {'non_field_errors': [f"Invalid JSON: {e}"]}
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, {'non_field_errors': ["Each line must be a JSON object"]}
+            continue
+        yield row_number, data, None
+
+
+class UnreadableFile(Exception):
+    """
+    Raised when an upload stops being decodable part-way through
+    """
+    def __init__(self, line, detail):
+        super().__init__(detail)
+        self.line = line
+
+
+class UploadLines:
+    """
+    Decoded lines of an uploaded file, counted so read errors can name their line
+    """
+    def __init__(self, upload):
+        self.upload = upload
+        self.line_number = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        # Iterating an uploaded file yields its lines
+        for line in self.upload:
+            self.line_number += 1
+            yield decoder.decode(line)
+
+
+def iter_upload_rows(upload, file_type):
+    """
+    Decode an uploaded file line by line without reading it into memory
+    Raises UnreadableFile when a line can't be decoded or parsed as CSV
+    """
+    lines = UploadLines(upload)
+    rows = iter_csv_rows(lines) if file_type == 'csv' else iter_ndjson_rows(lines)
+    try:
+        yield from rows
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise UnreadableFile(lines.line_number, f"Could not read file: {str(e)}") from e
+
+
+def import_questions(quiz, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate rows with the QuestionSerializer rules and insert them in fixed-size batches
+    Each batch is committed on its own; invalid rows are skipped and reported. If the
+    file becomes unreadable, the rows before it are still imported and the report's
+    read_error names the line - `created` is always what was committed
+    """
+    created = 0
+    failed = 0
+    errors = []
+    batch = []
+    read_error = None
+
+    def flush():
+        nonlocal created
+        with transaction.atomic():
+            Question.objects.bulk_create(batch)
+            # bulk_create skips model signals
+            questions_changed(quiz.id)
+            index_questions([question.pk for question in batch])
+            index_question_signatures(batch)
+        created += len(batch)
+        batch.clear()
+
+    try:
+        for row_number, data, error in rows:
+            if error is None:
+                serializer = QuestionSerializer(data=data)
+                if serializer.is_valid():
+                    batch.append(Question(quiz=quiz, **serializer.validated_data))
+                    if len(batch) >= batch_size:
+                        flush()
+                    continue
+                error = serializer.errors
+
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'errors': error})
+    except UnreadableFile as e:
+        read_error = {'row': e.line, 'detail': str(e)}
+
+    if batch:
+        flush()
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'read_error': read_error,
+    }
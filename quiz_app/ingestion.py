@@ -0,0 +1,129 @@
+# quiz_app/ingestion.py
+import uuid
+from datetime import timedelta
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from .models import PendingSubmission
+from .grading import create_submission, load_answer_key
+
+# Seconds after which a claimed entry is assumed abandoned by its worker
+CLAIM_TIMEOUT = 300
+
+
+class AlreadySubmitted(Exception):
+    pass
+
+
+def enqueue_submission(user, quiz, selections):
+    """
+    Queue validated selections for grading by the process_submissions worker
+    Raises AlreadySubmitted if the user already has a queued or processed attempt
+    """
+    try:
+        with transaction.atomic():
+            return PendingSubmission.objects.create(
+                user=user,
+                quiz=quiz,
+                # JSON object keys are strings
+                answers={str(question_id): selected for question_id, selected in selections.items()}
+            )
+    except IntegrityError:
+        raise AlreadySubmitted()
+
+
+def grade_pending(pending):
+    """
+    Grade one queued submission, setting its status, error and submission
+    Runs in a savepoint: a rejected or broken entry is marked failed without
+    undoing the rest of the batch. OperationalError (e.g. "database is locked")
+    is transient and propagates, so the batch can be retried as a whole
+    """
+    selections = {int(question_id): selected for question_id, selected in pending.answers.items()}
+    pending.processed_at = timezone.now()
+    try:
+        with transaction.atomic():
+            # The quiz may have changed since the attempt was queued
+            answer_key = load_answer_key(pending.quiz, pending.user_id)
+            if not pending.quiz.is_active:
+                pending.status, pending.error = PendingSubmission.FAILED, "Quiz is no longer active."
+            elif set(selections) != set(answer_key):
+                pending.status, pending.error = PendingSubmission.FAILED, "You must answer all questions."
+            else:
+                pending.submission = create_submission(pending.user, pending.quiz, answer_key, selections)
+                pending.status = PendingSubmission.PROCESSED
+    except IntegrityError:
+        pending.status, pending.error = PendingSubmission.FAILED, "You have already submitted this quiz."
+    except OperationalError:
+        raise
+    except Exception as e:
+        pending.status, pending.error = PendingSubmission.FAILED, f"Error processing submission: {str(e)}"
+    if pending.status != PendingSubmission.PROCESSED:
+        pending.submission = None
+
+
+def process_batch(pending_submissions):
+    """
+    Grade a batch of claimed submissions in one transaction
+    Each entry is graded in its own savepoint, so a rejected entry doesn't undo
+    the rest. On OperationalError the batch is rolled back, its claims are
+    released for a retry and the error is raised
+    """
+    processed = failed = 0
+    try:
+        with transaction.atomic():
+            for pending in pending_submissions:
+                grade_pending(pending)
+                if pending.status == PendingSubmission.PROCESSED:
+                    processed += 1
+                else:
+                    failed += 1
+
+            PendingSubmission.objects.bulk_update(
+                pending_submissions, ['status', 'error', 'submission', 'processed_at']
+            )
+    except OperationalError:
+        release_claims(pending_submissions)
+        raise
+    return processed, failed
+
+
+def release_claims(pending_submissions):
+    """
+    Put claimed entries back in the queue - best effort, stale claims are requeued anyway
+    """
+    try:
+        PendingSubmission.objects.filter(
+            pk__in=[pending.pk for pending in pending_submissions], status=PendingSubmission.PROCESSING
+        ).update(status=PendingSubmission.QUEUED, claim_token='', claimed_at=None)
+    except OperationalError:
+        pass
+
+
+def next_batch(batch_size, claim_timeout=CLAIM_TIMEOUT):
+    """
+    Claim up to batch_size queued submissions for this worker and return them
+    Entries are claimed with a conditional UPDATE, so concurrent workers never
+    grade the same entry. Claims older than claim_timeout seconds (a worker that
+    died mid-batch) are put back in the queue first
+    """
+    now = timezone.now()
+    PendingSubmission.objects.filter(
+        status=PendingSubmission.PROCESSING, claimed_at__lt=now - timedelta(seconds=claim_timeout)
+    ).update(status=PendingSubmission.QUEUED, claim_token='', claimed_at=None)
+
+    candidates = list(
+        PendingSubmission.objects.filter(status=PendingSubmission.QUEUED)
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    PendingSubmission.objects.filter(pk__in=candidates, status=PendingSubmission.QUEUED).update(
+        status=PendingSubmission.PROCESSING, claim_token=token, claimed_at=now
+    )
+    return list(
+        PendingSubmission.objects.filter(claim_token=token, status=PendingSubmission.PROCESSING)
+        .select_related('user', 'quiz')
+        .order_by('id')
+    )
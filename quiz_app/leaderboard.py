@@ -0,0 +1,99 @@
+# quiz_app/leaderboard.py
+from django.conf import settings
+from django.db import transaction
+from .db import rebuild_on_commit
+from .models import LeaderboardEntry, Quiz, QuizSubmission
+
+# Best score first, earliest submission wins ties
+LEADERBOARD_ORDERING = ('-score', 'submitted_at', 'id')
+
+
+def leaderboard_size():
+    return getattr(settings, 'QUIZ_LEADERBOARD_SIZE', 100)
+
+
+def record_submission(submission):
+    """
+    Add a graded submission to its quiz leaderboard
+    Only touches the at most QUIZ_LEADERBOARD_SIZE entries of that quiz
+    """
+    size = leaderboard_size()
+    entries = LeaderboardEntry.objects.filter(quiz_id=submission.quiz_id).order_by(*LEADERBOARD_ORDERING)
+
+    # A full board only changes if the new score beats the last entry -
+    # an equal score submitted later ranks behind it
+    last_score = entries.values_list('score', flat=True)[size - 1:size].first()
+    if last_score is not None and submission.score <= last_score:
+        return
+
+    LeaderboardEntry.objects.create(
+        quiz_id=submission.quiz_id,
+        submission=submission,
+        user_id=submission.user_id,
+        score=submission.score,
+        total_questions=submission.total_questions,
+        submitted_at=submission.submitted_at
+    )
+    if last_score is not None:
+        LeaderboardEntry.objects.filter(pk__in=list(entries.values_list('id', flat=True)[size:])).delete()
+
+
+def rebuild_leaderboard(quiz_id):
+    """
+    Recompute the leaderboard of a quiz from its submissions
+    """
+    submissions = (
+        QuizSubmission.objects.filter(quiz_id=quiz_id)
+        .order_by(*LEADERBOARD_ORDERING)
+        .values_list('id', 'user_id', 'score', 'total_questions', 'submitted_at')[:leaderboard_size()]
+    )
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id).delete()
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(
+                quiz_id=quiz_id,
+                submission_id=submission_id,
+                user_id=user_id,
+                score=score,
+                total_questions=total_questions,
+                submitted_at=submitted_at
+            )
+            for submission_id, user_id, score, total_questions, submitted_at in submissions
+        ])
+
+
+def rebuild_leaderboards(quiz_ids):
+    """
+    Recompute the leaderboards of the given quizzes that still exist
+    """
+    for quiz_id in Quiz.objects.filter(pk__in=quiz_ids).order_by('pk').values_list('pk', flat=True):
+        rebuild_leaderboard(quiz_id)
+
+
+def rebuild_leaderboards_on_commit(quiz_ids):
+    """
+    Rebuild the quizzes' leaderboards once the current transaction commits
+    A trimmed board can't tell which submission should take the place of a
+    deleted entry, so deletes refill it from the submissions
+    """
+    rebuild_on_commit(rebuild_leaderboards, quiz_ids)
+
+
+def top_entries(quiz_id, limit):
+    """
+    Return the top `limit` entries of a quiz leaderboard with their rank
+    Tied scores share a rank (1, 2, 2, 4) and are listed by submission time
+    """
+    entries = (
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id)
+        .order_by(*LEADERBOARD_ORDERING)
+        .select_related('user')[:limit]
+    )
+    ranked = []
+    rank, previous_score = 0, None
+    for position, entry in enumerate(entries, start=1):
+        if entry.score != previous_score:
+            rank, previous_score = position, entry.score
+        entry.rank = rank
+        ranked.append(entry)
+    return ranked
@@ -0,0 +1,59 @@
+# quiz_app/management/commands/benchmark_endpoints.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+from django.utils import timezone
+from quiz_app.attempts import drafts
+from quiz_app.benchmark import BenchmarkContext, run_benchmarks
+from quiz_app.synthetic import generate_dataset
+from .generate_synthetic_data import add_scale_arguments, scale_from_options
+
+
+class Command(BaseCommand):
+    """
+    Measure latency and query counts of every API route against synthetic data
+    Runs in a throwaway test database, so the configured database is never touched
+    """
+    help = "Benchmark every API route and write p50/p95/p99 latency and query counts as JSON"
+
+    def add_arguments(self, parser):
+        add_scale_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=30, help="Timed requests per case")
+        parser.add_argument('--route', action='append', dest='routes', help="Only benchmark this route name (repeatable)")
+        parser.add_argument('--label', default='', help="Free-form label stored in the report, e.g. a commit hash")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        scale = scale_from_options(options)
+
+        setup_test_environment()
+        # Creates the test database and points mirrors (the read replica) at it
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+        try:
+            dataset = generate_dataset(**scale)
+            context = BenchmarkContext(dataset, seed=options['seed'])
+            results = run_benchmarks(context, options['iterations'], options['routes'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            # Drafts autosaved by the run belong to the throwaway database
+            drafts.clear()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps({
+            'label': options['label'],
+            'created_at': timezone.now().isoformat(),
+            'scale': scale,
+            'iterations': options['iterations'],
+            'results': results,
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,27 @@
+# quiz_app/management/commands/export_snapshot.py
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.snapshot import SNAPSHOT_CHUNK_SIZE, export_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Export submissions and answers as memory-mappable columnar .npy files
+    Re-running appends submissions newer than the last snapshot
+    """
+    help = "Write or extend a columnar (.npy) snapshot of submissions and answers for offline analysis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="Snapshot directory (created if missing)")
+        parser.add_argument('--full', action='store_true',
+                            help="Discard the existing snapshot and export everything again")
+        parser.add_argument('--chunk-size', type=int, default=SNAPSHOT_CHUNK_SIZE,
+                            help="Submissions read per query")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        try:
+            added = export_snapshot(options['directory'], full=options['full'], chunk_size=options['chunk_size'])
+        except ValueError as exc:
+            raise CommandError(f"{exc} - use --full to start a new snapshot")
+        self.stdout.write(self.style.SUCCESS(f"Added {added} submission(s) to {options['directory']}"))
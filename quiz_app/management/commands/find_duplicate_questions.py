@@ -0,0 +1,49 @@
+# quiz_app/management/commands/find_duplicate_questions.py
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.models import Question
+from quiz_app.similarity import duplicate_clusters, rebuild_similarity_index
+
+PREVIEW_LENGTH = 80
+
+
+class Command(BaseCommand):
+    """
+    Report clusters of near-duplicate questions across the whole question bank
+    Uses the MinHash/LSH index, so only questions sharing a bucket are compared
+    """
+    help = "Report near-duplicate questions using the MinHash/LSH similarity index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=None,
+                            help="Minimum estimated similarity, 0-1 (default: QUIZ_SIMILARITY_THRESHOLD)")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute every question signature before reporting")
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is not None and not 0 < threshold <= 1:
+            raise CommandError("--threshold must be between 0 and 1")
+
+        if options['rebuild']:
+            count = rebuild_similarity_index()
+            self.stdout.write(f"Indexed {count} question(s)")
+
+        clusters = duplicate_clusters(threshold)
+        questions = Question.objects.only('id', 'quiz_id', 'question_text').in_bulk(
+            [question_id for cluster in clusters for question_id in cluster]
+        )
+        for number, cluster in enumerate(clusters, 1):
+            self.stdout.write(f"Cluster {number} ({len(cluster)} questions):")
+            for question_id in cluster:
+                question = questions.get(question_id)
+                if question is None:
+                    continue
+                text = ' '.join(question.question_text.split())
+                if len(text) > PREVIEW_LENGTH:
+                    text = text[:PREVIEW_LENGTH - 3] + '...'
+                self.stdout.write(f"  Q{question.pk} (quiz {question.quiz_id}): {text}")
+
+        duplicates = sum(len(cluster) - 1 for cluster in clusters)
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {len(clusters)} cluster(s), {duplicates} redundant question(s)"
+        ))
@@ -0,0 +1,41 @@
+# quiz_app/management/commands/generate_synthetic_data.py
+from django.core.management.base import BaseCommand
+from quiz_app.synthetic import SYNTHETIC_PASSWORD, generate_dataset
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--users', type=int, default=200, help="Number of normal users")
+    parser.add_argument('--categories', type=int, default=5, help="Number of categories")
+    parser.add_argument('--quizzes', type=int, default=50, help="Number of quizzes")
+    parser.add_argument('--questions', type=int, default=20, help="Questions per quiz")
+    parser.add_argument('--submissions-per-user', type=int, default=5, help="Quizzes submitted by each user")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+
+
+def scale_from_options(options):
+    return {
+        'users': options['users'],
+        'categories': options['categories'],
+        'quizzes': options['quizzes'],
+        'questions': options['questions'],
+        'submissions_per_user': options['submissions_per_user'],
+        'seed': options['seed'],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Fill the configured database with synthetic users, quizzes and submissions
+    """
+    help = "Generate a synthetic dataset in the configured database"
+
+    def add_arguments(self, parser):
+        add_scale_arguments(parser)
+
+    def handle(self, *args, **options):
+        dataset = generate_dataset(**scale_from_options(options))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(dataset['students'])} users, {len(dataset['categories'])} categories, "
+            f"{len(dataset['quizzes'])} quizzes, {len(dataset['questions'])} questions and "
+            f"{dataset['submissions']} submissions (password: {SYNTHETIC_PASSWORD})"
+        ))
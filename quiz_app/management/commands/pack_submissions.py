@@ -0,0 +1,82 @@
+# quiz_app/management/commands/pack_submissions.py
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz_app.models import QuizSubmission, SubmissionAnswer
+from quiz_app.packing import pack_answers, unpack_answers
+
+PACKED_FIELDS = ['answer_storage', 'packed_question_ids', 'packed_answers', 'correct_bitmap']
+
+
+class Command(BaseCommand):
+    """
+    Migrate submissions between answer-row and packed answer storage
+    """
+    help = "Pack SubmissionAnswer rows into their submissions (or unpack them with --unpack)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, help="Only convert submissions of this quiz")
+        parser.add_argument('--unpack', action='store_true', help="Convert packed submissions back to answer rows")
+        parser.add_argument('--batch-size', type=int, default=500, help="Submissions converted per transaction")
+
+    def handle(self, *args, **options):
+        source = QuizSubmission.PACKED if options['unpack'] else QuizSubmission.ROWS
+        submissions = QuizSubmission.objects.filter(answer_storage=source).order_by('id')
+        if options['quiz']:
+            submissions = submissions.filter(quiz_id=options['quiz'])
+
+        convert = self.unpack_batch if options['unpack'] else self.pack_batch
+        converted = 0
+        last_id = 0
+        while True:
+            # Keyset batches, so each batch is an index seek rather than an OFFSET scan
+            batch_ids = list(submissions.filter(id__gt=last_id).values_list('id', flat=True)[:options['batch_size']])
+            if not batch_ids:
+                break
+            with transaction.atomic():
+                convert(batch_ids)
+            converted += len(batch_ids)
+            last_id = batch_ids[-1]
+
+        action = "Unpacked" if options['unpack'] else "Packed"
+        self.stdout.write(self.style.SUCCESS(f"{action} {converted} submission(s)"))
+
+    def pack_batch(self, submission_ids):
+        graded = defaultdict(list)
+        answers = SubmissionAnswer.objects.filter(submission_id__in=submission_ids).values_list(
+            'submission_id', 'question_id', 'selected_answer', 'is_correct'
+        )
+        for submission_id, question_id, selected, is_correct in answers:
+            graded[submission_id].append((question_id, selected, is_correct))
+
+        QuizSubmission.objects.bulk_update(
+            [
+                QuizSubmission(
+                    id=submission_id,
+                    answer_storage=QuizSubmission.PACKED,
+                    **pack_answers(graded[submission_id])
+                )
+                for submission_id in submission_ids
+            ],
+            PACKED_FIELDS
+        )
+        SubmissionAnswer.objects.filter(submission_id__in=submission_ids).delete()
+
+    def unpack_batch(self, submission_ids):
+        packed = QuizSubmission.objects.filter(id__in=submission_ids).values_list(
+            'id', 'packed_question_ids', 'packed_answers', 'correct_bitmap'
+        )
+        SubmissionAnswer.objects.bulk_create([
+            SubmissionAnswer(
+                submission_id=submission_id,
+                question_id=question_id,
+                selected_answer=selected,
+                is_correct=is_correct
+            )
+            for submission_id, *packed_columns in packed
+            for question_id, selected, is_correct in unpack_answers(*packed_columns)
+        ], batch_size=1000)
+        QuizSubmission.objects.bulk_update(
+            [QuizSubmission(id=submission_id, answer_storage=QuizSubmission.ROWS) for submission_id in submission_ids],
+            PACKED_FIELDS
+        )
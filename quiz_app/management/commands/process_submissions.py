@@ -0,0 +1,56 @@
+# quiz_app/management/commands/process_submissions.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+from quiz_app.ingestion import CLAIM_TIMEOUT, next_batch, process_batch
+
+# Upper bound of the wait between retries after a database error
+MAX_BACKOFF = 60
+
+
+class Command(BaseCommand):
+    """
+    Worker that grades queued submissions in batches
+    Several workers can drain the queue at once - each batch is claimed first
+    """
+    help = "Drain the pending submission queue, grading one batch per transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Submissions graded per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting when it's empty")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to wait between polls of an empty queue")
+        parser.add_argument('--max-retries', type=int, default=5,
+                            help="Consecutive database errors tolerated before giving up (without --loop)")
+        parser.add_argument('--claim-timeout', type=int, default=CLAIM_TIMEOUT,
+                            help="Seconds after which entries claimed by a dead worker are requeued")
+
+    def handle(self, *args, **options):
+        total_processed = total_failed = 0
+        errors = 0
+        while True:
+            try:
+                batch = next_batch(options['batch_size'], options['claim_timeout'])
+                if not batch:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                processed, failed = process_batch(batch)
+            except OperationalError as e:
+                # Transient (e.g. "database is locked") - the batch was rolled back and released
+                errors += 1
+                if not options['loop'] and errors > options['max_retries']:
+                    raise CommandError(f"Giving up after {errors} database errors: {e}")
+                delay = min(max(options['interval'], 0.1) * 2 ** (errors - 1), MAX_BACKOFF)
+                self.stderr.write(f"Database error ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            errors = 0
+            total_processed += processed
+            total_failed += failed
+            self.stdout.write(f"Graded batch of {len(batch)}: {processed} processed, {failed} failed")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Queue drained: {total_processed} processed, {total_failed} failed"
+        ))
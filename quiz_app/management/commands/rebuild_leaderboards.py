@@ -0,0 +1,22 @@
+# quiz_app/management/commands/rebuild_leaderboards.py
+from django.core.management.base import BaseCommand
+from quiz_app.models import Quiz
+from quiz_app.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    """
+    Rebuild precomputed quiz leaderboards from submissions
+    """
+    help = "Rebuild quiz leaderboards from existing submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help="Quizzes to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids'] or Quiz.objects.order_by('id').values_list('id', flat=True)
+        rebuilt = 0
+        for quiz_id in quiz_ids:
+            rebuild_leaderboard(quiz_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} leaderboard(s)"))
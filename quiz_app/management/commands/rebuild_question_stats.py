@@ -0,0 +1,21 @@
+# quiz_app/management/commands/rebuild_question_stats.py
+from django.core.management.base import BaseCommand
+from quiz_app.models import Quiz
+from quiz_app.analytics import rebuild_question_stats
+
+
+class Command(BaseCommand):
+    """
+    Recompute per-question answer counters from stored answers
+    """
+    help = "Rebuild per-question analytics counters from existing answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help="Quizzes to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids'] or Quiz.objects.order_by('id').values_list('id', flat=True)
+        questions = 0
+        for quiz_id in quiz_ids:
+            questions += rebuild_question_stats(quiz_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {questions} question(s)"))
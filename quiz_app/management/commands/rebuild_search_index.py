@@ -0,0 +1,16 @@
+# quiz_app/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search index of quizzes and questions
+    """
+    help = "Rebuild the quiz and question full-text search index"
+
+    def handle(self, *args, **options):
+        counts = rebuild_index()
+        if counts is None:
+            raise CommandError("Full-text search needs SQLite (FTS5); other databases use substring search.")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {counts[0]} quiz(zes) and {counts[1]} question(s)"))
@@ -0,0 +1,17 @@
+# quiz_app/management/commands/rebuild_user_progress.py
+from django.core.management.base import BaseCommand
+from quiz_app.progress import rebuild_user_progress
+
+
+class Command(BaseCommand):
+    """
+    Backfill per-user progress rollups from submissions
+    """
+    help = "Rebuild per-user progress rollups (dashboard stats) from existing submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help="Users to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        written = rebuild_user_progress(options['user_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress of {written} user(s)"))
@@ -0,0 +1,24 @@
+# quiz_app/management/commands/regrade.py
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.models import Quiz
+from quiz_app.regrade import REGRADE_CHUNK_SIZE, regrade_quiz
+
+
+class Command(BaseCommand):
+    """
+    Regrade stored submissions after an answer key change
+    """
+    help = "Recompute answer correctness and scores of quiz submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='+', type=int, help="Quizzes to regrade")
+        parser.add_argument('--chunk-size', type=int, default=REGRADE_CHUNK_SIZE, help="Submissions per transaction")
+
+    def handle(self, *args, **options):
+        missing = set(options['quiz_ids']) - set(Quiz.objects.filter(pk__in=options['quiz_ids']).values_list('id', flat=True))
+        if missing:
+            raise CommandError(f"Quiz not found: {', '.join(map(str, sorted(missing)))}")
+
+        for quiz_id in options['quiz_ids']:
+            changed = regrade_quiz(quiz_id, options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Quiz {quiz_id}: {changed} score(s) changed"))
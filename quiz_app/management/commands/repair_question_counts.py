@@ -0,0 +1,38 @@
+# quiz_app/management/commands/repair_question_counts.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from quiz_app.models import Quiz
+from quiz_app.signals import active_question_count_subquery
+
+
+class Command(BaseCommand):
+    """
+    Recompute Quiz.active_question_count and fix quizzes whose counter drifted
+    """
+    help = "Repair denormalized active question counts on quizzes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted quizzes without fixing them")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(
+                Quiz.objects.annotate(actual_count=active_question_count_subquery())
+                .values_list('id', 'active_question_count', 'actual_count')
+                .order_by('id')
+            )
+            drifted = [row for row in drifted if row[1] != row[2]]
+
+            for quiz_id, stored, actual in drifted:
+                self.stdout.write(f"Quiz {quiz_id}: stored {stored}, actual {actual}")
+
+            if drifted and not options['dry_run']:
+                # The count is part of the quiz payload, so the version moves too
+                Quiz.objects.filter(pk__in=[row[0] for row in drifted]).update(
+                    version=F('version') + 1,
+                    active_question_count=active_question_count_subquery()
+                )
+
+        action = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifted)} drifted quiz counter(s)"))
@@ -0,0 +1,40 @@
+# quiz_app/management/commands/sync_replica.py
+import sqlite3
+import time
+from contextlib import closing
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.routers import REPLICA_ALIAS, REPLICA_STATE_TABLE, replica_configured
+
+
+class Command(BaseCommand):
+    """
+    Refresh a local SQLite read replica from the primary database
+    Uses SQLite's online backup, so the primary keeps serving while it runs.
+    The replica records when the copy started; requests only read from it while
+    that is within QUIZ_REPLICA_MAX_LAG seconds and after the user's last write,
+    so run this more often than QUIZ_REPLICA_MAX_LAG (e.g. from cron or a loop)
+    """
+    help = "Copy the primary SQLite database into the read replica file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1024, help="Pages copied per backup step")
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError("No replica database configured - set QUIZ_DB_REPLICA.")
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES[REPLICA_ALIAS]
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError("sync_replica only copies SQLite databases; use the server's replication otherwise.")
+
+        # Taken before the copy starts, so every write committed before this time is in it
+        started_at = time.time()
+        with closing(sqlite3.connect(primary['NAME'])) as source, closing(sqlite3.connect(replica['NAME'])) as target:
+            source.backup(target, pages=options['pages'])
+            with target:
+                target.execute(f'CREATE TABLE IF NOT EXISTS {REPLICA_STATE_TABLE} (synced_at REAL NOT NULL)')
+                target.execute(f'DELETE FROM {REPLICA_STATE_TABLE}')
+                target.execute(f'INSERT INTO {REPLICA_STATE_TABLE} (synced_at) VALUES (?)', [started_at])
+
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to {replica['NAME']}"))
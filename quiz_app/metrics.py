@@ -0,0 +1,147 @@
+# quiz_app/metrics.py
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from rest_framework import serializers
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RouteMetrics:
+    """
+    Aggregated timings of one route
+    """
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.view_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_ms = 0.0
+        self.queries = 0
+        self.max_ms = 0.0
+
+    def record(self, timings):
+        self.count += 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, timings['total_ms'])] += 1
+        self.total_ms += timings['total_ms']
+        self.db_ms += timings['db_ms']
+        self.view_ms += timings['view_ms']
+        self.serialize_ms += timings['serialize_ms']
+        self.render_ms += timings['render_ms']
+        self.queries += timings['queries']
+        self.max_ms = max(self.max_ms, timings['total_ms'])
+
+    def as_dict(self):
+        labels = [f'le_{bound}ms' for bound in LATENCY_BUCKETS_MS] + ['inf']
+        return {
+            'count': self.count,
+            'histogram': dict(zip(labels, self.buckets)),
+            'max_ms': round(self.max_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3),
+            'mean_db_ms': round(self.db_ms / self.count, 3),
+            'mean_view_ms': round(self.view_ms / self.count, 3),
+            'mean_serialize_ms': round(self.serialize_ms / self.count, 3),
+            'mean_render_ms': round(self.render_ms / self.count, 3),
+            'mean_queries': round(self.queries / self.count, 2),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-memory per-route histograms of the current process
+    """
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, timings):
+        with self._lock:
+            self._routes.setdefault(route, RouteMetrics()).record(timings)
+
+    def snapshot(self):
+        with self._lock:
+            return {route: metrics.as_dict() for route, metrics in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+class RequestTimer:
+    """
+    Query count, SQL time and serialization time of one request
+    Called as a database execute wrapper; queries are also added to the
+    enclosing timer (e.g. the benchmark's around the metrics middleware's)
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.serialize_duration = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            timer = self
+            while timer is not None:
+                timer.duration += elapsed
+                timer.count += 1
+                timer = timer.parent
+
+
+# Timer of the request being handled. A context variable, so work the view runs
+# through sync_to_async (which copies the context to a worker thread) is counted
+# for the right request, even when requests share that thread
+request_timer = ContextVar('request_timer', default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Add the time spent in the block to the current request's serialization time
+    Nested blocks (serializers rendering serializers) are counted once
+    """
+    timer = request_timer.get()
+    if timer is None or timer.serializing:
+        yield
+        return
+    timer.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.serialize_duration += time.perf_counter() - start
+        timer.serializing = False
+
+
+def timed_data(prop):
+    @functools.wraps(prop.fget)
+    def data(self):
+        with timed_serialization():
+            return prop.fget(self)
+    data.timed = True
+    return property(data)
+
+
+def install_serializer_timer():
+    """
+    Time `.data` of every DRF serializer - views evaluate it themselves, so
+    serialization would otherwise only show up as view time
+    """
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        if not getattr(prop.fget, 'timed', False):
+            cls.data = timed_data(prop)
@@ -0,0 +1,222 @@
+# quiz_app/middleware.py
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .metrics import RequestTimer, install_serializer_timer, registry, request_timer
+from .routers import replica_configured, replica_reads, replica_state
+
+logger = logging.getLogger('quiz_app.metrics')
+
+
+def timed_execute(execute, sql, params, many, context):
+    timer = request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """
+    connection_created handler adding timed_execute to a connection (once)
+    """
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+def install_query_timers():
+    """
+    Count the queries of every connection, in any thread, for the current request's timer
+    """
+    connection_created.connect(install_query_timer, dispatch_uid='quiz_request_metrics')
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection=connection)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, SQL time, view time, serialization time and render time of each request
+    Serialization (serializer .data and list projections) runs inside the view, so
+    it's part of the view time; render is the JSON encoding after the view returned.
+    Emits them as a Server-Timing header and a structured log line, and aggregates
+    per-route histograms for the metrics endpoint. Enabled by QUIZ_REQUEST_METRICS;
+    when off, Django drops the middleware at startup so it costs nothing.
+    Works in both sync and async middleware chains, so async views keep running
+    without a sync adapter
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUIZ_REQUEST_METRICS', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        install_query_timers()
+        install_serializer_timer()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = RequestTimer(parent=request_timer.get())
+        request._metrics_view_start = request._metrics_view_end = None
+        token = request_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timer.reset(token)
+        return self.record(request, response, timer, start, time.perf_counter())
+
+    async def __acall__(self, request):
+        timer = RequestTimer(parent=request_timer.get())
+        request._metrics_view_start = request._metrics_view_end = None
+        token = request_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timer.reset(token)
+        return self.record(request, response, timer, start, time.perf_counter())
+
+    def record(self, request, response, timer, start, end):
+        view_start = request._metrics_view_start or start
+        # Template responses (DRF's Response) are rendered after the view returns
+        view_end = request._metrics_view_end or end
+        timings = {
+            'total_ms': (end - start) * 1000,
+            'db_ms': timer.duration * 1000,
+            'view_ms': (view_end - view_start) * 1000,
+            'serialize_ms': timer.serialize_duration * 1000,
+            'render_ms': (end - view_end) * 1000,
+            'queries': timer.count,
+        }
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings["db_ms"]:.2f};desc="{timer.count} queries"',
+            f'view;dur={timings["view_ms"]:.2f}',
+            f'serialize;dur={timings["serialize_ms"]:.2f}',
+            f'render;dur={timings["render_ms"]:.2f}',
+            f'total;dur={timings["total_ms"]:.2f}',
+        ])
+
+        match = request.resolver_match
+        route = f'{request.method} /{match.route}' if match else f'{request.method} <unmatched>'
+        registry.record(route, timings)
+        logger.info(json.dumps({
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            **{key: round(value, 3) for key, value in timings.items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._metrics_view_end = time.perf_counter()
+        return response
+
+
+def token_user_id(request):
+    """
+    User id of the request's JWT, without loading the user - None for anonymous requests
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve reads of safe requests (GET, HEAD, OPTIONS) from the read replica
+    Unsafe requests (submits, admin writes) use the primary, and a successful one
+    records the user's last write time in the QUIZ_REPLICA_PIN_CACHE cache. That
+    user's reads stay on the primary until the replica holds a copy taken after
+    the write (read-your-writes), whichever client they use. Everyone reads from
+    the primary while the replica is more than QUIZ_REPLICA_MAX_LAG seconds old or
+    doesn't record its sync time, so replica reads are never older than that.
+    Removed at startup when no replica database is configured
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.max_lag = getattr(settings, 'QUIZ_REPLICA_MAX_LAG', 60)
+        self.pin_cache = getattr(settings, 'QUIZ_REPLICA_PIN_CACHE', 'default')
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def pin_key(self, user_id):
+        return f'replica-pin:{user_id}'
+
+    def replica_usable(self, synced_at, last_write):
+        if synced_at is None or time.time() - synced_at > self.max_lag:
+            return False
+        return last_write is None or synced_at > last_write
+
+    def pinned_user_id(self, request, user_id):
+        # Session users (the admin site) are pinned too
+        if user_id is None and 'sessionid' in request.COOKIES and request.user.is_authenticated:
+            return request.user.pk
+        return user_id
+
+    def wrote(self, request, response):
+        return request.method not in self.SAFE_METHODS and response.status_code < 400
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        user_id = self.pinned_user_id(request, token_user_id(request))
+        use_replica = False
+        if request.method in self.SAFE_METHODS:
+            last_write = caches[self.pin_cache].get(self.pin_key(user_id)) if user_id is not None else None
+            use_replica = self.replica_usable(replica_state.get(), last_write)
+        with replica_reads(use_replica):
+            response = self.get_response(request)
+
+        if self.wrote(request, response) and user_id is not None:
+            # Kept as long as the replica may be older than the write
+            caches[self.pin_cache].set(self.pin_key(user_id), time.time(), timeout=self.max_lag)
+        return response
+
+    async def __acall__(self, request):
+        user_id = token_user_id(request)
+        if user_id is None and 'sessionid' in request.COOKIES:
+            user = await request.auser()
+            user_id = user.pk if user.is_authenticated else None
+        use_replica = False
+        if request.method in self.SAFE_METHODS:
+            last_write = await caches[self.pin_cache].aget(self.pin_key(user_id)) if user_id is not None else None
+            synced_at = (
+                await sync_to_async(replica_state.refresh)() if replica_state.stale() else replica_state.synced_at
+            )
+            use_replica = self.replica_usable(synced_at, last_write)
+        with replica_reads(use_replica):
+            response = await self.get_response(request)
+
+        if self.wrote(request, response) and user_id is not None:
+            await caches[self.pin_cache].aset(self.pin_key(user_id), time.time(), timeout=self.max_lag)
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_active_question_count(apps, schema_editor):
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    Question = apps.get_model('quiz_app', 'Question')
+    counts = (
+        Question.objects.filter(quiz_id=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('quiz_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Quiz.objects.update(active_question_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0002_quiz_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='active_question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_active_question_count, migrations.RunPython.noop),
+    ]
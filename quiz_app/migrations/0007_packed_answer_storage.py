@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0006_questionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='answer_storage',
+            field=models.CharField(choices=[('rows', 'Answer rows'), ('packed', 'Packed')], default='rows', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='correct_bitmap',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='packed_answers',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='packed_question_ids',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
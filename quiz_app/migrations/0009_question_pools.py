@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-17 04:53
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0008_pendingsubmission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='pool_size',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='draw_seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
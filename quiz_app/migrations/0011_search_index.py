@@ -0,0 +1,38 @@
+# Generated by Django 5.0.4 on 2026-10-17 05:00
+
+from django.db import migrations
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases fall back to substring search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Quiz rows use rowid -quiz.id, question rows rowid question.id (see quiz_app/search.py)
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE quiz_app_search_fts USING fts5(title, description, question_text, {TOKENIZE})"
+    )
+    schema_editor.execute(
+        "INSERT INTO quiz_app_search_fts(rowid, title, description) SELECT -id, title, description FROM quiz_app_quiz"
+    )
+    schema_editor.execute(
+        "INSERT INTO quiz_app_search_fts(rowid, question_text) SELECT id, question_text FROM quiz_app_question"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS quiz_app_search_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0010_attemptsession'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0013_userprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attemptsession',
+            name='draft_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # quiz_app/models.py
-from django.db import models
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from .packing import unpack_answers
 
 User = get_user_model()
 
@@ -30,18 +32,52 @@ class Quiz(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='quizzes')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_quizzes')
     is_active = models.BooleanField(default=True)
+    # Question pool: each student gets pool_size questions drawn from the active ones (empty = all)
+    pool_size = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    # Timed quizzes are taken through attempt sessions, which enforce the deadline
+    time_limit_minutes = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    # Bumped on every question write, used to validate cached answer keys
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Denormalized number of active questions, kept in sync by question signals
+    active_question_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Quizzes"
+        indexes = [
+            # Keyset pagination of quiz listings
+            models.Index(fields=['created_at', 'id'], name='quiz_created_id_idx'),
+        ]
+
+    # Only ever changed with F() updates (see quiz_app/signals.py), never by save()
+    DENORMALIZED_FIELDS = ('version', 'active_question_count')
 
     def __str__(self):
         return f"{self.title} ({'Active' if self.is_active else 'Inactive'})"
 
+    def save(self, *args, **kwargs):
+        # A full save would write back the version and counter this instance was
+        # loaded with, undoing question writes made since - so leave them out
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name not in self.DENORMALIZED_FIELDS]
+        # The version bump in post_save commits together with the write
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def total_questions(self):
-        return self.questions.filter(is_active=True).count()
+        return self.count_questions(self.pool_size, self.active_question_count)
+
+    @staticmethod
+    def count_questions(pool_size, active_question_count):
+        # Questions a student answers - the draw size for pooled quizzes
+        if pool_size:
+            return min(pool_size, active_question_count)
+        return active_question_count
 
 class Question(models.Model):
     """
@@ -65,29 +101,271 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.quiz.title} - Q{self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored quiz so moving a question updates both quizzes
+        instance._loaded_quiz_id = instance.__dict__.get('quiz_id')
+        # and the stored text so only text edits recompute the similarity signature
+        instance._loaded_question_text = instance.__dict__.get('question_text')
+        return instance
+
+    # post_save/post_delete bump the quiz version and recount its active questions
+    # (quiz_app/signals.py). Django sends them after its own transaction block, so
+    # the write and the bump share this one - neither commits without the other
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+class QuestionSignature(models.Model):
+    """
+    MinHash signature of a question's text, used for near-duplicate detection
+    See quiz_app/similarity.py
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    # NUM_PERM little-endian uint32 minimum hash values
+    minhash = models.BinaryField()
+
+    def __str__(self):
+        return f"Signature for Q{self.question_id}"
+
+class QuestionBucket(models.Model):
+    """
+    LSH bucket membership of a question - one row per signature band
+    Questions sharing any bucket are near-duplicate candidates
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='lsh_buckets')
+    # Hash of (band number, band rows), so a single column identifies the bucket
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'question'], name='question_bucket_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"Q{self.question_id} in bucket {self.key}"
+
 class QuizSubmission(models.Model):
     """
     User quiz submissions with answers and score
+    Answers are stored either as SubmissionAnswer rows or packed into binary columns
     """
+    ROWS = 'rows'
+    PACKED = 'packed'
+    ANSWER_STORAGE_CHOICES = [(ROWS, 'Answer rows'), (PACKED, 'Packed')]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_submissions')
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='submissions')
     submitted_at = models.DateTimeField(auto_now_add=True)
     score = models.IntegerField(default=0)
     total_questions = models.IntegerField()
+    answer_storage = models.CharField(max_length=10, choices=ANSWER_STORAGE_CHOICES, default=ROWS)
+    # Packed mode only - see quiz_app/packing.py for the encoding
+    packed_question_ids = models.BinaryField(null=True, blank=True)
+    packed_answers = models.BinaryField(null=True, blank=True)
+    correct_bitmap = models.BinaryField(null=True, blank=True)
+    # Pooled quizzes only - seed of the question draw (see quiz_app/pools.py)
+    draw_seed = models.BigIntegerField(null=True, blank=True)
 
     class Meta:
         # Prevent multiple submissions of same quiz by same user
         unique_together = ['user', 'quiz']
+        indexes = [
+            # Keyset pagination of submission listings
+            models.Index(fields=['submitted_at', 'id'], name='submission_submitted_id_idx'),
+            models.Index(fields=['user', 'submitted_at', 'id'], name='submission_user_submitted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} ({self.score}/{self.total_questions})"
 
+    @property
+    def percentage_score(self):
+        return self.percentage(self.score, self.total_questions)
+
+    @staticmethod
+    def percentage(score, total_questions):
+        if total_questions == 0:
+            return 0
+        return (score / total_questions) * 100
+
+    @property
+    def is_packed(self):
+        return self.answer_storage == self.PACKED
+
+    def unpacked_answers(self):
+        """
+        Packed answers as unsaved SubmissionAnswer objects with their questions loaded
+        """
+        graded = unpack_answers(self.packed_question_ids, self.packed_answers, self.correct_bitmap)
+        questions = Question.objects.in_bulk([question_id for question_id, _, _ in graded])
+        return [
+            SubmissionAnswer(
+                submission=self,
+                question=questions[question_id],
+                selected_answer=selected,
+                is_correct=is_correct
+            )
+            for question_id, selected, is_correct in graded
+            if question_id in questions
+        ]
+
+class LeaderboardEntry(models.Model):
+    """
+    Precomputed leaderboard - the best submissions of each quiz
+    Maintained incrementally on submit and trimmed to QUIZ_LEADERBOARD_SIZE entries per quiz
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    submission = models.OneToOneField(QuizSubmission, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.IntegerField()
+    total_questions = models.IntegerField()
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Leaderboard entries"
+        indexes = [
+            # Leaderboard order: best score first, earliest submission wins ties
+            models.Index(fields=['quiz', '-score', 'submitted_at', 'id'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.user.username} ({self.score}/{self.total_questions})"
+
     @property
     def percentage_score(self):
         if self.total_questions == 0:
             return 0
         return (self.score / self.total_questions) * 100
 
+class QuestionStats(models.Model):
+    """
+    Per-question answer counters, updated by the grading transaction
+    Item statistics are derived from these counters instead of scanning answers
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    option_a_count = models.PositiveIntegerField(default=0)
+    option_b_count = models.PositiveIntegerField(default=0)
+    option_c_count = models.PositiveIntegerField(default=0)
+    option_d_count = models.PositiveIntegerField(default=0)
+    # Sums of the submission score fraction (score / total questions) of everyone
+    # who answered, its squares, and the sum for those who answered correctly
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    correct_score_sum = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Question stats"
+
+    def __str__(self):
+        return f"Stats for Q{self.question_id} ({self.correct_count}/{self.attempts})"
+
+class UserProgress(models.Model):
+    """
+    Per-user rollup of submissions for the student dashboard
+    Updated by the grading transaction (see quiz_app/progress.py)
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='progress')
+    quizzes_taken = models.PositiveIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    # {category_id: [quizzes taken, percentage sum]}
+    category_totals = models.JSONField(default=dict, blank=True)
+    best_category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    best_category_average = models.FloatField(null=True, blank=True)
+    # Consecutive days (local time) with at least one submission, ending on last_active_date
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    last_submission_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "User progress"
+
+    def __str__(self):
+        return f"Progress of user {self.user_id} ({self.quizzes_taken} quizzes)"
+
+    @property
+    def average_percentage(self):
+        if self.quizzes_taken == 0:
+            return 0
+        return self.percentage_sum / self.quizzes_taken
+
+class PendingSubmission(models.Model):
+    """
+    Quiz attempt queued for asynchronous grading
+    Written by submit_quiz when QUIZ_ASYNC_SUBMISSIONS is on, drained by process_submissions
+    """
+    QUEUED = 'queued'
+    PROCESSING = 'processing'
+    PROCESSED = 'processed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (PROCESSING, 'Processing'), (PROCESSED, 'Processed'), (FAILED, 'Failed')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_submissions')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='pending_submissions')
+    answers = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    error = models.TextField(blank=True)
+    submission = models.OneToOneField(QuizSubmission, on_delete=models.SET_NULL, null=True, blank=True, related_name='pending')
+    # Set when a worker claims the entry for grading (see quiz_app/ingestion.py)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Same rule as QuizSubmission.unique_together - a failed attempt can be retried
+            models.UniqueConstraint(
+                fields=['user', 'quiz'],
+                condition=~models.Q(status='failed'),
+                name='unique_pending_submission'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id'], name='pending_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.title} ({self.status})"
+
+class AttemptSession(models.Model):
+    """
+    A student's in-progress attempt at a quiz, with autosaved draft answers
+    Draft answers are buffered in memory and flushed in batches (see quiz_app/attempts.py)
+    """
+    IN_PROGRESS = 'in_progress'
+    SUBMITTED = 'submitted'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [(IN_PROGRESS, 'In progress'), (SUBMITTED, 'Submitted'), (EXPIRED, 'Expired')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attempt_sessions')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempt_sessions')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=IN_PROGRESS)
+    started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField(null=True, blank=True)
+    # {question_id: selected_answer} as of the last flush
+    draft_answers = models.JSONField(default=dict, blank=True)
+    # Bumped by every flush, so workers holding the draft in memory notice newer answers
+    draft_version = models.PositiveIntegerField(default=0)
+    draft_saved_at = models.DateTimeField(null=True, blank=True)
+    submission = models.OneToOneField(QuizSubmission, on_delete=models.SET_NULL, null=True, blank=True, related_name='attempt_session')
+
+    class Meta:
+        # One attempt per quiz, like submissions
+        unique_together = ['user', 'quiz']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.title} ({self.status})"
+
 class SubmissionAnswer(models.Model):
     """
     Individual answers for each question in a quiz submission
@@ -0,0 +1,88 @@
+# quiz_app/packing.py
+"""
+Compact answer encoding for submissions stored in packed mode
+
+A packed submission keeps its answers in three binary columns, ordered by question id:
+- question ids as LEB128 varints of the gaps between consecutive ids
+- selected options at two bits per answer (A=0, B=1, C=2, D=3)
+- a correctness bitmap at one bit per answer
+"""
+OPTIONS = 'ABCD'
+OPTION_CODES = {option: code for code, option in enumerate(OPTIONS)}
+
+
+def encode_ids(question_ids):
+    """
+    Encode ascending ids as varint deltas - usually one byte per question
+    """
+    data = bytearray()
+    previous = 0
+    for question_id in question_ids:
+        delta = question_id - previous
+        previous = question_id
+        while delta >= 0x80:
+            data.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+
+def decode_ids(data):
+    question_ids = []
+    previous = delta = shift = 0
+    for byte in bytes(data):
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += delta
+        question_ids.append(previous)
+        delta = shift = 0
+    return question_ids
+
+
+def pack_options(options):
+    data = bytearray((len(options) + 3) // 4)
+    for index, option in enumerate(options):
+        data[index >> 2] |= OPTION_CODES[option] << ((index & 3) * 2)
+    return bytes(data)
+
+
+def unpack_options(data, count):
+    data = bytes(data)
+    return [OPTIONS[(data[index >> 2] >> ((index & 3) * 2)) & 3] for index in range(count)]
+
+
+def pack_bits(flags):
+    data = bytearray((len(flags) + 7) // 8)
+    for index, flag in enumerate(flags):
+        if flag:
+            data[index >> 3] |= 1 << (index & 7)
+    return bytes(data)
+
+
+def unpack_bits(data, count):
+    data = bytes(data)
+    return [bool((data[index >> 3] >> (index & 7)) & 1) for index in range(count)]
+
+
+def pack_answers(graded):
+    """
+    Pack graded answers - (question_id, selected_answer, is_correct) - into the
+    QuizSubmission packed columns
+    """
+    graded = sorted(graded)
+    return {
+        'packed_question_ids': encode_ids([question_id for question_id, _, _ in graded]),
+        'packed_answers': pack_options([selected for _, selected, _ in graded]),
+        'correct_bitmap': pack_bits([is_correct for _, _, is_correct in graded]),
+    }
+
+
+def unpack_answers(packed_question_ids, packed_answers, correct_bitmap):
+    """
+    Return the packed answers as (question_id, selected_answer, is_correct), ordered by question
+    """
+    question_ids = decode_ids(packed_question_ids)
+    count = len(question_ids)
+    return list(zip(question_ids, unpack_options(packed_answers, count), unpack_bits(correct_bitmap, count)))
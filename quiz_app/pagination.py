@@ -0,0 +1,38 @@
+# quiz_app/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on an indexed key - no COUNT(*) and no OFFSET scans from the start
+    DRF's cursor holds only the first ordering field's value at the page boundary,
+    plus an offset past the rows that share it. Pages are fetched with a WHERE
+    on that field and skip only the tied rows, so this is not a true keyset on
+    the whole ordering. The remaining fields (id) make the order deterministic
+    among ties, and ties must stay rare (timestamps, unique names) for the
+    offset to stay small
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class SubmissionPagination(KeysetPagination):
+    """
+    Newest submissions first, ordered on (submitted_at, id) - the cursor seeks on submitted_at
+    """
+    ordering = ('-submitted_at', '-id')
+
+
+class QuizPagination(KeysetPagination):
+    """
+    Newest quizzes first, ordered on (created_at, id) - the cursor seeks on created_at
+    """
+    ordering = ('-created_at', '-id')
+
+
+class CategoryPagination(KeysetPagination):
+    """
+    Categories in alphabetical order - name is unique
+    """
+    ordering = 'name'
@@ -0,0 +1,108 @@
+# quiz_app/payloads.py
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from .models import Quiz, Question
+from .pools import draw_question_ids, draw_seed
+from .serializers import QuizSerializer, QuestionUserSerializer
+
+# Student quiz detail payloads rendered once per quiz version and served as bytes.
+# The quiz JSON is stored split around its questions array: the envelope before
+# and after it, plus one rendered fragment per active question. A plain quiz is
+# assembled once and stored whole; a pooled quiz keeps the fragments so each
+# student's draw is joined from them without touching the ORM or serializers.
+# Admins get the live serializer path (correct answers, inactive questions)
+
+QUESTIONS_KEY = b'"questions":'
+
+
+def payload_cache():
+    return caches[getattr(settings, 'QUIZ_PAYLOAD_CACHE', 'quiz_payloads')]
+
+
+def payload_key(quiz_id, version, created_at):
+    # created_at guards against a recreated database reusing quiz ids and versions
+    return f'quiz-payload:{quiz_id}:v{version}:{created_at.timestamp():.6f}'
+
+
+class StudentPayload:
+    """
+    Rendered student view of one quiz version
+    `content` is the whole payload for plain quizzes; pooled quizzes keep
+    the parts and assemble each student's draw
+    """
+    __slots__ = ('prefix', 'suffix', 'pool_size', 'question_ids', 'fragments', 'content')
+
+    def __init__(self, prefix, suffix, pool_size, fragments):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.pool_size = pool_size
+        # Sorted ids - the question order of payloads without a pool
+        self.question_ids = tuple(sorted(fragments))
+        if pool_size:
+            self.fragments = fragments
+            self.content = None
+        else:
+            self.fragments = None
+            self.content = self.assemble(self.question_ids, fragments)
+
+    def assemble(self, question_ids, fragments):
+        questions = b','.join(fragments[question_id] for question_id in question_ids)
+        return b''.join((self.prefix, b'[', questions, b']', self.suffix))
+
+    def for_user(self, quiz_id, user_id):
+        if self.content is not None:
+            return self.content
+        drawn = draw_question_ids(self.question_ids, self.pool_size, draw_seed(quiz_id, user_id))
+        return self.assemble(drawn, self.fragments)
+
+
+def render_student_payload(quiz_id):
+    """
+    Render the student view of a quiz the way QuizSerializer does
+    Returns None if the quiz no longer exists
+    """
+    quiz = (
+        Quiz.objects.select_related('category', 'created_by')
+        .prefetch_related(Prefetch('questions', queryset=Question.objects.filter(is_active=True).order_by('id')))
+        .filter(pk=quiz_id)
+        .first()
+    )
+    if quiz is None:
+        return None
+    renderer = JSONRenderer()
+    fragments = {
+        question.id: renderer.render(QuestionUserSerializer(question).data)
+        for question in quiz.questions.all()
+    }
+    # Render the envelope with an empty questions list and split around it. The
+    # key can only occur once unescaped, as strings inside are JSON-escaped
+    data = QuizSerializer(quiz).data
+    data['questions'] = []
+    envelope = renderer.render(data)
+    head, tail = envelope.split(QUESTIONS_KEY + b'[]', 1)
+    return StudentPayload(head + QUESTIONS_KEY, tail, quiz.pool_size, fragments)
+
+
+def student_payload(quiz_id, version, created_at, user_id):
+    """
+    The student quiz payload as bytes, rendered on the first request for a quiz version
+    Returns None if the quiz no longer exists
+    """
+    cache = payload_cache()
+    key = payload_key(quiz_id, version, created_at)
+    payload = cache.get(key)
+    if payload is None:
+        # Rendered after the version was read, so the cached payload can only be
+        # newer than its key - never older. This relies on versions only moving
+        # forward: they change through F() updates alone, never a Quiz.save()
+        # of a stale instance (Quiz.DENORMALIZED_FIELDS), so a later state never
+        # reuses an earlier key. Pooled payloads are drawn per student from the
+        # fragments by rank (pools.draw_question_ids), so a new version only
+        # changes the draws the added or removed questions rank into
+        payload = render_student_payload(quiz_id)
+        if payload is None:
+            return None
+        cache.set(key, payload)
+    return payload.for_user(quiz_id, user_id)
@@ -27,7 +27,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         # Check if user is the owner of the object
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return obj.user_id == request.user.id
         if hasattr(obj, 'created_by'):
-            return obj.created_by == request.user
+            return obj.created_by_id == request.user.id
         return False
\ No newline at end of file
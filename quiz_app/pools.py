@@ -0,0 +1,40 @@
+# quiz_app/pools.py
+import hashlib
+import heapq
+import hmac
+from django.conf import settings
+
+
+def draw_seed(quiz_id, user_id):
+    """
+    Stable per-user seed of a quiz draw, derived from a server secret
+    Students can't predict each other's draw without the secret
+    """
+    secret = getattr(settings, 'QUIZ_POOL_SECRET', settings.SECRET_KEY).encode()
+    digest = hmac.new(secret, f'{quiz_id}:{user_id}'.encode(), hashlib.sha256).digest()
+    # 63 bits so the seed fits a signed 64-bit column
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+
+def draw_ranker(seed):
+    """
+    Rank function of a student's draw order: a MAC of the question id keyed by
+    the draw seed, so a question's rank doesn't depend on which others exist
+    """
+    key = seed.to_bytes(8, 'big')
+
+    def rank(question_id):
+        return hashlib.blake2b(question_id.to_bytes(8, 'big'), key=key, digest_size=8).digest()
+    return rank
+
+
+def draw_question_ids(active_ids, pool_size, seed):
+    """
+    Draw pool_size question ids from the active ids: the ones ranked first for the seed
+    Each question's rank is fixed per student, so adding, deactivating or deleting
+    a question only changes the draws that question is (or would be) part of;
+    without a pool (or a pool as large as the quiz) every id is returned
+    """
+    if not pool_size or pool_size >= len(active_ids):
+        return list(active_ids)
+    return heapq.nsmallest(pool_size, active_ids, key=draw_ranker(seed))
@@ -0,0 +1,112 @@
+# quiz_app/progress.py
+from datetime import timedelta
+from itertools import groupby
+from django.db import transaction
+from django.utils import timezone
+from .db import rebuild_on_commit
+from .models import QuizSubmission, UserProgress
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def apply_submission(progress, category_id, percentage, submitted_at):
+    """
+    Fold one submission into a progress rollup (not saved)
+    Shared by the grading transaction and the rebuild, so both give the same totals
+    """
+    progress.quizzes_taken += 1
+    progress.percentage_sum += percentage
+
+    # JSON object keys are strings
+    key = str(category_id)
+    taken, total = progress.category_totals.get(key, (0, 0))
+    progress.category_totals[key] = [taken + 1, total + percentage]
+    # Highest average wins, then more quizzes taken, then the older category
+    best_key = max(
+        progress.category_totals,
+        key=lambda k: (progress.category_totals[k][1] / progress.category_totals[k][0],
+                       progress.category_totals[k][0], -int(k))
+    )
+    taken, total = progress.category_totals[best_key]
+    progress.best_category_id = int(best_key)
+    progress.best_category_average = total / taken
+
+    day = timezone.localdate(submitted_at)
+    if progress.last_active_date is None or day > progress.last_active_date:
+        if progress.last_active_date == day - timedelta(days=1):
+            progress.current_streak += 1
+        else:
+            progress.current_streak = 1
+        progress.last_active_date = day
+        progress.longest_streak = max(progress.longest_streak, progress.current_streak)
+    if progress.last_submission_at is None or submitted_at > progress.last_submission_at:
+        progress.last_submission_at = submitted_at
+
+
+def record_progress(submission, category_id):
+    """
+    Add a graded submission to its user's progress rollup
+    Called inside the grading transaction; the row is locked so concurrent
+    submissions by the same user don't lose updates
+    """
+    progress, _ = UserProgress.objects.select_for_update().get_or_create(user_id=submission.user_id)
+    apply_submission(
+        progress,
+        category_id,
+        submission.percentage_score,
+        submission.submitted_at
+    )
+    progress.save()
+
+
+def current_streak(progress, today=None):
+    """
+    The streak as of today - it is broken once a whole day passes without a submission
+    """
+    today = today or timezone.localdate()
+    if progress.last_active_date is None or progress.last_active_date < today - timedelta(days=1):
+        return 0
+    return progress.current_streak
+
+
+def rebuild_user_progress(user_ids=None):
+    """
+    Recompute progress rollups from submissions - of the given users
+    (a list or a values_list queryset), or of everyone when None
+    Returns the number of rollups written
+    """
+    submissions = QuizSubmission.objects.all()
+    progress_rows = UserProgress.objects.all()
+    if user_ids is not None:
+        submissions = submissions.filter(user_id__in=user_ids)
+        progress_rows = progress_rows.filter(user_id__in=user_ids)
+    rows = (
+        submissions.order_by('user_id', 'submitted_at', 'id')
+        .values_list('user_id', 'quiz__category_id', 'score', 'total_questions', 'submitted_at')
+    )
+
+    written = 0
+    with transaction.atomic():
+        progress_rows.delete()
+        batch = []
+        for user_id, user_rows in groupby(rows.iterator(), key=lambda row: row[0]):
+            progress = UserProgress(user_id=user_id)
+            for _, category_id, score, total_questions, submitted_at in user_rows:
+                apply_submission(progress, category_id, QuizSubmission.percentage(score, total_questions), submitted_at)
+            batch.append(progress)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                UserProgress.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        UserProgress.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def rebuild_user_progress_on_commit(user_ids):
+    """
+    Rebuild the users' rollups once the current transaction commits
+    Users added during one transaction share a single rebuild - deleting a quiz
+    rebuilds each affected user once instead of once per deleted submission
+    """
+    rebuild_on_commit(rebuild_user_progress, user_ids)
@@ -0,0 +1,177 @@
+# quiz_app/projections.py
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from users.models import User
+from .metrics import timed_serialization
+from .models import Question, Quiz, QuizSubmission, SubmissionAnswer
+from .packing import unpack_answers
+
+# Read path for list endpoints: rows are fetched with values() and mapped straight
+# to dicts, skipping model instances and the per-object DRF field machinery.
+# Each projection renders exactly what its serializer renders - the serializers
+# are still used for writes and single-object responses
+
+
+def datetime_formatter():
+    """
+    DateTimeField.to_representation with the current timezone looked up once -
+    same output as serializer fields, without a timezone lookup per value
+    """
+    current = timezone.get_current_timezone() if settings.USE_TZ else None
+    return serializers.DateTimeField(default_timezone=current).to_representation
+
+
+class Projection:
+    """
+    Column selection plus a row -> dict mapping for one list representation
+    Rows are dicts, so cursor pagination can read its ordering keys from them
+    """
+    fields = ()
+
+    def project(self, queryset):
+        return queryset.values(*self.fields)
+
+    def represent(self, rows):
+        format_datetime = datetime_formatter()
+        return [self.represent_row(row, format_datetime) for row in rows]
+
+    def represent_row(self, row, format_datetime):
+        raise NotImplementedError
+
+
+class CategoryProjection(Projection):
+    """
+    Renders like CategorySerializer
+    """
+    fields = ('id', 'created_by__username', 'created_by__is_admin', 'name', 'description', 'created_at', 'updated_at')
+
+    def represent_row(self, row, format_datetime):
+        return {
+            'id': row['id'],
+            'created_by': User.display_name(row['created_by__username'], row['created_by__is_admin']),
+            'name': row['name'],
+            'description': row['description'],
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+        }
+
+
+class QuizListProjection(Projection):
+    """
+    Renders like QuizListSerializer
+    """
+    fields = (
+        'id', 'title', 'description', 'category_id', 'category__name', 'created_by__username',
+        'created_by__is_admin', 'is_active', 'pool_size', 'active_question_count', 'created_at'
+    )
+
+    def represent_row(self, row, format_datetime):
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'category': row['category_id'],
+            'category_name': row['category__name'],
+            'created_by': User.display_name(row['created_by__username'], row['created_by__is_admin']),
+            'is_active': row['is_active'],
+            'pool_size': row['pool_size'],
+            'total_questions': Quiz.count_questions(row['pool_size'], row['active_question_count']),
+            'created_at': format_datetime(row['created_at']),
+        }
+
+
+class SubmissionProjection(Projection):
+    """
+    Renders like QuizSubmissionSerializer, answers included
+    Answers of a whole page are loaded with one query per storage mode
+    """
+    fields = (
+        'id', 'user__username', 'user__is_admin', 'quiz_id', 'quiz__title', 'score', 'total_questions',
+        'submitted_at', 'answer_storage', 'packed_question_ids', 'packed_answers', 'correct_bitmap'
+    )
+
+    def load_answers(self, rows):
+        """
+        {submission_id: [answer dict, ...]} in the order the serializer lists them
+        """
+        answers = {}
+        row_ids = [row['id'] for row in rows if row['answer_storage'] == QuizSubmission.ROWS]
+        if row_ids:
+            stored = (
+                SubmissionAnswer.objects.filter(submission_id__in=row_ids)
+                .order_by('submission_id', 'id')
+                .values_list('submission_id', 'question_id', 'question__question_text',
+                             'selected_answer', 'question__correct_answer', 'is_correct')
+            )
+            for submission_id, question_id, text, selected, correct_answer, is_correct in stored:
+                answers.setdefault(submission_id, []).append({
+                    'question': question_id,
+                    'question_text': text,
+                    'selected_answer': selected,
+                    'correct_answer': correct_answer,
+                    'is_correct': is_correct,
+                })
+
+        packed = {
+            row['id']: unpack_answers(row['packed_question_ids'], row['packed_answers'], row['correct_bitmap'])
+            for row in rows if row['answer_storage'] == QuizSubmission.PACKED
+        }
+        if packed:
+            question_ids = {question_id for graded in packed.values() for question_id, _, _ in graded}
+            questions = {
+                question_id: (text, correct_answer)
+                for question_id, text, correct_answer in
+                Question.objects.filter(id__in=question_ids).values_list('id', 'question_text', 'correct_answer')
+            }
+            for submission_id, graded in packed.items():
+                # Like unpacked_answers(), answers to deleted questions are left out
+                answers[submission_id] = [
+                    {
+                        'question': question_id,
+                        'question_text': questions[question_id][0],
+                        'selected_answer': selected,
+                        'correct_answer': questions[question_id][1],
+                        'is_correct': is_correct,
+                    }
+                    for question_id, selected, is_correct in graded
+                    if question_id in questions
+                ]
+        return answers
+
+    def represent(self, rows):
+        answers = self.load_answers(rows)
+        format_datetime = datetime_formatter()
+        return [
+            {
+                'id': row['id'],
+                'answers': answers.get(row['id'], []),
+                'user': User.display_name(row['user__username'], row['user__is_admin']),
+                'quiz_title': row['quiz__title'],
+                'percentage_score': QuizSubmission.percentage(row['score'], row['total_questions']),
+                'submitted_at': format_datetime(row['submitted_at']),
+                'score': row['score'],
+                'total_questions': row['total_questions'],
+                'quiz': row['quiz_id'],
+            }
+            for row in rows
+        ]
+
+
+class ProjectedListMixin:
+    """
+    list() for generic views that renders pages through `projection_class`
+    instead of the serializer - other actions keep using serializer_class
+    """
+    projection_class = None
+
+    def list(self, request, *args, **kwargs):
+        projection = self.projection_class()
+        queryset = projection.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        with timed_serialization():
+            data = projection.represent(page if page is not None else queryset)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,86 @@
+# quiz_app/regrade.py
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from .models import Question, QuizSubmission, SubmissionAnswer
+from .packing import pack_bits, unpack_answers
+from .analytics import rebuild_question_stats
+from .leaderboard import rebuild_leaderboard
+from .progress import rebuild_user_progress
+
+REGRADE_CHUNK_SIZE = 1000
+
+
+def _regrade_row_chunk(submission_ids, old_scores):
+    """
+    Regrade answer rows of a chunk of submissions with one set-based UPDATE
+    Returns the submissions whose score changed
+    """
+    is_correct = Exists(Question.objects.filter(pk=OuterRef('question_id'), correct_answer=OuterRef('selected_answer')))
+    SubmissionAnswer.objects.filter(submission_id__in=submission_ids).update(is_correct=is_correct)
+
+    new_scores = dict(
+        SubmissionAnswer.objects.filter(submission_id__in=submission_ids, is_correct=True)
+        .order_by()
+        .values('submission_id')
+        .annotate(score=Count('id'))
+        .values_list('submission_id', 'score')
+    )
+    return [
+        QuizSubmission(id=submission_id, score=new_scores.get(submission_id, 0))
+        for submission_id in submission_ids
+        if new_scores.get(submission_id, 0) != old_scores[submission_id]
+    ]
+
+
+def _regrade_packed_chunk(submission_ids, answer_key):
+    """
+    Regrade packed submissions in memory
+    Returns the submissions whose correctness bitmap changed - their score may not have
+    """
+    changed = []
+    packed = QuizSubmission.objects.filter(id__in=submission_ids).values_list(
+        'id', 'packed_question_ids', 'packed_answers', 'correct_bitmap'
+    )
+    for submission_id, *packed_columns in packed:
+        answers = unpack_answers(*packed_columns)
+        flags = [answer_key.get(question_id) == selected for question_id, selected, _ in answers]
+        if flags != [is_correct for _, _, is_correct in answers]:
+            changed.append(QuizSubmission(id=submission_id, score=sum(flags), correct_bitmap=pack_bits(flags)))
+    return changed
+
+
+def regrade_quiz(quiz_id, chunk_size=REGRADE_CHUNK_SIZE):
+    """
+    Recompute answer correctness and scores of every submission to a quiz
+    after its answer key changed. Works through submissions in keyset chunks,
+    one transaction each, and returns how many scores changed
+    """
+    answer_key = dict(Question.objects.filter(quiz_id=quiz_id).values_list('id', 'correct_answer'))
+    submissions = QuizSubmission.objects.filter(quiz_id=quiz_id).order_by('id')
+    scores_changed = 0
+    last_id = 0
+
+    while True:
+        chunk = list(submissions.filter(id__gt=last_id).values_list('id', 'score', 'answer_storage')[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        old_scores = {submission_id: score for submission_id, score, _ in chunk}
+        row_ids = [submission_id for submission_id, _, storage in chunk if storage == QuizSubmission.ROWS]
+        packed_ids = [submission_id for submission_id, _, storage in chunk if storage == QuizSubmission.PACKED]
+
+        with transaction.atomic():
+            if row_ids:
+                changed = _regrade_row_chunk(row_ids, old_scores)
+                QuizSubmission.objects.bulk_update(changed, ['score'])
+                scores_changed += len(changed)
+            if packed_ids:
+                changed = _regrade_packed_chunk(packed_ids, answer_key)
+                QuizSubmission.objects.bulk_update(changed, ['score', 'correct_bitmap'])
+                scores_changed += sum(1 for submission in changed if submission.score != old_scores[submission.id])
+
+    # Derived data depends on correctness and scores
+    rebuild_question_stats(quiz_id)
+    rebuild_leaderboard(quiz_id)
+    rebuild_user_progress(QuizSubmission.objects.filter(quiz_id=quiz_id).values('user_id'))
+    return scores_changed
@@ -0,0 +1,96 @@
+# quiz_app/routers.py
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+REPLICA_ALIAS = 'replica'
+# Single-row table in the replica recording when its copy of the primary was taken
+REPLICA_STATE_TABLE = 'quiz_replica_state'
+
+# Set per request by ReplicaRoutingMiddleware - reads go to the primary unless a request opts in
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_synced_at():
+    """
+    Unix time the replica's data was copied from the primary, as recorded by
+    sync_replica - None when the replica doesn't record it
+    """
+    try:
+        with connections[REPLICA_ALIAS].cursor() as cursor:
+            cursor.execute(f'SELECT synced_at FROM {REPLICA_STATE_TABLE}')
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row else None
+
+
+class ReplicaState:
+    """
+    Sync time of the replica, re-read at most every check_interval seconds per process
+    """
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.synced_at = None
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def stale(self):
+        return self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval
+
+    def refresh(self):
+        synced_at = replica_synced_at()
+        with self._lock:
+            self.synced_at = synced_at
+            self.checked_at = time.monotonic()
+        return synced_at
+
+    def get(self):
+        if self.stale():
+            return self.refresh()
+        return self.synced_at
+
+
+replica_state = ReplicaState()
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Route ORM reads in this block to the read replica (when one is configured)
+    """
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Send reads of read-only requests to the replica and everything else to the primary
+    Writes, and reads inside write requests, always use the primary so grading
+    and duplicate checks never see replication lag
+    """
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and replica_configured():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        return db != REPLICA_ALIAS
@@ -0,0 +1,157 @@
+# quiz_app/search.py
+import re
+from django.db import connections, router
+from django.db.models import Q
+from .models import Quiz, Question
+
+# FTS5 table created by migration 0011 (SQLite only). Quizzes and questions share
+# one index so their bm25 scores are comparable: quiz rows (title, description)
+# use rowid -quiz.id and question rows (question_text) use rowid question.id.
+# Visibility (is_active) and the question's quiz are joined from the regular
+# tables at query time, so only text edits touch the index
+SEARCH_INDEX = 'quiz_app_search_fts'
+
+# bm25 weights of the title, description and question_text columns
+COLUMN_WEIGHTS = (10.0, 4.0, 2.0)
+
+MAX_TERMS = 8
+TERM_RE = re.compile(r'\w+')
+
+
+def fts_enabled(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query matching every term as a prefix
+    Terms are quoted, so user input can't inject FTS5 syntax
+    """
+    terms = TERM_RE.findall(text)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _clean_ids(ids):
+    return [value for value in set(ids) if value is not None]
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def index_quizzes(quiz_ids):
+    """
+    Refresh the index rows of quiz titles and descriptions - deleted quizzes are dropped
+    """
+    quiz_ids = _clean_ids(quiz_ids)
+    using = router.db_for_write(Quiz)
+    if not quiz_ids or not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_INDEX} WHERE rowid IN ({_placeholders(quiz_ids)})',
+            [-quiz_id for quiz_id in quiz_ids]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_INDEX}(rowid, title, description) '
+            f'SELECT -id, title, description FROM quiz_app_quiz WHERE id IN ({_placeholders(quiz_ids)})',
+            quiz_ids
+        )
+
+
+def index_questions(question_ids):
+    """
+    Refresh the index rows of question texts - deleted questions are dropped
+    """
+    question_ids = _clean_ids(question_ids)
+    using = router.db_for_write(Question)
+    if not question_ids or not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_INDEX} WHERE rowid IN ({_placeholders(question_ids)})', question_ids)
+        cursor.execute(
+            f'INSERT INTO {SEARCH_INDEX}(rowid, question_text) '
+            f'SELECT id, question_text FROM quiz_app_question WHERE id IN ({_placeholders(question_ids)})',
+            question_ids
+        )
+
+
+def rebuild_index():
+    """
+    Rebuild the index from scratch and merge its b-trees
+    Returns (quizzes, questions) indexed, or None when full-text search isn't available
+    """
+    using = router.db_for_write(Quiz)
+    if not fts_enabled(using):
+        return None
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_INDEX}')
+        cursor.execute(f'INSERT INTO {SEARCH_INDEX}(rowid, title, description) SELECT -id, title, description FROM quiz_app_quiz')
+        quizzes = cursor.rowcount
+        cursor.execute(f'INSERT INTO {SEARCH_INDEX}(rowid, question_text) SELECT id, question_text FROM quiz_app_question')
+        questions = cursor.rowcount
+        cursor.execute(f"INSERT INTO {SEARCH_INDEX}({SEARCH_INDEX}) VALUES ('optimize')")
+    return quizzes, questions
+
+
+def search_quiz_ids(text, include_inactive=False, limit=20):
+    """
+    Ids of quizzes matching text in their title, description or question texts, best first
+    Students (include_inactive=False) only match active quizzes and active questions
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    using = router.db_for_read(Quiz)
+    if not fts_enabled(using):
+        return _search_quiz_ids_fallback(text, include_inactive, limit)
+
+    visible = '' if include_inactive else 'WHERE quiz.is_active AND question.is_active IS NOT 0'
+    # Matches are materialized first - bm25() only works in the query scanning the index
+    sql = f'''
+        WITH matches AS MATERIALIZED (
+            SELECT rowid AS doc, bm25({SEARCH_INDEX}, %s, %s, %s) AS rank
+            FROM {SEARCH_INDEX} WHERE {SEARCH_INDEX} MATCH %s
+        )
+        SELECT quiz.id FROM matches
+        LEFT JOIN quiz_app_question question ON matches.doc > 0 AND question.id = matches.doc
+        JOIN quiz_app_quiz quiz ON quiz.id = CASE WHEN matches.doc < 0 THEN -matches.doc ELSE question.quiz_id END
+        {visible}
+        GROUP BY quiz.id
+        ORDER BY MIN(matches.rank), quiz.id
+        LIMIT %s
+    '''
+    params = [*COLUMN_WEIGHTS, query, -1 if limit is None else limit]
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_question_ids(text):
+    """
+    Ids of questions whose text matches (admin search)
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    using = router.db_for_read(Question)
+    if not fts_enabled(using):
+        return list(Question.objects.filter(question_text__icontains=text).values_list('id', flat=True))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_INDEX} WHERE {SEARCH_INDEX} MATCH %s AND rowid > 0',
+            [f'question_text : ({query})']
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_quiz_ids_fallback(text, include_inactive, limit):
+    # Unranked substring search for databases without FTS5
+    questions = Q(questions__question_text__icontains=text)
+    if not include_inactive:
+        questions &= Q(questions__is_active=True)
+    quizzes = Quiz.objects.filter(Q(title__icontains=text) | Q(description__icontains=text) | questions)
+    if not include_inactive:
+        quizzes = quizzes.filter(is_active=True)
+    ids = quizzes.order_by('id').values_list('id', flat=True).distinct()
+    return list(ids if limit is None else ids[:limit])
@@ -1,6 +1,11 @@
 # quiz_app/serializers.py
 from rest_framework import serializers
-from .models import Category, Quiz, Question, QuizSubmission, SubmissionAnswer
+from .pools import draw_question_ids, draw_seed
+from .progress import current_streak
+from .models import (
+    Category, Quiz, Question, QuizSubmission, SubmissionAnswer, LeaderboardEntry, PendingSubmission,
+    UserProgress
+)
 
 class CategorySerializer(serializers.ModelSerializer):
     """
@@ -44,7 +49,7 @@ class QuizSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Quiz
-        fields = '__all__'
+        exclude = ('version', 'active_question_count')
         read_only_fields = ('created_by', 'created_at', 'updated_at')
 
     def get_questions(self, obj):
@@ -55,7 +60,17 @@ class QuizSerializer(serializers.ModelSerializer):
             return QuestionSerializer(questions, many=True).data
         else:
             # For normal users, only return active questions without correct answers
-            questions = obj.questions.filter(is_active=True)
+            if 'questions' in getattr(obj, '_prefetched_objects_cache', {}):
+                # Filter the prefetched questions rather than querying again
+                questions = [question for question in obj.questions.all() if question.is_active]
+            else:
+                questions = obj.questions.filter(is_active=True)
+            if obj.pool_size:
+                # Only the questions drawn for this student, in draw order
+                by_id = {question.id: question for question in questions}
+                user_id = request.user.id if request else None
+                drawn = draw_question_ids(sorted(by_id), obj.pool_size, draw_seed(obj.id, user_id))
+                questions = [by_id[question_id] for question_id in drawn]
             return QuestionUserSerializer(questions, many=True).data
 
 class QuizListSerializer(serializers.ModelSerializer):
@@ -68,7 +83,7 @@ class QuizListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Quiz
-        fields = ('id', 'title', 'description', 'category', 'category_name', 'created_by', 'is_active', 'total_questions', 'created_at')
+        fields = ('id', 'title', 'description', 'category', 'category_name', 'created_by', 'is_active', 'pool_size', 'total_questions', 'created_at')
 
 class SubmissionAnswerSerializer(serializers.ModelSerializer):
     """
@@ -82,20 +97,90 @@ class SubmissionAnswerSerializer(serializers.ModelSerializer):
         fields = ('question', 'question_text', 'selected_answer', 'correct_answer', 'is_correct')
         read_only_fields = ('is_correct',)
 
+class SubmissionAnswersField(serializers.Field):
+    """
+    Read-only answers of a submission, whichever storage mode holds them
+    Packed answers are rendered exactly like answer rows
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, submission):
+        answers = submission.unpacked_answers() if submission.is_packed else submission.answers.all()
+        return SubmissionAnswerSerializer(answers, many=True).data
+
 class QuizSubmissionSerializer(serializers.ModelSerializer):
     """
     Serializer for quiz submissions
     """
-    answers = SubmissionAnswerSerializer(many=True, read_only=True)
+    answers = SubmissionAnswersField()
     user = serializers.StringRelatedField(read_only=True)
     quiz_title = serializers.CharField(source='quiz.title', read_only=True)
     percentage_score = serializers.ReadOnlyField()
     
     class Meta:
         model = QuizSubmission
-        fields = '__all__'
+        exclude = ('answer_storage', 'packed_question_ids', 'packed_answers', 'correct_bitmap', 'draw_seed')
         read_only_fields = ('user', 'score', 'submitted_at')
 
+class PendingSubmissionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the status of a queued submission
+    """
+    class Meta:
+        model = PendingSubmission
+        fields = ('id', 'quiz', 'status', 'error', 'submission', 'created_at', 'processed_at')
+        read_only_fields = fields
+
+class AttemptSessionSerializer(serializers.Serializer):
+    """
+    Serializer for attempt sessions, rendered from the in-memory draft
+    """
+    id = serializers.IntegerField(read_only=True)
+    quiz = serializers.IntegerField(source='quiz_id', read_only=True)
+    status = serializers.CharField(read_only=True)
+    started_at = serializers.DateTimeField(read_only=True)
+    deadline = serializers.DateTimeField(read_only=True)
+    answers = serializers.SerializerMethodField()
+
+    def get_answers(self, draft):
+        return [
+            {'question_id': question_id, 'selected_answer': selected}
+            for question_id, selected in draft.answers.items()
+        ]
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for ranked leaderboard entries
+    """
+    rank = serializers.IntegerField(read_only=True)
+    user = serializers.CharField(source='user.username', read_only=True)
+    percentage_score = serializers.ReadOnlyField()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rank', 'user', 'score', 'total_questions', 'percentage_score', 'submitted_at')
+
+class UserProgressSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the precomputed dashboard totals of a user
+    """
+    average_percentage = serializers.ReadOnlyField()
+    best_category_name = serializers.CharField(source='best_category.name', read_only=True, default=None)
+    current_streak = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserProgress
+        fields = (
+            'quizzes_taken', 'average_percentage', 'best_category', 'best_category_name',
+            'best_category_average', 'current_streak', 'longest_streak', 'last_submission_at'
+        )
+
+    def get_current_streak(self, obj):
+        return current_streak(obj)
+
 class QuizAttemptSerializer(serializers.Serializer):
     """
     Serializer for quiz attempt submission
@@ -121,6 +206,10 @@ class QuizAttemptSerializer(serializers.Serializer):
                 raise serializers.ValidationError(
                     "Selected answer must be one of: A, B, C, D"
                 )
+            try:
+                answer['question_id'] = int(answer['question_id'])
+            except ValueError:
+                raise serializers.ValidationError("Each 'question_id' must be an integer")
         return value
     
 
@@ -0,0 +1,95 @@
+# quiz_app/signals.py
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Quiz, Question, QuizSubmission
+from .cache import invalidate_answer_key
+from .search import index_quizzes, index_questions
+from .similarity import index_question_signatures
+from .analytics import rebuild_question_stats_on_commit
+from .leaderboard import rebuild_leaderboards_on_commit
+from .progress import rebuild_user_progress_on_commit
+
+
+def active_question_count_subquery():
+    """
+    Correlated subquery counting the active questions of the outer quiz
+    """
+    counts = (
+        Question.objects.filter(quiz_id=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('quiz_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def bump_quiz_versions(**filters):
+    """
+    Bump the version of matching quizzes so ETags and cached payloads are invalidated
+    """
+    Quiz.objects.filter(**filters).update(version=F('version') + 1)
+
+
+def questions_changed(*quiz_ids):
+    """
+    Bump the quiz version, recount active questions and drop cached data
+    derived from the questions. Called for every question write, including
+    bulk writes that skip model signals
+    """
+    quiz_ids = {quiz_id for quiz_id in quiz_ids if quiz_id is not None}
+    # Single UPDATE so the counter is recomputed atomically with the version bump
+    Quiz.objects.filter(pk__in=quiz_ids).update(
+        version=F('version') + 1,
+        active_question_count=active_question_count_subquery()
+    )
+    for quiz_id in quiz_ids:
+        invalidate_answer_key(quiz_id)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    questions_changed(instance.quiz_id, getattr(instance, '_loaded_quiz_id', None))
+    instance._loaded_quiz_id = instance.quiz_id
+    index_questions([instance.pk])
+    if created or getattr(instance, '_loaded_question_text', None) != instance.question_text:
+        index_question_signatures([instance])
+        instance._loaded_question_text = instance.question_text
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    questions_changed(instance.quiz_id)
+    index_questions([instance.pk])
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, **kwargs):
+    bump_quiz_versions(pk=instance.pk)
+    # The bump happened in the database - pick up the stored values
+    instance.refresh_from_db(fields=Quiz.DENORMALIZED_FIELDS)
+    index_quizzes([instance.pk])
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    index_quizzes([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    # Quiz payloads embed the category name
+    if not created:
+        bump_quiz_versions(category_id=instance.pk)
+
+
+@receiver(post_delete, sender=QuizSubmission)
+def submission_deleted(sender, instance, **kwargs):
+    # Rollups can't subtract a submission (best category, streak), so recompute the
+    # user's - once per user and transaction, after the whole delete committed
+    rebuild_user_progress_on_commit([instance.user_id])
+    # The entry went with the submission; a full board is refilled from the rest
+    rebuild_leaderboards_on_commit([instance.quiz_id])
+    rebuild_question_stats_on_commit([instance.quiz_id])
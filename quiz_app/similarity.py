@@ -0,0 +1,211 @@
+# quiz_app/similarity.py
+import hashlib
+import re
+import struct
+from itertools import groupby
+from django.conf import settings
+from django.db import transaction
+from .models import Question, QuestionSignature, QuestionBucket
+
+# Near-duplicate detection for question texts with MinHash and locality-sensitive
+# hashing. Each question gets a signature of NUM_PERM minimum hash values over its
+# character shingles; the fraction of equal values estimates the Jaccard similarity
+# of two texts. The signature is cut into BANDS bands of ROWS values and every band
+# is hashed into a bucket, so similar questions share a bucket with high
+# probability and candidates are found by index lookups instead of comparing pairs
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+# Each shingle is fed to SHAKE-128 and its output read as NUM_PERM independent
+# 32-bit hash values - one hash per signature position from a single call, and
+# unlike hash() the values are stable across processes and deploys
+SIGNATURE_FORMAT = struct.Struct(f'<{NUM_PERM}I')
+
+SIMILAR_QUESTIONS_LIMIT = 5
+REBUILD_BATCH_SIZE = 1000
+WORD_RE = re.compile(r'\w+')
+
+
+def similarity_threshold():
+    return getattr(settings, 'QUIZ_SIMILARITY_THRESHOLD', 0.8)
+
+
+def shingles(text):
+    """
+    Character shingles of the normalized text (lowercase words separated by one space)
+    """
+    normalized = ' '.join(WORD_RE.findall(text.lower()))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature of a text as a tuple of NUM_PERM integers
+    """
+    hashes = [
+        SIGNATURE_FORMAT.unpack(hashlib.shake_128(shingle.encode()).digest(SIGNATURE_FORMAT.size))
+        for shingle in shingles(text)
+    ]
+    # Position-wise minimum over all shingles
+    return tuple(map(min, zip(*hashes)))
+
+
+def pack_signature(signature):
+    return SIGNATURE_FORMAT.pack(*signature)
+
+
+def unpack_signature(data):
+    return SIGNATURE_FORMAT.unpack(bytes(data))
+
+
+def band_keys(signature):
+    """
+    One bucket key per band, as signed 64-bit integers
+    """
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<H{ROWS}I', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def estimate_similarity(signature, other):
+    """
+    Estimated Jaccard similarity of two signatures
+    """
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_PERM
+
+
+def index_question_signatures(questions):
+    """
+    Store the signatures and bucket memberships of the given questions
+    Existing rows are replaced; called for every question create and text edit,
+    including bulk writes that skip model signals
+    """
+    questions = [question for question in questions if question.pk is not None]
+    if not questions:
+        return
+    signatures = {question.pk: minhash(question.question_text) for question in questions}
+    with transaction.atomic():
+        QuestionSignature.objects.bulk_create(
+            [QuestionSignature(question_id=pk, minhash=pack_signature(signature))
+             for pk, signature in signatures.items()],
+            update_conflicts=True,
+            unique_fields=['question'],
+            update_fields=['minhash']
+        )
+        QuestionBucket.objects.filter(question_id__in=signatures).delete()
+        QuestionBucket.objects.bulk_create([
+            QuestionBucket(question_id=pk, key=key)
+            for pk, signature in signatures.items()
+            for key in band_keys(signature)
+        ])
+
+
+def rebuild_similarity_index():
+    """
+    Recompute the signatures of every question - returns the number indexed
+    """
+    count = 0
+    queryset = Question.objects.only('id', 'question_text').order_by('id')
+    batch = []
+    for question in queryset.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(question)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            index_question_signatures(batch)
+            count += len(batch)
+            batch = []
+    index_question_signatures(batch)
+    return count + len(batch)
+
+
+def similar_questions(text, exclude_id=None, threshold=None, limit=SIMILAR_QUESTIONS_LIMIT):
+    """
+    Questions whose text is estimated to be at least `threshold` similar to `text`,
+    most similar first, as dicts for API responses
+    """
+    if threshold is None:
+        threshold = similarity_threshold()
+    signature = minhash(text)
+    candidates = (
+        QuestionBucket.objects.filter(key__in=band_keys(signature))
+        .exclude(question_id=exclude_id)
+        .values('question_id')
+    )
+    matches = []
+    for question_id, data in QuestionSignature.objects.filter(question_id__in=candidates).values_list('question_id', 'minhash'):
+        similarity = estimate_similarity(signature, unpack_signature(data))
+        if similarity >= threshold:
+            matches.append((similarity, question_id))
+    matches.sort(key=lambda match: (-match[0], match[1]))
+    matches = matches[:limit]
+    questions = Question.objects.only('id', 'quiz_id', 'question_text').in_bulk([question_id for _, question_id in matches])
+    return [
+        {
+            'id': question_id,
+            'quiz': questions[question_id].quiz_id,
+            'question_text': questions[question_id].question_text,
+            'similarity': round(similarity, 3),
+        }
+        for similarity, question_id in matches
+        if question_id in questions
+    ]
+
+
+def duplicate_clusters(threshold=None):
+    """
+    Group the whole question bank into clusters of near-duplicates
+    Returns lists of question ids (clusters of two or more), largest first
+
+    Only questions sharing a bucket are compared, and within a bucket each
+    question is compared with one representative per cluster already found
+    there, so the work grows with the number of bucket rows, not with pairs
+    """
+    if threshold is None:
+        threshold = similarity_threshold()
+    signatures = dict(QuestionSignature.objects.values_list('question_id', 'minhash').iterator())
+    unpacked = {}
+
+    def signature_of(question_id):
+        if question_id not in unpacked:
+            unpacked[question_id] = unpack_signature(signatures[question_id])
+        return unpacked[question_id]
+
+    parent = {}
+
+    def find(question_id):
+        root = question_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while question_id != root:
+            parent[question_id], question_id = root, parent.get(question_id, question_id)
+        return root
+
+    rows = QuestionBucket.objects.order_by('key', 'question_id').values_list('key', 'question_id')
+    for _, group in groupby(rows.iterator(), key=lambda row: row[0]):
+        representatives = []
+        for _, question_id in group:
+            if question_id not in signatures:
+                continue
+            root = find(question_id)
+            for representative in representatives:
+                if find(representative) == root:
+                    break
+                if estimate_similarity(signature_of(question_id), signature_of(representative)) >= threshold:
+                    parent[root] = find(representative)
+                    break
+            else:
+                representatives.append(question_id)
+
+    clusters = {}
+    for question_id in set(parent) | set(parent.values()):
+        clusters.setdefault(find(question_id), []).append(question_id)
+    return sorted(
+        (sorted(members) for members in clusters.values() if len(members) > 1),
+        key=lambda members: (-len(members), members[0])
+    )
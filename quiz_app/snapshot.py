@@ -0,0 +1,370 @@
+# quiz_app/snapshot.py
+"""
+Columnar snapshot of submissions for offline analysis
+
+Writes NumPy .npy files without needing NumPy, so the snapshot can be taken on
+the application server and loaded elsewhere with np.load(path, mmap_mode='r').
+Each .npy header is padded to HEADER_SIZE bytes, so appending rows only rewrites
+the shape in place. Layout of a snapshot directory:
+
+    manifest.json                   export state, used for incremental appends
+    users.npy, quizzes.npy          int64 dictionaries: code -> user / quiz id
+    submissions/id.npy              int64 submission ids, ascending
+    submissions/user.npy            int32 user codes
+    submissions/quiz.npy            int32 quiz codes
+    submissions/score.npy           int32
+    submissions/total_questions.npy int32
+    submissions/submitted_at.npy    datetime64[us], UTC
+    answers/<quiz_id>/questions.npy int64 question ids, one per matrix column
+    answers/<quiz_id>/rows.npy      int64 row in the submissions columns, one per matrix row
+    answers/<quiz_id>/selected.npy  uint8 matrix: 0 not answered, 1-4 options A-D
+    answers/<quiz_id>/correct.npy   uint8 matrix: 1 if the answer was correct
+
+Appends only pick up submissions newer than the last snapshot; regraded scores
+of already exported submissions need a full export
+"""
+import ast
+import json
+import os
+import shutil
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from .models import QuizSubmission, SubmissionAnswer
+from .packing import OPTIONS, unpack_answers
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_CHUNK_SIZE = 2000
+MANIFEST = 'manifest.json'
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+# Room for any shape; a multiple of 64 keeps the data aligned for memory mapping
+HEADER_SIZE = 128
+
+# .npy dtype descriptors and the matching array typecodes
+INT64 = ('<i8', 'q')
+INT32 = ('<i4', 'i')
+UINT8 = ('|u1', 'B')
+DATETIME_US = ('<M8[us]', 'q')
+
+OPTION_CODES = {option: code for code, option in enumerate(OPTIONS, start=1)}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+SUBMISSION_COLUMNS = {
+    'id': INT64,
+    'user': INT32,
+    'quiz': INT32,
+    'score': INT32,
+    'total_questions': INT32,
+    'submitted_at': DATETIME_US,
+}
+
+
+def _to_bytes(values, typecode):
+    data = array(typecode, values)
+    if sys.byteorder == 'big' and data.itemsize > 1:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _from_bytes(data, typecode):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def _itemsize(dtype):
+    return array(dtype[1]).itemsize
+
+
+class NpyColumn:
+    """
+    An appendable .npy file of shape (rows,) or (rows, width)
+    """
+
+    def __init__(self, path, dtype, width=None):
+        self.path = path
+        self.dtype = dtype
+        self.width = width
+        self.rows = 0
+        if os.path.exists(path):
+            self.rows, self.width = self._read_shape()
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(self._header())
+
+    @property
+    def row_size(self):
+        return _itemsize(self.dtype) * (self.width or 1)
+
+    def _header(self):
+        shape = (self.rows,) if self.width is None else (self.rows, self.width)
+        header = f"{{'descr': '{self.dtype[0]}', 'fortran_order': False, 'shape': {shape!r}, }}"
+        header = header.encode('latin1')
+        padding = HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1
+        return NPY_MAGIC + (HEADER_SIZE - len(NPY_MAGIC) - 2).to_bytes(2, 'little') + header + b' ' * padding + b'\n'
+
+    def _read_shape(self):
+        with open(self.path, 'rb') as file:
+            prefix = file.read(HEADER_SIZE)
+        if not prefix.startswith(NPY_MAGIC):
+            raise ValueError(f"{self.path} is not a snapshot .npy file")
+        header = ast.literal_eval(prefix[len(NPY_MAGIC) + 2:].decode('latin1').strip())
+        if header['descr'] != self.dtype[0]:
+            raise ValueError(f"{self.path} has dtype {header['descr']}, expected {self.dtype[0]}")
+        shape = header['shape']
+        return shape[0], (shape[1] if len(shape) > 1 else None)
+
+    def truncate(self, rows):
+        """
+        Drop rows past `rows` - rows written by an export that didn't finish
+        """
+        self.rows = min(self.rows, rows)
+        with open(self.path, 'r+b') as file:
+            file.truncate(HEADER_SIZE + self.rows * self.row_size)
+            file.seek(0)
+            file.write(self._header())
+
+    def append(self, data, rows):
+        """
+        Append raw little-endian row data, then record the new shape in the header
+        """
+        if not rows:
+            return
+        with open(self.path, 'r+b') as file:
+            file.seek(HEADER_SIZE + self.rows * self.row_size)
+            file.write(data)
+            self.rows += rows
+            file.seek(0)
+            file.write(self._header())
+
+    def append_values(self, values):
+        self.append(_to_bytes(values, self.dtype[1]), len(values) // (self.width or 1))
+
+    def read_values(self):
+        with open(self.path, 'rb') as file:
+            file.seek(HEADER_SIZE)
+            return _from_bytes(file.read(self.rows * self.row_size), self.dtype[1])
+
+    def resize(self, width):
+        """
+        Change the number of matrix columns - new columns are zero-filled; rewrites the file
+        """
+        old_size = self.row_size
+        with open(self.path, 'rb') as file:
+            file.seek(HEADER_SIZE)
+            data = file.read(self.rows * old_size)
+        self.width = width
+        new_size = self.row_size
+        padding = b'\0' * max(new_size - old_size, 0)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(self._header())
+            for start in range(0, len(data), old_size):
+                file.write(data[start:start + min(old_size, new_size)] + padding)
+        os.replace(tmp_path, self.path)
+
+
+class Dictionary:
+    """
+    Dictionary encoding of ids - an id's code is its position in the .npy file
+    """
+
+    def __init__(self, path, size):
+        self.column = NpyColumn(path, INT64)
+        self.column.truncate(size)
+        self.codes = {value: code for code, value in enumerate(self.column.read_values())}
+        self.new_values = []
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+            self.new_values.append(value)
+        return code
+
+    def flush(self):
+        self.column.append_values(self.new_values)
+        self.new_values = []
+
+
+def _microseconds(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        manifest = json.load(file)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')!r}")
+    return manifest
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    # The manifest is replaced last, so an interrupted export is rolled back
+    # to the previous snapshot by the truncation at the start of the next one
+    os.replace(tmp_path, path)
+
+
+def _clear(directory):
+    for name in ('submissions', 'answers'):
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    for name in (MANIFEST, 'users.npy', 'quizzes.npy'):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _chunk_answers(chunk):
+    """
+    {submission_id: [(question_id, selected_answer, is_correct), ...]} for a chunk of submission rows
+    """
+    answers = {}
+    row_ids = [row[0] for row in chunk if row[6] == QuizSubmission.ROWS]
+    rows = (
+        SubmissionAnswer.objects.filter(submission_id__in=row_ids)
+        .values_list('submission_id', 'question_id', 'selected_answer', 'is_correct')
+    )
+    for submission_id, question_id, selected, is_correct in rows:
+        answers.setdefault(submission_id, []).append((question_id, selected, is_correct))
+    for row in chunk:
+        if row[6] == QuizSubmission.PACKED:
+            answers[row[0]] = unpack_answers(*row[7:])
+    return answers
+
+
+class QuizMatrix:
+    """
+    Answer matrices of one quiz - question ids are dictionary-encoded as column numbers
+    """
+
+    def __init__(self, directory, quiz_id, state):
+        base = os.path.join(directory, 'answers', str(quiz_id))
+        self.questions = Dictionary(os.path.join(base, 'questions.npy'), state['questions'])
+        self.rows = NpyColumn(os.path.join(base, 'rows.npy'), INT64)
+        self.rows.truncate(state['rows'])
+        width = max(len(self.questions), 1)
+        self.selected = NpyColumn(os.path.join(base, 'selected.npy'), UINT8, width)
+        self.correct = NpyColumn(os.path.join(base, 'correct.npy'), UINT8, width)
+        for matrix in (self.selected, self.correct):
+            matrix.truncate(state['rows'])
+            if matrix.width != width:
+                matrix.resize(width)
+
+    def append(self, entries):
+        """
+        Append (submission row, answers) entries
+        """
+        for _, answers in entries:
+            for question_id, _, _ in answers:
+                self.questions.encode(question_id)
+        self.questions.flush()
+        width = max(len(self.questions), 1)
+        for matrix in (self.selected, self.correct):
+            if matrix.width < width:
+                matrix.resize(width)
+
+        selected = bytearray(width * len(entries))
+        correct = bytearray(width * len(entries))
+        for index, (_, answers) in enumerate(entries):
+            offset = index * width
+            for question_id, option, is_correct in answers:
+                column = offset + self.questions.codes[question_id]
+                selected[column] = OPTION_CODES.get(option, 0)
+                correct[column] = 1 if is_correct else 0
+        self.rows.append_values([row for row, _ in entries])
+        self.selected.append(bytes(selected), len(entries))
+        self.correct.append(bytes(correct), len(entries))
+
+    def state(self):
+        return {'rows': self.rows.rows, 'questions': len(self.questions)}
+
+
+def export_snapshot(directory, full=False, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Write or extend the snapshot in `directory`
+    Returns the number of submissions added
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = None if full else _load_manifest(directory)
+    if manifest is None:
+        _clear(directory)
+        manifest = {'format': SNAPSHOT_FORMAT, 'last_submission_id': 0, 'submissions': 0,
+                    'users': 0, 'quizzes': {}, 'quiz_codes': 0}
+
+    users = Dictionary(os.path.join(directory, 'users.npy'), manifest['users'])
+    quizzes = Dictionary(os.path.join(directory, 'quizzes.npy'), manifest['quiz_codes'])
+    columns = {
+        name: NpyColumn(os.path.join(directory, 'submissions', f'{name}.npy'), dtype)
+        for name, dtype in SUBMISSION_COLUMNS.items()
+    }
+    for column in columns.values():
+        column.truncate(manifest['submissions'])
+    quiz_states = manifest['quizzes']
+    matrices = {}
+
+    submissions = (
+        QuizSubmission.objects.order_by('id')
+        .values_list('id', 'user_id', 'quiz_id', 'score', 'total_questions', 'submitted_at',
+                     'answer_storage', 'packed_question_ids', 'packed_answers', 'correct_bitmap')
+    )
+    last_id = manifest['last_submission_id']
+    added = 0
+    while True:
+        chunk = list(submissions.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        answers = _chunk_answers(chunk)
+
+        first_row = manifest['submissions'] + added
+        values = {name: [] for name in SUBMISSION_COLUMNS}
+        by_quiz = {}
+        for offset, row in enumerate(chunk):
+            submission_id, user_id, quiz_id, score, total_questions, submitted_at = row[:6]
+            values['id'].append(submission_id)
+            values['user'].append(users.encode(user_id))
+            values['quiz'].append(quizzes.encode(quiz_id))
+            values['score'].append(score)
+            values['total_questions'].append(total_questions)
+            values['submitted_at'].append(_microseconds(submitted_at))
+            by_quiz.setdefault(quiz_id, []).append((first_row + offset, answers.get(submission_id, [])))
+
+        users.flush()
+        quizzes.flush()
+        for name, column in columns.items():
+            column.append_values(values[name])
+        for quiz_id, entries in by_quiz.items():
+            key = str(quiz_id)
+            if key not in matrices:
+                matrices[key] = QuizMatrix(directory, quiz_id, quiz_states.get(key, {'rows': 0, 'questions': 0}))
+            matrices[key].append(entries)
+        added += len(chunk)
+
+    for key, matrix in matrices.items():
+        quiz_states[key] = matrix.state()
+    manifest.update({
+        'last_submission_id': last_id,
+        'submissions': manifest['submissions'] + added,
+        'users': len(users),
+        'quiz_codes': len(quizzes),
+        'quizzes': quiz_states,
+        'exported_at': timezone.now().isoformat(),
+    })
+    _save_manifest(directory, manifest)
+    return added
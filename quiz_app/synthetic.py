@@ -0,0 +1,124 @@
+# quiz_app/synthetic.py
+import random
+import uuid
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from .models import Category, Quiz, Question, QuizSubmission, SubmissionAnswer
+from .signals import questions_changed
+from .search import index_quizzes, index_questions
+from .similarity import index_question_signatures
+from .analytics import rebuild_question_stats
+from .leaderboard import rebuild_leaderboard
+from .progress import rebuild_user_progress
+
+User = get_user_model()
+
+SYNTHETIC_PASSWORD = 'Synthetic-pass-123'
+BATCH_SIZE = 1000
+OPTIONS = 'ABCD'
+
+
+def generate_dataset(users=200, categories=5, quizzes=50, questions=20, submissions_per_user=5, seed=0):
+    """
+    Fill the database with a realistic synthetic dataset using bulk inserts
+    Every generated user has the password SYNTHETIC_PASSWORD; returns the created
+    objects so callers can build requests against them
+    """
+    rng = random.Random(seed)
+    # Unique tag so the generator can run more than once against the same database
+    tag = uuid.uuid4().hex[:8]
+    password = make_password(SYNTHETIC_PASSWORD)
+
+    with transaction.atomic():
+        admins = User.objects.bulk_create([
+            User(username=f'synthetic-admin-{tag}-{i}', email=f'admin{i}-{tag}@example.com',
+                 password=password, is_admin=True)
+            for i in range(2)
+        ])
+        students = User.objects.bulk_create([
+            User(username=f'synthetic-user-{tag}-{i}', email=f'user{i}-{tag}@example.com', password=password)
+            for i in range(users)
+        ], batch_size=BATCH_SIZE)
+
+        category_objs = Category.objects.bulk_create([
+            Category(name=f'Synthetic category {tag} {i}', description=f'Generated category {i}',
+                     created_by=rng.choice(admins))
+            for i in range(categories)
+        ])
+
+        quiz_objs = Quiz.objects.bulk_create([
+            Quiz(title=f'Synthetic quiz {i}', description=f'Generated quiz {i} ({tag})',
+                 category=rng.choice(category_objs), created_by=rng.choice(admins),
+                 is_active=rng.random() > 0.1)
+            for i in range(quizzes)
+        ], batch_size=BATCH_SIZE)
+
+        question_objs = Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f'Synthetic question {j} of quiz {quiz.pk}: what is {rng.randint(1, 10**6)}?',
+                     option_a='Option one', option_b='Option two', option_c='Option three', option_d='Option four',
+                     correct_answer=rng.choice(OPTIONS))
+            for quiz in quiz_objs
+            for j in range(questions)
+        ], batch_size=BATCH_SIZE)
+        # bulk_create skips the quiz and question signals
+        questions_changed(*[quiz.pk for quiz in quiz_objs])
+        index_quizzes([quiz.pk for quiz in quiz_objs])
+        index_questions([question.pk for question in question_objs])
+        index_question_signatures(question_objs)
+
+    answer_keys = {}
+    for question in question_objs:
+        answer_keys.setdefault(question.quiz_id, {})[question.pk] = question.correct_answer
+    active_quizzes = [quiz for quiz in quiz_objs if quiz.is_active and quiz.pk in answer_keys]
+
+    submissions = []
+    for student in students:
+        skill = rng.random()
+        for quiz in rng.sample(active_quizzes, min(submissions_per_user, len(active_quizzes))):
+            selections = {
+                question_id: correct if rng.random() < skill else rng.choice(OPTIONS)
+                for question_id, correct in answer_keys[quiz.pk].items()
+            }
+            submissions.append((student, quiz, selections))
+
+    for start in range(0, len(submissions), BATCH_SIZE):
+        _insert_submissions(submissions[start:start + BATCH_SIZE], answer_keys)
+
+    # Derived tables are rebuilt once rather than per submission
+    for quiz in quiz_objs:
+        rebuild_question_stats(quiz.pk)
+        rebuild_leaderboard(quiz.pk)
+    rebuild_user_progress([student.pk for student in students])
+
+    return {
+        'admins': admins,
+        'students': students,
+        'categories': category_objs,
+        'quizzes': quiz_objs,
+        'questions': question_objs,
+        'submissions': len(submissions),
+    }
+
+
+def _insert_submissions(batch, answer_keys):
+    with transaction.atomic():
+        submission_objs = QuizSubmission.objects.bulk_create([
+            QuizSubmission(
+                user=student,
+                quiz=quiz,
+                score=sum(answer_keys[quiz.pk][qid] == selected for qid, selected in selections.items()),
+                total_questions=len(selections)
+            )
+            for student, quiz, selections in batch
+        ])
+        SubmissionAnswer.objects.bulk_create([
+            SubmissionAnswer(
+                submission=submission,
+                question_id=question_id,
+                selected_answer=selected,
+                is_correct=answer_keys[quiz.pk][question_id] == selected
+            )
+            for submission, (_, quiz, selections) in zip(submission_objs, batch)
+            for question_id, selected in selections.items()
+        ], batch_size=BATCH_SIZE)
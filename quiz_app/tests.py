@@ -1,3 +1,1258 @@
-from django.test import TestCase
+import ast
+import csv
+import json
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from users.authentication import QuizRefreshToken, user_cache
+from users.models import User
+from . import routers
+from .analytics import item_statistics, rebuild_question_stats, rebuild_quizzes_question_stats
+from .benchmark import run_case
+from .attempts import Draft, DraftStore, decode_answers, drafts, get_draft
+from .cache import LRUCache, answer_keys, get_answer_key
+from .grading import create_submission, load_answer_key
+from .leaderboard import rebuild_leaderboard, rebuild_leaderboards
+from .ingestion import enqueue_submission, next_batch, process_batch, release_claims
+from .middleware import ReplicaRoutingMiddleware
+from .models import AttemptSession, Category, LeaderboardEntry, PendingSubmission, Quiz, Question, QuizSubmission, UserProgress
+from .packing import decode_ids, encode_ids, pack_answers, unpack_answers
+from .progress import rebuild_user_progress
+from .regrade import regrade_quiz
+from .snapshot import INT64, NpyColumn, export_snapshot
+from .pools import draw_question_ids, draw_seed
+from .routers import replica_state
+from .serializers import CategorySerializer, QuizListSerializer, QuizSubmissionSerializer
 
-# Create your tests here.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'quiz_payloads': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'quiz-payloads-tests'},
+    'replica_pins': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'replica-pins-tests'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QuizTestCase(TestCase):
+    """
+    Shared fixtures: an admin, a student, a category and helpers for quizzes and API clients
+    """
+    def setUp(self):
+        answer_keys.clear()
+        user_cache.clear()
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.admin = User.objects.create_user(username='admin', password='pass12345', is_admin=True)
+        self.student = User.objects.create_user(username='student', password='pass12345')
+        self.category = Category.objects.create(name='General', created_by=self.admin)
+
+    def make_quiz(self, questions=3, **kwargs):
+        quiz = Quiz.objects.create(
+            title=kwargs.pop('title', 'Quiz'), description=kwargs.pop('description', ''), category=self.category,
+            created_by=self.admin, **kwargs
+        )
+        for number in range(questions):
+            self.make_question(quiz, correct_answer='ABCD'[number % 4])
+        quiz.refresh_from_db()
+        return quiz
+
+    def make_question(self, quiz, **kwargs):
+        fields = {
+            'question_text': f'Question {Question.objects.count() + 1} about {quiz.title}?',
+            'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd', 'correct_answer': 'A',
+        }
+        fields.update(kwargs)
+        return Question.objects.create(quiz=quiz, **fields)
+
+    def client_for(self, user):
+        client = APIClient()
+        token = QuizRefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def make_student(self, username):
+        return User.objects.create_user(username=username, password='pass12345')
+
+    def submit(self, user, quiz, selections):
+        return self.client_for(user).post(f'/api/quizzes/{quiz.pk}/submit/', {
+            'answers': [
+                {'question_id': question_id, 'selected_answer': selected}
+                for question_id, selected in selections.items()
+            ]
+        }, format='json')
+
+    def correct_answers(self, quiz):
+        return dict(quiz.questions.filter(is_active=True).values_list('id', 'correct_answer'))
+
+
+class GradingTests(QuizTestCase):
+    def test_submission_is_scored(self):
+        quiz = self.make_quiz(questions=4)
+        selections = self.correct_answers(quiz)
+        wrong = min(selections)
+        selections[wrong] = 'D' if selections[wrong] != 'D' else 'A'
+        response = self.submit(self.student, quiz, selections)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['score'], data['total_questions'], data['percentage_score']), (3, 4, 75.0))
+        answers = {answer['question']: answer['is_correct'] for answer in data['answers']}
+        self.assertEqual(answers, {question_id: question_id != wrong for question_id in selections})
+
+    def test_inactive_questions_are_not_graded(self):
+        quiz = self.make_quiz(questions=3)
+        inactive = self.make_question(quiz, is_active=False)
+        selections = self.correct_answers(quiz)
+        self.assertNotIn(inactive.id, selections)
+        response = self.submit(self.student, quiz, selections)
+        self.assertEqual((response.json()['score'], response.json()['total_questions']), (3, 3))
+        self.assertEqual(self.submit(self.make_student('other'), quiz, {
+            **selections, inactive.id: 'A'
+        }).status_code, 400)
+
+    def test_incomplete_and_repeated_submissions_are_rejected(self):
+        quiz = self.make_quiz(questions=3)
+        selections = self.correct_answers(quiz)
+        selections.popitem()
+        self.assertEqual(self.submit(self.student, quiz, selections).status_code, 400)
+        self.assertEqual(self.submit(self.student, quiz, self.correct_answers(quiz)).status_code, 201)
+        self.assertEqual(self.submit(self.student, quiz, self.correct_answers(quiz)).status_code, 400)
+        self.assertEqual(QuizSubmission.objects.filter(quiz=quiz).count(), 1)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        counts = []
+        for questions in (2, 40):
+            quiz = self.make_quiz(questions=questions)
+            student = self.make_student(f'student-{questions}')
+            selections = self.correct_answers(quiz)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.submit(student, quiz, selections).status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class AnswerKeyCacheTests(QuizTestCase):
+    def test_cached_key_is_reused_for_the_same_version(self):
+        quiz = self.make_quiz(questions=3)
+        self.assertEqual(get_answer_key(quiz).answers, self.correct_answers(quiz))
+        with self.assertNumQueries(0):
+            get_answer_key(quiz)
+
+    def test_question_edits_invalidate_the_key(self):
+        quiz = self.make_quiz(questions=3)
+        get_answer_key(quiz)
+        question = quiz.questions.order_by('id').first()
+        question.correct_answer = 'C'
+        question.save()
+        quiz.refresh_from_db()
+        self.assertEqual(get_answer_key(quiz).answers[question.id], 'C')
+
+        question.is_active = False
+        question.save()
+        quiz.refresh_from_db()
+        self.assertNotIn(question.id, get_answer_key(quiz).answers)
+
+        question.delete()
+        quiz.refresh_from_db()
+        self.assertNotIn(question.id, get_answer_key(quiz).correct_answers)
+
+    def test_grading_uses_the_edited_key(self):
+        quiz = self.make_quiz(questions=2)
+        selections = self.correct_answers(quiz)
+        self.assertEqual(self.submit(self.make_student('first'), quiz, selections).json()['score'], 2)
+        question = quiz.questions.order_by('id').first()
+        question.correct_answer = 'D'
+        question.save()
+        self.assertEqual(self.submit(self.student, quiz, selections).json()['score'], 1)
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set(1, 'one')
+        cache.set(2, 'two')
+        cache.get(1)
+        cache.set(3, 'three')
+        self.assertEqual((cache.get(1), cache.get(2), cache.get(3)), ('one', None, 'three'))
+
+
+class QuizVersionTests(QuizTestCase):
+    def test_question_writes_bump_version_and_count(self):
+        quiz = self.make_quiz(questions=2)
+        version = quiz.version
+        self.make_question(quiz)
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.active_question_count, 3)
+        self.assertGreater(quiz.version, version)
+
+    def test_saving_stale_instance_keeps_version_and_count(self):
+        quiz = self.make_quiz(questions=15)
+        stale = Quiz.objects.get(pk=quiz.pk)
+        self.make_question(quiz)
+        current = Quiz.objects.get(pk=quiz.pk)
+        self.assertEqual(current.active_question_count, 16)
+
+        stale.title = 'Renamed'
+        stale.save()
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.title, 'Renamed')
+        self.assertEqual(quiz.active_question_count, 16)
+        # The edit itself is a new state, so the version moves past the question write
+        self.assertGreater(quiz.version, current.version)
+        self.assertEqual((stale.version, stale.active_question_count), (quiz.version, 16))
+
+    def test_update_fields_cannot_write_denormalized_fields(self):
+        quiz = self.make_quiz(questions=1)
+        stale = Quiz.objects.get(pk=quiz.pk)
+        self.make_question(quiz)
+        stale.save(update_fields=['title', 'version', 'active_question_count'])
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.active_question_count, 2)
+
+    def test_question_write_rolls_back_when_the_bump_fails(self):
+        quiz = self.make_quiz(questions=2)
+        question = quiz.questions.order_by('id').first()
+        with patch('quiz_app.signals.questions_changed', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.make_question(quiz)
+            question.is_active = False
+            with self.assertRaises(OperationalError):
+                question.save()
+            with self.assertRaises(OperationalError):
+                Question.objects.get(pk=question.pk).delete()
+        self.assertEqual(quiz.questions.filter(is_active=True).count(), 2)
+        current = Quiz.objects.get(pk=quiz.pk)
+        self.assertEqual((current.version, current.active_question_count), (quiz.version, 2))
+
+    def test_answer_key_reloads_after_stale_save(self):
+        quiz = self.make_quiz(questions=2)
+        stale = Quiz.objects.get(pk=quiz.pk)
+        self.assertEqual(len(get_answer_key(quiz).answers), 2)
+        self.make_question(quiz)
+        stale.save()
+        quiz.refresh_from_db()
+        self.assertEqual(len(get_answer_key(quiz).answers), 3)
+
+    def test_etag_changes_after_stale_save(self):
+        quiz = self.make_quiz(questions=2)
+        stale = Quiz.objects.get(pk=quiz.pk)
+        client = self.client_for(self.student)
+        first = client.get(f'/api/quizzes/{quiz.pk}/')
+        self.make_question(quiz)
+        stale.save()
+        second = client.get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()['questions']), 3)
+
+
+class QuizETagTests(QuizTestCase):
+    def test_matching_etag_gets_304(self):
+        quiz = self.make_quiz()
+        client = self.client_for(self.student)
+        first = client.get(f'/api/quizzes/{quiz.pk}/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Authorization', first['Vary'])
+        with self.assertNumQueries(1):
+            second = client.get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.content, b'')
+        self.assertEqual(client.get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+    def test_question_write_changes_etag(self):
+        quiz = self.make_quiz()
+        client = self.client_for(self.student)
+        etag = client.get(f'/api/quizzes/{quiz.pk}/')['ETag']
+        self.make_question(quiz)
+        response = client.get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_payload_variant(self):
+        quiz = self.make_quiz()
+        admin_etag = self.client_for(self.admin).get(f'/api/quizzes/{quiz.pk}/')['ETag']
+        student_etag = self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/')['ETag']
+        self.assertNotEqual(admin_etag, student_etag)
+        response = self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH=admin_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('correct_answer', response.json()['questions'][0])
+
+        pooled = self.make_quiz(questions=6, pool_size=2)
+        other = self.make_student('other')
+        pooled_etag = self.client_for(self.student).get(f'/api/quizzes/{pooled.pk}/')['ETag']
+        response = self.client_for(other).get(f'/api/quizzes/{pooled.pk}/', HTTP_IF_NONE_MATCH=pooled_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_hidden_quiz_is_not_found_with_any_etag(self):
+        quiz = self.make_quiz(is_active=False)
+        response = self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class LeaderboardTests(QuizTestCase):
+    def submit_score(self, username, quiz, score):
+        selections = self.correct_answers(quiz)
+        for question_id in sorted(selections)[score:]:
+            selections[question_id] = 'D' if selections[question_id] != 'D' else 'A'
+        response = self.submit(self.make_student(username), quiz, selections)
+        self.assertEqual(response.json()['score'], score)
+
+    def board(self, quiz):
+        return list(LeaderboardEntry.objects.filter(quiz=quiz).values_list('user__username', 'score').order_by(
+            '-score', 'submitted_at', 'id'
+        ))
+
+    def test_ties_share_a_rank_in_submission_order(self):
+        quiz = self.make_quiz(questions=3)
+        for username, score in (('first', 3), ('second', 2), ('third', 3), ('fourth', 1)):
+            self.submit_score(username, quiz, score)
+        results = self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/leaderboard/').json()['results']
+        self.assertEqual(
+            [(entry['rank'], entry['user'], entry['score']) for entry in results],
+            [(1, 'first', 3), (1, 'third', 3), (3, 'second', 2), (4, 'fourth', 1)]
+        )
+        limited = self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/leaderboard/?limit=1').json()
+        self.assertEqual([entry['user'] for entry in limited['results']], ['first'])
+
+    @override_settings(QUIZ_LEADERBOARD_SIZE=2)
+    def test_board_keeps_only_the_top_entries(self):
+        quiz = self.make_quiz(questions=3)
+        self.submit_score('first', quiz, 2)
+        self.submit_score('second', quiz, 1)
+        # Equal to the last entry but later - ranks behind it
+        self.submit_score('third', quiz, 1)
+        self.assertEqual(self.board(quiz), [('first', 2), ('second', 1)])
+        self.submit_score('fourth', quiz, 3)
+        self.assertEqual(self.board(quiz), [('fourth', 3), ('first', 2)])
+
+        incremental = self.board(quiz)
+        rebuild_leaderboard(quiz.pk)
+        self.assertEqual(self.board(quiz), incremental)
+
+    @override_settings(QUIZ_LEADERBOARD_SIZE=2)
+    def test_deleted_entry_is_refilled_from_trimmed_submissions(self):
+        quiz = self.make_quiz(questions=3)
+        self.submit_score('first', quiz, 3)
+        self.submit_score('second', quiz, 2)
+        self.submit_score('third', quiz, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizSubmission.objects.get(user__username='first').delete()
+        self.assertEqual(self.board(quiz), [('second', 2), ('third', 1)])
+        self.submit_score('fourth', quiz, 0)
+        self.assertEqual(self.board(quiz), [('second', 2), ('third', 1)])
+
+    def test_deleting_a_user_rebuilds_their_quizzes_once(self):
+        quizzes = [self.make_quiz(questions=1, title=f'Quiz {number}') for number in range(2)]
+        for quiz in quizzes:
+            self.submit(self.student, quiz, self.correct_answers(quiz))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.student.delete()
+        [callback] = [callback for callback in callbacks if callback.rebuild is rebuild_leaderboards]
+        self.assertEqual(callback.ids, {quiz.pk for quiz in quizzes})
+        self.assertFalse(LeaderboardEntry.objects.exists())
+
+
+class QuestionStatsTests(QuizTestCase):
+    def test_counters_track_submissions(self):
+        quiz = self.make_quiz(questions=2)
+        first, second = sorted(self.correct_answers(quiz))
+        self.submit(self.make_student('one'), quiz, {first: 'A', second: 'B'})
+        self.submit(self.make_student('two'), quiz, {first: 'C', second: 'B'})
+        self.submit(self.make_student('three'), quiz, {first: 'A', second: 'A'})
+
+        response = self.client_for(self.admin).get(f'/api/quizzes/{quiz.pk}/analytics/')
+        stats = {item['question']: item for item in response.json()['questions']}
+        self.assertEqual(stats[first]['attempts'], 3)
+        self.assertEqual(stats[first]['correct_count'], 2)
+        self.assertEqual(stats[first]['option_counts'], {'A': 2, 'B': 0, 'C': 1, 'D': 0})
+        self.assertAlmostEqual(stats[second]['percent_correct'], 200 / 3)
+        # Students who got the item right scored higher overall
+        self.assertGreater(stats[first]['discrimination_index'], 0)
+        self.assertEqual(self.client_for(self.student).get(f'/api/quizzes/{quiz.pk}/analytics/').status_code, 403)
+
+    def test_unanswered_questions_have_empty_stats(self):
+        quiz = self.make_quiz(questions=1)
+        [item] = item_statistics(quiz.pk)
+        self.assertEqual((item['attempts'], item['percent_correct'], item['discrimination_index']), (0, None, None))
+
+    def test_deletes_are_subtracted_from_counters(self):
+        quiz = self.make_quiz(questions=2)
+        selections = self.correct_answers(quiz)
+        first = min(selections)
+        for username in ('one', 'two', 'three'):
+            self.submit(self.make_student(username), quiz, selections)
+        self.submit(self.student, quiz, {**selections, first: 'D'})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            QuizSubmission.objects.get(user__username='one').delete()
+            self.student.delete()
+        self.assertEqual(len([callback for callback in callbacks if callback.rebuild is rebuild_quizzes_question_stats]), 1)
+        stats = {item['question']: item for item in item_statistics(quiz.pk)}
+        self.assertEqual((stats[first]['attempts'], stats[first]['correct_count']), (2, 2))
+        self.assertEqual(stats[first]['option_counts']['D'], 0)
+
+    def test_rebuild_matches_incremental_counters(self):
+        quiz = self.make_quiz(questions=3)
+        selections = self.correct_answers(quiz)
+        for number, username in enumerate(('one', 'two', 'three')):
+            question_id = sorted(selections)[number]
+            self.submit(self.make_student(username), quiz, {**selections, question_id: 'D'})
+        with override_settings(QUIZ_ANSWER_STORAGE=QuizSubmission.PACKED):
+            self.submit(self.student, quiz, selections)
+        incremental = item_statistics(quiz.pk)
+        self.assertEqual(rebuild_question_stats(quiz.pk), 3)
+        rebuilt = item_statistics(quiz.pk)
+        for before, after in zip(incremental, rebuilt):
+            discrimination = before.pop('discrimination_index'), after.pop('discrimination_index')
+            self.assertEqual(before, after)
+            self.assertAlmostEqual(*discrimination)
+
+
+class PackedAnswerTests(QuizTestCase):
+    def test_round_trip(self):
+        for count in (0, 1, 3, 4, 5, 8, 9, 17):
+            graded = [
+                (question_id * 97 + (question_id % 3) * 20000 + 1, 'ABCD'[question_id % 4], question_id % 3 == 0)
+                for question_id in range(count)
+            ]
+            packed = pack_answers(reversed(graded))
+            self.assertEqual(unpack_answers(**packed), sorted(graded))
+        self.assertEqual(decode_ids(encode_ids([1, 2, 300, 2 ** 40])), [1, 2, 300, 2 ** 40])
+        self.assertEqual(len(encode_ids(range(1, 101))), 100)
+
+    def test_packed_submission_renders_like_rows(self):
+        quiz = self.make_quiz(questions=6)
+        selections = self.correct_answers(quiz)
+        selections[min(selections)] = 'B'
+        rows = self.submit(self.make_student('rows'), quiz, selections).json()
+        with override_settings(QUIZ_ANSWER_STORAGE=QuizSubmission.PACKED):
+            packed = self.submit(self.student, quiz, selections).json()
+        submission = QuizSubmission.objects.get(pk=packed['id'])
+        self.assertEqual(submission.answer_storage, QuizSubmission.PACKED)
+        self.assertFalse(submission.answers.exists())
+        detail = self.client_for(self.student).get(f'/api/submissions/{packed["id"]}/').json()
+        for data in (packed, detail):
+            self.assertEqual(data['answers'], rows['answers'])
+            self.assertEqual(data['score'], rows['score'])
+
+
+class ProjectionParityTests(QuizTestCase):
+    def assertMatchesSerializer(self, user, url, serializer_class, queryset):
+        results = self.client_for(user).get(url).json()['results']
+        rendered = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        expected = {item['id']: item for item in json.loads(rendered)}
+        self.assertEqual(len(results), len(expected))
+        for item in results:
+            self.assertEqual(item, expected[item['id']])
+
+    def test_categories(self):
+        Category.objects.create(name='Science', description='Physics & "chemistry"', created_by=self.admin)
+        self.assertMatchesSerializer(self.student, '/api/categories/', CategorySerializer, Category.objects.all())
+
+    def test_quiz_list(self):
+        self.make_quiz(questions=4, title='Plain')
+        self.make_quiz(questions=6, pool_size=2, title='Pooled')
+        self.make_quiz(questions=1, pool_size=5, title='Small pool')
+        self.make_quiz(questions=0, title='Hidden', is_active=False)
+        self.assertMatchesSerializer(self.admin, '/api/quizzes/', QuizListSerializer, Quiz.objects.all())
+        self.assertMatchesSerializer(
+            self.student, '/api/quizzes/', QuizListSerializer, Quiz.objects.filter(is_active=True)
+        )
+
+    def test_submissions_in_both_storage_modes(self):
+        quiz = self.make_quiz(questions=4)
+        selections = self.correct_answers(quiz)
+        self.submit(self.student, quiz, {**selections, min(selections): 'D'})
+        with override_settings(QUIZ_ANSWER_STORAGE=QuizSubmission.PACKED):
+            self.submit(self.make_student('packed'), quiz, selections)
+            other = self.make_quiz(questions=2, title='Other')
+            self.submit(self.student, other, self.correct_answers(other))
+        # Answers to deleted questions drop out of both representations
+        Question.objects.get(pk=max(selections)).delete()
+
+        self.assertMatchesSerializer(
+            self.admin, '/api/all-submissions/', QuizSubmissionSerializer, QuizSubmission.objects.all()
+        )
+        self.assertMatchesSerializer(
+            self.student, '/api/my-submissions/', QuizSubmissionSerializer,
+            QuizSubmission.objects.filter(user=self.student)
+        )
+
+
+class RegradeTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        # Correct answers A, B, C
+        self.quiz = self.make_quiz(questions=3)
+        self.first, self.second, self.third = sorted(self.correct_answers(self.quiz))
+
+    def submit_answers(self, username, selected, packed=False):
+        storage = QuizSubmission.PACKED if packed else QuizSubmission.ROWS
+        selections = dict(zip((self.first, self.second, self.third), selected))
+        with override_settings(QUIZ_ANSWER_STORAGE=storage):
+            response = self.submit(self.make_student(username), self.quiz, selections)
+        return QuizSubmission.objects.get(pk=response.json()['id'])
+
+    def set_correct_answer(self, question_id, correct_answer):
+        question = Question.objects.get(pk=question_id)
+        question.correct_answer = correct_answer
+        question.save()
+
+    def answers(self, submission):
+        submission.refresh_from_db()
+        return [(answer['question'], answer['is_correct']) for answer in QuizSubmissionSerializer(submission).data['answers']]
+
+    def test_regrade_after_correct_answers_change(self):
+        rows_changed = self.submit_answers('rows-changed', 'ABC')
+        packed_changed = self.submit_answers('packed-changed', 'AAA', packed=True)
+        rows_same = self.submit_answers('rows-same', 'ABD')
+        packed_same = self.submit_answers('packed-same', 'ABD', packed=True)
+        self.assertEqual([submission.score for submission in (rows_changed, packed_changed, rows_same, packed_same)], [3, 1, 2, 2])
+
+        self.set_correct_answer(self.second, 'A')
+        self.set_correct_answer(self.third, 'D')
+        # rows-same and packed-same swap which answer is right but keep their score
+        self.assertEqual(regrade_quiz(self.quiz.pk, chunk_size=3), 2)
+
+        scores = dict(QuizSubmission.objects.values_list('user__username', 'score'))
+        self.assertEqual(scores, {'rows-changed': 1, 'packed-changed': 2, 'rows-same': 2, 'packed-same': 2})
+        expected = [(self.first, True), (self.second, False), (self.third, True)]
+        self.assertEqual(self.answers(rows_same), expected)
+        self.assertEqual(self.answers(packed_same), expected)
+        self.assertEqual(self.answers(packed_changed), [(self.first, True), (self.second, True), (self.third, False)])
+
+        board = list(LeaderboardEntry.objects.filter(quiz=self.quiz).order_by('-score', 'submitted_at', 'id').values_list('user__username', 'score'))
+        self.assertEqual(board, [('packed-changed', 2), ('rows-same', 2), ('packed-same', 2), ('rows-changed', 1)])
+        stats = {item['question']: item['correct_count'] for item in item_statistics(self.quiz.pk)}
+        self.assertEqual(stats, {self.first: 4, self.second: 1, self.third: 2})
+        progress = UserProgress.objects.get(user__username='rows-changed')
+        self.assertAlmostEqual(progress.percentage_sum, 100 / 3)
+
+    def test_unchanged_key_changes_nothing(self):
+        self.submit_answers('rows', 'ABD')
+        self.submit_answers('packed', 'AAA', packed=True)
+        self.assertEqual(regrade_quiz(self.quiz.pk), 0)
+        self.assertEqual(dict(QuizSubmission.objects.values_list('user__username', 'score')), {'rows': 2, 'packed': 1})
+
+
+class SnapshotExportTests(QuizTestCase):
+    # struct formats of the dtypes the snapshot writes
+    FORMATS = {'<i8': 'q', '<i4': 'i', '|u1': 'B', '<M8[us]': 'q'}
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def read_npy(self, *parts):
+        """
+        Parse a .npy file by the format spec - returns (shape, flat values)
+        """
+        with open(os.path.join(self.directory, *parts), 'rb') as file:
+            data = file.read()
+        self.assertEqual(data[:8], b'\x93NUMPY\x01\x00')
+        header_length = int.from_bytes(data[8:10], 'little')
+        offset = 10 + header_length
+        self.assertEqual(offset % 64, 0)
+        self.assertEqual(data[offset - 1:offset], b'\n')
+        header = ast.literal_eval(data[10:offset].decode('latin1'))
+        self.assertFalse(header['fortran_order'])
+        shape = header['shape']
+        count = 1
+        for size in shape:
+            count *= size
+        format = self.FORMATS[header['descr']]
+        self.assertEqual(len(data) - offset, count * struct.calcsize(format))
+        return shape, list(struct.unpack(f'<{count}{format}', data[offset:]))
+
+    def submit_answers(self, username, quiz, selected, packed=False):
+        selections = dict(zip(sorted(self.correct_answers(quiz)), selected))
+        storage = QuizSubmission.PACKED if packed else QuizSubmission.ROWS
+        with override_settings(QUIZ_ANSWER_STORAGE=storage):
+            response = self.submit(self.make_student(username), quiz, selections)
+        return QuizSubmission.objects.get(pk=response.json()['id'])
+
+    def test_export_then_append(self):
+        first_quiz = self.make_quiz(questions=2)
+        # Correct answers A, B
+        submissions = [
+            self.submit_answers('rows', first_quiz, 'AB'),
+            self.submit_answers('packed', first_quiz, 'CB', packed=True),
+        ]
+        self.assertEqual(export_snapshot(self.directory, chunk_size=1), 2)
+        self.assertEqual(self.read_npy('answers', str(first_quiz.pk), 'selected.npy'), ((2, 2), [1, 2, 3, 2]))
+        self.assertEqual(self.read_npy('answers', str(first_quiz.pk), 'correct.npy'), ((2, 2), [1, 1, 0, 1]))
+
+        # A new question widens the matrix; a new quiz gets its own
+        added = self.make_question(first_quiz, correct_answer='D')
+        first_quiz.refresh_from_db()
+        submissions.append(self.submit_answers('widened', first_quiz, 'ABD', packed=True))
+        second_quiz = self.make_quiz(questions=1, title='Second')
+        submissions.append(self.submit_answers('second', second_quiz, 'B'))
+        self.assertEqual(export_snapshot(self.directory), 2)
+        self.assertEqual(export_snapshot(self.directory), 0)
+
+        self.assertEqual(self.read_npy('submissions', 'id.npy'), ((4,), [submission.pk for submission in submissions]))
+        self.assertEqual(self.read_npy('submissions', 'score.npy'), ((4,), [2, 1, 3, 0]))
+        self.assertEqual(self.read_npy('submissions', 'quiz.npy'), ((4,), [0, 0, 0, 1]))
+        self.assertEqual(self.read_npy('quizzes.npy'), ((2,), [first_quiz.pk, second_quiz.pk]))
+        self.assertEqual(self.read_npy('users.npy')[0], (4,))
+        epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            self.read_npy('submissions', 'submitted_at.npy')[1],
+            [(submission.submitted_at - epoch) // timedelta(microseconds=1) for submission in submissions]
+        )
+
+        matrix = ('answers', str(first_quiz.pk))
+        self.assertEqual(self.read_npy(*matrix, 'questions.npy')[1][-1], added.pk)
+        self.assertEqual(self.read_npy(*matrix, 'rows.npy'), ((3,), [0, 1, 2]))
+        self.assertEqual(self.read_npy(*matrix, 'selected.npy'), ((3, 3), [1, 2, 0, 3, 2, 0, 1, 2, 4]))
+        self.assertEqual(self.read_npy(*matrix, 'correct.npy'), ((3, 3), [1, 1, 0, 0, 1, 0, 1, 1, 1]))
+        self.assertEqual(self.read_npy('answers', str(second_quiz.pk), 'rows.npy'), ((1,), [3]))
+        self.assertEqual(self.read_npy('answers', str(second_quiz.pk), 'selected.npy'), ((1, 1), [2]))
+
+    def test_unfinished_export_is_truncated(self):
+        quiz = self.make_quiz(questions=1)
+        self.submit_answers('first', quiz, 'A')
+        export_snapshot(self.directory)
+        # Rows written by an export that died before saving the manifest
+        NpyColumn(os.path.join(self.directory, 'submissions', 'id.npy'), INT64).append_values([12345])
+        self.submit_answers('second', quiz, 'B')
+        self.assertEqual(export_snapshot(self.directory), 1)
+        shape, ids = self.read_npy('submissions', 'id.npy')
+        self.assertEqual(shape, (2,))
+        self.assertNotIn(12345, ids)
+        self.assertEqual(self.read_npy('answers', str(quiz.pk), 'selected.npy'), ((2, 1), [1, 2]))
+
+
+class QuizSearchTests(QuizTestCase):
+    def search(self, user, text):
+        response = self.client_for(user).get('/api/quizzes/search/', {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [quiz['title'] for quiz in response.json()['results']]
+
+    def test_terms_match_as_prefixes_and_titles_rank_first(self):
+        self.make_quiz(questions=0, title='Cell biology', description='Photosynthesis and respiration')
+        self.make_quiz(questions=0, title='Photosynthesis basics')
+        self.make_quiz(questions=0, title='Algebra')
+        self.assertEqual(self.search(self.student, 'photo'), ['Photosynthesis basics', 'Cell biology'])
+        self.assertEqual(self.search(self.student, 'photo resp'), ['Cell biology'])
+        self.assertEqual(self.search(self.student, 'geometry'), [])
+
+    def test_students_only_match_active_quizzes_and_questions(self):
+        hidden = self.make_quiz(questions=0, title='Hidden chemistry', is_active=False)
+        visible = self.make_quiz(questions=0, title='Visible')
+        self.make_question(visible, question_text='Which element is a noble gas?', is_active=False)
+        self.make_question(hidden, question_text='Which element is a halogen?')
+        self.assertEqual(self.search(self.student, 'chemistry'), [])
+        self.assertEqual(self.search(self.student, 'element'), [])
+        self.assertEqual(self.search(self.admin, 'chemistry'), ['Hidden chemistry'])
+        self.assertEqual(sorted(self.search(self.admin, 'element')), ['Hidden chemistry', 'Visible'])
+
+        question = visible.questions.get()
+        question.is_active = True
+        question.save()
+        self.assertEqual(self.search(self.student, 'noble'), ['Visible'])
+
+    def test_edits_and_deletes_are_reindexed(self):
+        quiz = self.make_quiz(questions=0, title='Geography')
+        quiz.title = 'History'
+        quiz.save()
+        self.assertEqual(self.search(self.student, 'geography'), [])
+        self.assertEqual(self.search(self.student, 'hist'), ['History'])
+        quiz.delete()
+        self.assertEqual(self.search(self.student, 'history'), [])
+
+    def test_fts_syntax_in_input_is_quoted(self):
+        self.make_quiz(questions=0, title='NEAR misses and OR gates')
+        for text in ('"NEAR(', 'NEAR(near', 'OR', 'title:near', '*', "') OR 1=1 --", '^near', 'a"b'):
+            self.search(self.student, text)
+        self.assertEqual(self.search(self.student, '"NEAR('), ['NEAR misses and OR gates'])
+        self.assertEqual(self.client_for(self.student).get('/api/quizzes/search/', {'q': ' '}).status_code, 400)
+
+
+class SubmissionExportTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        first, second = self.make_quiz(questions=3), self.make_quiz(questions=2, title='Second')
+        # Row and packed submissions interleaved by id, across two quizzes
+        self.submit(self.student, first, self.correct_answers(first))
+        with override_settings(QUIZ_ANSWER_STORAGE=QuizSubmission.PACKED):
+            self.submit(self.make_student('packed'), first, {**self.correct_answers(first), min(self.correct_answers(first)): 'D'})
+        self.submit(self.make_student('rows'), second, dict.fromkeys(self.correct_answers(second), 'B'))
+        with override_settings(QUIZ_ANSWER_STORAGE=QuizSubmission.PACKED):
+            self.submit(self.make_student('packed-2'), second, dict.fromkeys(self.correct_answers(second), 'A'))
+
+    def export(self, file_type, **params):
+        response = self.client_for(self.admin).get('/api/all-submissions/export/', {'file_type': file_type, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def expected(self):
+        """
+        {submission id: (API representation, {(question, selected, is_correct), ...})}
+        """
+        return {
+            data['id']: (data, {(answer['question'], answer['selected_answer'], answer['is_correct']) for answer in data['answers']})
+            for data in QuizSubmissionSerializer(QuizSubmission.objects.order_by('id'), many=True).data
+        }
+
+    def test_ndjson_groups_answers_of_both_storage_modes(self):
+        expected = self.expected()
+        lines = [json.loads(line) for line in self.export('ndjson', answers='1').splitlines()]
+        self.assertEqual([line['submission_id'] for line in lines], sorted(expected))
+        for line in lines:
+            data, answers = expected[line['submission_id']]
+            self.assertEqual((line['username'], line['score'], line['submitted_at']), (data['user'].split(' ')[0], data['score'], data['submitted_at']))
+            self.assertEqual({(answer['question_id'], answer['selected_answer'], answer['is_correct']) for answer in line['answers']}, answers)
+
+        plain = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual([line['submission_id'] for line in plain], sorted(expected))
+        self.assertNotIn('answers', plain[0])
+
+    def test_csv_has_one_row_per_answer(self):
+        expected = self.expected()
+        rows = list(csv.DictReader(StringIO(self.export('csv', answers='1'))))
+        self.assertEqual(len(rows), sum(len(answers) for _, answers in expected.values()))
+        submission_ids = [int(row['submission_id']) for row in rows]
+        self.assertEqual(submission_ids, sorted(submission_ids))
+        for submission_id, (data, answers) in expected.items():
+            exported = [row for row in rows if int(row['submission_id']) == submission_id]
+            self.assertEqual({row['submitted_at'] for row in exported}, {data['submitted_at']})
+            self.assertTrue(data['submitted_at'].endswith('Z'))
+            self.assertEqual(
+                {(int(row['question_id']), row['selected_answer'], row['is_correct'] == 'True') for row in exported},
+                answers
+            )
+
+        quiz_rows = list(csv.DictReader(StringIO(self.export('csv', quiz=str(rows[-1]['quiz_id'])))))
+        self.assertEqual(len(quiz_rows), 2)
+        self.assertNotIn('question_id', quiz_rows[0])
+
+
+class CursorPaginationTests(QuizTestCase):
+    def walk(self, user, url, page_size=2):
+        """
+        Follow next links through every page, then previous links back - returns the ids of both walks
+        """
+        client = self.client_for(user)
+        forward, pages = [], []
+        response = client.get(url, {'page_size': page_size}).json()
+        while True:
+            pages.append(response)
+            forward += [item['id'] for item in response['results']]
+            if response['next'] is None:
+                break
+            self.assertLessEqual(len(response['results']), page_size)
+            response = client.get(response['next']).json()
+        self.assertGreaterEqual(len(pages), 2)
+        self.assertIsNone(pages[0]['previous'])
+
+        backward = [item['id'] for item in pages[-1]['results']]
+        while response['previous'] is not None:
+            response = client.get(response['previous']).json()
+            backward = [item['id'] for item in response['results']] + backward
+        return forward, backward
+
+    def test_categories(self):
+        for name in ('Zoology', 'Art', 'Music', 'History'):
+            Category.objects.create(name=name, created_by=self.admin)
+        expected = list(Category.objects.order_by('name').values_list('id', flat=True))
+        self.assertEqual(self.walk(self.student, '/api/categories/'), (expected, expected))
+
+    def test_quizzes_with_tied_timestamps(self):
+        for number in range(5):
+            self.make_quiz(questions=0, title=f'Quiz {number}')
+        # Three quizzes created in the same instant straddle a page boundary
+        tied = list(Quiz.objects.order_by('id').values_list('id', flat=True)[1:4])
+        Quiz.objects.filter(pk__in=tied).update(created_at=Quiz.objects.get(pk=tied[0]).created_at)
+        expected = list(Quiz.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(self.student, '/api/quizzes/'), (expected, expected))
+
+    def test_submissions(self):
+        quizzes = [self.make_quiz(questions=1, title=f'Quiz {number}') for number in range(3)]
+        for quiz in quizzes:
+            self.submit(self.student, quiz, self.correct_answers(quiz))
+        self.submit(self.make_student('other'), quizzes[0], self.correct_answers(quizzes[0]))
+        mine = list(QuizSubmission.objects.filter(user=self.student).order_by('-submitted_at', '-id').values_list('id', flat=True))
+        everyone = list(QuizSubmission.objects.order_by('-submitted_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(self.student, '/api/my-submissions/'), (mine, mine))
+        self.assertEqual(self.walk(self.admin, '/api/all-submissions/', page_size=3), (everyone, everyone))
+
+
+class QuestionPoolTests(QuizTestCase):
+    def draws(self, question_ids, pool_size=10, users=200):
+        return {
+            user_id: draw_question_ids(question_ids, pool_size, draw_seed(1, user_id))
+            for user_id in range(users)
+        }
+
+    def test_draw_is_stable_and_sized(self):
+        ids = list(range(1, 101))
+        first = draw_question_ids(ids, 10, draw_seed(1, 7))
+        self.assertEqual(len(set(first)), 10)
+        self.assertEqual(first, draw_question_ids(list(reversed(ids)), 10, draw_seed(1, 7)))
+        self.assertEqual(draw_question_ids(ids[:5], 10, draw_seed(1, 7)), ids[:5])
+
+    def test_adding_question_only_changes_draws_containing_it(self):
+        ids = list(range(1, 101))
+        before = self.draws(ids)
+        after = self.draws(ids + [101])
+        changed = [user_id for user_id in before if before[user_id] != after[user_id]]
+        self.assertTrue(changed)
+        self.assertLess(len(changed), len(before) // 2)
+        for user_id in changed:
+            self.assertIn(101, after[user_id])
+
+    def test_removing_question_only_changes_draws_containing_it(self):
+        ids = list(range(1, 101))
+        before = self.draws(ids)
+        after = self.draws([question_id for question_id in ids if question_id != 50])
+        for user_id in before:
+            if 50 not in before[user_id]:
+                self.assertEqual(before[user_id], after[user_id])
+
+    def test_submit_after_unrelated_question_added(self):
+        quiz = self.make_quiz(questions=20, pool_size=5)
+        client = self.client_for(self.student)
+        drawn = [question['id'] for question in client.get(f'/api/quizzes/{quiz.pk}/').json()['questions']]
+        self.assertEqual(len(drawn), 5)
+        # Add questions until one lands outside this student's draw
+        while True:
+            question = self.make_question(quiz)
+            quiz.refresh_from_db()
+            if question.id not in load_answer_key(quiz, self.student.id):
+                break
+        response = client.post(f'/api/quizzes/{quiz.pk}/submit/', {
+            'answers': [{'question_id': question_id, 'selected_answer': 'A'} for question_id in drawn]
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_questions'], 5)
+
+    def test_payload_matches_graded_draw(self):
+        quiz = self.make_quiz(questions=12, pool_size=4)
+        client = self.client_for(self.student)
+        served = [question['id'] for question in client.get(f'/api/quizzes/{quiz.pk}/').json()['questions']]
+        self.assertEqual(sorted(served), sorted(load_answer_key(quiz, self.student.id)))
+
+
+class StudentPayloadTests(QuizTestCase):
+    def question_ids(self, response):
+        return [question['id'] for question in response.json()['questions']]
+
+    def test_payload_rerenders_after_stale_save(self):
+        quiz = self.make_quiz(questions=2)
+        stale = Quiz.objects.get(pk=quiz.pk)
+        client = self.client_for(self.student)
+        self.assertEqual(len(self.question_ids(client.get(f'/api/quizzes/{quiz.pk}/'))), 2)
+        self.make_question(quiz)
+        stale.title = 'Renamed'
+        stale.save()
+        response = client.get(f'/api/quizzes/{quiz.pk}/')
+        self.assertEqual(response.json()['title'], 'Renamed')
+        self.assertEqual(len(self.question_ids(response)), 3)
+
+    def test_pooled_payload_survives_unrelated_question(self):
+        quiz = self.make_quiz(questions=20, pool_size=5)
+        client = self.client_for(self.student)
+        drawn = self.question_ids(client.get(f'/api/quizzes/{quiz.pk}/'))
+        self.assertEqual(drawn, self.question_ids(client.get(f'/api/quizzes/{quiz.pk}/')))
+        while True:
+            question = self.make_question(quiz)
+            quiz.refresh_from_db()
+            if question.id not in load_answer_key(quiz, self.student.id):
+                break
+        self.assertEqual(drawn, self.question_ids(client.get(f'/api/quizzes/{quiz.pk}/')))
+
+
+class AttemptDraftTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        drafts.clear()
+        self.quiz = self.make_quiz(questions=4, time_limit_minutes=10)
+        self.question_ids = list(self.quiz.questions.order_by('id').values_list('id', flat=True))
+        self.client = self.client_for(self.student)
+        self.attempt_id = self.client.post(f'/api/quizzes/{self.quiz.pk}/attempts/').json()['id']
+
+    def tearDown(self):
+        drafts.clear()
+        super().tearDown()
+
+    def answers(self, *pairs):
+        return {'answers': [{'question_id': question_id, 'selected_answer': selected} for question_id, selected in pairs]}
+
+    def stored_answers(self):
+        return decode_answers(AttemptSession.objects.get(pk=self.attempt_id).draft_answers)
+
+    def test_flushes_from_two_workers_merge(self):
+        first, second, third, fourth = self.question_ids
+        worker_b = DraftStore(100, 0)
+        with patch('quiz_app.attempts.drafts', worker_b):
+            # Worker B caches the empty draft before worker A saves anything
+            self.assertEqual(get_draft(self.attempt_id, self.student.id).answers, {})
+
+        self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers((first, 'A'), (second, 'B'), (third, 'C')), format='json')
+        drafts.flush()
+        with patch('quiz_app.attempts.drafts', worker_b):
+            self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers((fourth, 'D')), format='json')
+            worker_b.flush()
+        self.assertEqual(self.stored_answers(), {first: 'A', second: 'B', third: 'C', fourth: 'D'})
+
+    def test_stale_worker_reloads_flushed_answers(self):
+        first = self.question_ids[0]
+        worker_b = DraftStore(100, 0)
+        with patch('quiz_app.attempts.drafts', worker_b):
+            get_draft(self.attempt_id, self.student.id)
+        self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers((first, 'C')), format='json')
+        drafts.flush()
+        with patch('quiz_app.attempts.drafts', worker_b):
+            response = self.client.get(f'/api/attempts/{self.attempt_id}/')
+        self.assertEqual(response.json()['answers'], [{'question_id': first, 'selected_answer': 'C'}])
+
+    def test_finalize_on_other_worker_grades_flushed_answers(self):
+        worker_b = DraftStore(100, 0)
+        with patch('quiz_app.attempts.drafts', worker_b):
+            get_draft(self.attempt_id, self.student.id)
+        self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers(*[(question_id, 'A') for question_id in self.question_ids]), format='json')
+        drafts.flush()
+        with patch('quiz_app.attempts.drafts', worker_b):
+            response = self.client.post(f'/api/attempts/{self.attempt_id}/finalize/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_questions'], 4)
+        # Questions alternate A, B, C, D as the correct answer
+        self.assertEqual(response.json()['score'], 1)
+
+    def test_finalize_flushes_pending_answers_first(self):
+        self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers(*[(question_id, 'B') for question_id in self.question_ids]), format='json')
+        self.assertEqual(self.stored_answers(), {})
+        response = self.client.post(f'/api/attempts/{self.attempt_id}/finalize/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['score'], 1)
+        attempt = AttemptSession.objects.get(pk=self.attempt_id)
+        self.assertEqual(attempt.status, AttemptSession.SUBMITTED)
+        self.assertEqual(len(attempt.draft_answers), 4)
+
+    def test_closed_attempt_rejects_saves_on_stale_worker(self):
+        worker_b = DraftStore(100, 0)
+        with patch('quiz_app.attempts.drafts', worker_b):
+            get_draft(self.attempt_id, self.student.id)
+        self.client.post(f'/api/attempts/{self.attempt_id}/finalize/', self.answers(*[(question_id, 'A') for question_id in self.question_ids]), format='json')
+        with patch('quiz_app.attempts.drafts', worker_b):
+            response = self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers((self.question_ids[0], 'D')), format='json')
+        self.assertEqual(response.status_code, 409)
+
+
+    def test_autosave_rejects_questions_outside_the_attempt(self):
+        other = self.make_quiz(questions=1, title='Other')
+        inactive = self.make_question(self.quiz, is_active=False)
+        for question_id in (999999, other.questions.get().pk, inactive.pk):
+            response = self.client.patch(
+                f'/api/attempts/{self.attempt_id}/', self.answers((question_id, 'A')), format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        response = self.client.patch(
+            f'/api/attempts/{self.attempt_id}/', {'answers': [{'question_id': 'abc', 'selected_answer': 'A'}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f'/api/attempts/{self.attempt_id}/').json()['answers'], [])
+
+    def test_finalize_ignores_answers_to_deactivated_questions(self):
+        self.client.patch(f'/api/attempts/{self.attempt_id}/', self.answers(*[(question_id, 'A') for question_id in self.question_ids]), format='json')
+        question = Question.objects.get(pk=self.question_ids[0])
+        question.is_active = False
+        question.save()
+        response = self.client.post(f'/api/attempts/{self.attempt_id}/finalize/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['score'], response.json()['total_questions']), (0, 3))
+
+class AttemptTimedFlushTests(TransactionTestCase):
+    def test_pending_answers_flush_without_further_saves(self):
+        user = User.objects.create_user(username='timed', password='pass12345')
+        category = Category.objects.create(name='Timed', created_by=user)
+        quiz = Quiz.objects.create(title='Timed', description='', category=category, created_by=user)
+        attempt = AttemptSession.objects.create(user=user, quiz=quiz)
+        store = DraftStore(100, 0.05)
+        draft = Draft(attempt)
+        store.add(draft)
+        store.mark_dirty(draft, {1: 'A'})
+        timer = store._timer
+        self.assertIsNotNone(timer)
+        timer.join(5)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.draft_answers, {'1': 'A'})
+        self.assertEqual(attempt.draft_version, 1)
+        self.assertEqual(draft.pending, {})
+        self.assertIsNone(store._timer)
+
+
+class SubmissionQueueTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = self.make_quiz(questions=2)
+        self.selections = {question_id: 'A' for question_id in self.quiz.questions.values_list('id', flat=True)}
+        self.students = [User.objects.create_user(username=f'queued{number}', password='pass12345') for number in range(4)]
+        for student in self.students:
+            enqueue_submission(student, self.quiz, self.selections)
+
+    def statuses(self):
+        return list(PendingSubmission.objects.order_by('id').values_list('status', flat=True))
+
+    def test_workers_claim_disjoint_batches(self):
+        first = next_batch(3)
+        second = next_batch(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({pending.pk for pending in first} & {pending.pk for pending in second})
+        self.assertEqual(next_batch(3), [])
+
+    def test_claimed_entries_are_not_regraded(self):
+        batch = next_batch(10)
+        self.assertEqual(process_batch(batch), (4, 0))
+        self.assertEqual(next_batch(10), [])
+        self.assertEqual(PendingSubmission.objects.filter(submission__isnull=False).count(), 4)
+
+    def test_broken_entry_fails_alone(self):
+        broken = self.students[1]
+
+        def create(user, *args):
+            if user.pk == broken.pk:
+                raise ValueError("broken entry")
+            return create_submission(user, *args)
+
+        with patch('quiz_app.ingestion.create_submission', create):
+            self.assertEqual(process_batch(next_batch(10)), (3, 1))
+        failed = PendingSubmission.objects.get(status=PendingSubmission.FAILED)
+        self.assertEqual(failed.user_id, broken.pk)
+        self.assertIn("broken entry", failed.error)
+        self.assertIsNone(failed.submission)
+
+    def test_operational_error_releases_batch(self):
+        with patch('quiz_app.ingestion.create_submission', side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                process_batch(next_batch(10))
+        self.assertEqual(self.statuses(), [PendingSubmission.QUEUED] * 4)
+        self.assertFalse(QuizSubmission.objects.exists())
+
+    def test_worker_retries_after_operational_error(self):
+        calls = []
+
+        def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                release_claims(batch)
+                raise OperationalError("database is locked")
+            return process_batch(batch)
+
+        with patch('quiz_app.management.commands.process_submissions.process_batch', flaky), \
+                patch('quiz_app.management.commands.process_submissions.time.sleep'):
+            call_command('process_submissions', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(calls, [4, 4])
+        self.assertEqual(self.statuses(), [PendingSubmission.PROCESSED] * 4)
+
+    def test_abandoned_claims_are_requeued(self):
+        next_batch(10)
+        self.assertEqual(next_batch(10), [])
+        PendingSubmission.objects.update(claimed_at=timezone.now() - timedelta(seconds=600))
+        self.assertEqual(len(next_batch(10, claim_timeout=300)), 4)
+
+
+class ProgressRebuildTests(QuizTestCase):
+    def submit(self, user, quiz):
+        answer_key = load_answer_key(quiz, user.id)
+        return create_submission(user, quiz, answer_key, {question_id: 'A' for question_id in answer_key})
+
+    def quiz_with_submissions(self, count):
+        quiz = self.make_quiz(questions=2)
+        for number in range(count):
+            user = User.objects.create_user(username=f'taker{quiz.pk}-{number}', password='pass12345')
+            self.submit(user, quiz)
+        return quiz
+
+    def delete_queries(self, quiz):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            quiz.delete()
+        return len(queries)
+
+    def test_quiz_delete_rebuilds_once(self):
+        small = self.delete_queries(self.quiz_with_submissions(3))
+        large = self.delete_queries(self.quiz_with_submissions(26))
+        self.assertEqual(small, large)
+
+    def test_quiz_delete_updates_progress(self):
+        kept, deleted = self.make_quiz(questions=2, title='Kept'), self.make_quiz(questions=2, title='Deleted')
+        self.submit(self.student, kept)
+        self.submit(self.student, deleted)
+        self.assertEqual(UserProgress.objects.get(user=self.student).quizzes_taken, 2)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            deleted.delete()
+        self.assertEqual(len([callback for callback in callbacks if callback.rebuild is rebuild_user_progress]), 1)
+        self.assertEqual(UserProgress.objects.get(user=self.student).quizzes_taken, 1)
+
+
+class QuestionImportTests(QuizTestCase):
+    HEADER = 'question_text,option_a,option_b,option_c,option_d,correct_answer\n'
+
+    def upload(self, name, content):
+        quiz = self.make_quiz(questions=0)
+        response = self.client_for(self.admin).post(
+            f'/api/quizzes/{quiz.pk}/questions/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+        return quiz, response
+
+    def csv_rows(self, count):
+        return ''.join(f'Imported question number {number}?,a,b,c,d,B\n' for number in range(count))
+
+    def test_csv_import_reports_invalid_rows(self):
+        content = self.HEADER + self.csv_rows(3) + 'Missing answer?,a,b,c,d,\n'
+        quiz, response = self.upload('questions.csv', content.encode())
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['created'], report['failed'], report['read_error']), (3, 1, None))
+        self.assertEqual(report['errors'][0]['row'], 5)
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.active_question_count, 3)
+
+    def test_unreadable_file_reports_committed_rows(self):
+        content = (self.HEADER + self.csv_rows(600)).encode() + b'Broken \xff line?,a,b,c,d,A\n' + self.csv_rows(5).encode()
+        quiz, response = self.upload('questions.csv', content)
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual(report['created'], 600)
+        self.assertEqual(report['read_error']['row'], 602)
+        self.assertIn("Could not read file", report['read_error']['detail'])
+        self.assertEqual(Question.objects.filter(quiz=quiz).count(), 600)
+
+    def test_unreadable_file_without_rows_is_rejected(self):
+        quiz, response = self.upload('questions.ndjson', b'\xff\xfe{}\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], 0)
+        self.assertEqual(response.json()['read_error']['row'], 1)
+
+
+@override_settings(QUIZ_REPLICA_MAX_LAG=60)
+class ReplicaRoutingTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.routed = []
+        self.synced_at = time.time()
+        replica_state.checked_at = None
+        patches = [
+            patch('quiz_app.middleware.replica_configured', return_value=True),
+            patch('quiz_app.routers.replica_synced_at', side_effect=lambda: self.synced_at),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.middleware = ReplicaRoutingMiddleware(self.view)
+
+    def view(self, request):
+        self.routed.append(routers._read_from_replica.get())
+        return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+    def request(self, method, user=None):
+        headers = {}
+        if user is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {QuizRefreshToken.for_user(user).access_token}'
+        return getattr(self.factory, method)('/api/quizzes/', **headers)
+
+    def reads_replica(self, user=None):
+        replica_state.checked_at = None
+        self.middleware(self.request('get', user))
+        return self.routed[-1]
+
+    def test_fresh_replica_serves_reads(self):
+        self.assertTrue(self.reads_replica())
+        self.assertTrue(self.reads_replica(self.student))
+
+    def test_lagging_or_unknown_replica_is_not_used(self):
+        self.synced_at = time.time() - 120
+        self.assertFalse(self.reads_replica(self.student))
+        self.synced_at = None
+        self.assertFalse(self.reads_replica(self.student))
+
+    def test_writer_reads_primary_until_replica_catches_up(self):
+        self.middleware(self.request('post', self.student))
+        self.assertFalse(self.routed[-1])
+        # No cookie involved - the pin follows the user's token
+        self.assertFalse(self.reads_replica(self.student))
+        self.assertTrue(self.reads_replica(self.admin))
+        self.synced_at = time.time() + 1
+        self.assertTrue(self.reads_replica(self.student))
+
+    def test_async_requests_are_routed_without_sync_adapter(self):
+        async def view(request):
+            return self.view(request)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(self.request('post', self.student))
+        replica_state.checked_at = None
+        async_to_sync(middleware)(self.request('get', self.student))
+        async_to_sync(middleware)(self.request('get', self.admin))
+        self.assertEqual(self.routed, [False, False, True])
+
+
+@override_settings(QUIZ_REQUEST_METRICS=True)
+class RequestMetricsTests(QuizTestCase):
+    def test_async_chain_needs_no_adapter(self):
+        handler = ASGIHandler.__new__(ASGIHandler)
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler.load_middleware(is_async=True)
+
+    def test_async_view_queries_are_counted(self):
+        self.make_quiz(questions=2)
+        token = QuizRefreshToken.for_user(self.student).access_token
+        with self.assertLogs('quiz_app.metrics', 'INFO'):
+            response = async_to_sync(AsyncClient().get)('/api/async/quizzes/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_sync_view_is_timed(self):
+        with self.assertLogs('quiz_app.metrics', 'INFO') as logs:
+            response = self.client_for(self.student).get('/api/quizzes/')
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertIn('"route": "GET /api/quizzes/"', logs.output[0])
+
+    def test_benchmark_counts_queries_run_on_other_threads(self):
+        class OffThreadRequest:
+            def send(self):
+                # Like async_views.login on the password hashing pool
+                count = sync_to_async(PendingSubmission.objects.count, thread_sensitive=False)
+                return HttpResponse(str(async_to_sync(count)()))
+
+        stats = run_case(None, lambda ctx: OffThreadRequest(), iterations=2)
+        self.assertEqual((stats['queries_p50'], stats['queries_max']), (1, 1))
+
+    def serialize_ms(self, response):
+        return float(re.search(r'serialize;dur=([\d.]+)', response['Server-Timing']).group(1))
+
+    def test_serialization_is_timed_apart_from_the_view(self):
+        quiz = self.make_quiz(questions=30)
+        with self.assertLogs('quiz_app.metrics', 'INFO') as logs:
+            detail = self.client_for(self.admin).get(f'/api/quizzes/{quiz.pk}/')
+            listing = self.client_for(self.student).get('/api/quizzes/')
+        for response in (detail, listing):
+            self.assertGreater(self.serialize_ms(response), 0)
+            view_ms = float(re.search(r'view;dur=([\d.]+)', response['Server-Timing']).group(1))
+            self.assertLessEqual(self.serialize_ms(response), view_ms)
+        self.assertIn('"serialize_ms": ', logs.output[0])
+
+    def test_serializers_outside_requests_are_not_timed(self):
+        with self.assertLogs('quiz_app.metrics', 'INFO'):
+            self.client_for(self.student).get('/api/quizzes/')
+        self.assertEqual(CategorySerializer(self.category).data['name'], 'General')
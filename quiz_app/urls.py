@@ -9,15 +9,30 @@ urlpatterns = [
     
     # Quiz URLs
     path('quizzes/', views.QuizListCreateView.as_view(), name='quiz-list-create'),
+    path('quizzes/search/', views.search_quizzes, name='quiz-search'),
     path('quizzes/<int:pk>/', views.QuizRetrieveUpdateDestroyView.as_view(), name='quiz-detail'),
     
     # Question URLs
     path('quizzes/<int:quiz_id>/questions/', views.QuestionListCreateView.as_view(), name='question-list-create'),
+    path('quizzes/<int:quiz_id>/questions/import/', views.import_questions_view, name='question-import'),
     path('questions/<int:pk>/', views.QuestionRetrieveUpdateDestroyView.as_view(), name='question-detail'),
     
     # Quiz Submission URLs
     path('quizzes/<int:quiz_id>/submit/', views.submit_quiz, name='submit-quiz'),
+    path('quizzes/<int:quiz_id>/leaderboard/', views.quiz_leaderboard, name='quiz-leaderboard'),
+    path('quizzes/<int:quiz_id>/analytics/', views.quiz_analytics, name='quiz-analytics'),
     path('my-submissions/', views.UserSubmissionsView.as_view(), name='user-submissions'),
+    path('me/stats/', views.my_stats, name='my-stats'),
     path('all-submissions/', views.AllSubmissionsView.as_view(), name='all-submissions'),
+    path('all-submissions/export/', views.export_submissions_view, name='submission-export'),
     path('submissions/<int:pk>/', views.SubmissionDetailView.as_view(), name='submission-detail'),
+    path('submissions/pending/<int:pk>/', views.PendingSubmissionDetailView.as_view(), name='pending-submission-detail'),
+
+    # Attempt Session URLs
+    path('quizzes/<int:quiz_id>/attempts/', views.start_attempt_view, name='attempt-start'),
+    path('attempts/<int:pk>/', views.attempt_detail, name='attempt-detail'),
+    path('attempts/<int:pk>/finalize/', views.finalize_attempt, name='attempt-finalize'),
+
+    # Instrumentation
+    path('metrics/', views.request_metrics, name='request-metrics'),
 ]
\ No newline at end of file
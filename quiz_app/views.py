@@ -3,26 +3,52 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
+from django.conf import settings
 from django.db import transaction
-from .models import Category, Quiz, Question, QuizSubmission, SubmissionAnswer
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import parse_etags
+from users.authentication import resolve_user
+from .models import (
+    Category, Quiz, Question, QuizSubmission, PendingSubmission, AttemptSession,
+    UserProgress
+)
 from .serializers import (
     CategorySerializer, QuizSerializer, QuizListSerializer, QuestionSerializer,
-    QuizSubmissionSerializer, QuizAttemptSerializer
+    QuizSubmissionSerializer, QuizAttemptSerializer, LeaderboardEntrySerializer,
+    PendingSubmissionSerializer, AttemptSessionSerializer, UserProgressSerializer
 )
 from .permissions import IsAdminUser, IsAdminOrReadOnly, IsOwnerOrAdmin
+from .analytics import item_statistics
+from .attempts import AttemptClosed, close_attempt, flush_draft, get_draft, save_draft, start_attempt
+from .metrics import registry as metrics_registry
+from .exporter import EXPORT_FORMATS, export_submissions
+from .ingestion import AlreadySubmitted, enqueue_submission
+from .importer import detect_file_type, import_questions, iter_upload_rows
+from .leaderboard import leaderboard_size, top_entries
+from .search import search_quiz_ids
+from .similarity import similar_questions
+from .projections import CategoryProjection, ProjectedListMixin, QuizListProjection, SubmissionProjection
+from .payloads import student_payload
+from .pagination import CategoryPagination, QuizPagination, SubmissionPagination
+from .grading import (
+    collect_selections, load_answer_key, create_submission, prefetch_submission_answers
+)
 
 # Category Views
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(ProjectedListMixin, generics.ListCreateAPIView):
     """
     List all categories or create a new category (admin only)
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    projection_class = CategoryProjection
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = CategoryPagination
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=resolve_user(self.request.user))
 
 class CategoryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -33,21 +59,41 @@ class CategoryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminOrReadOnly]
 
 # Quiz Views
-class QuizListCreateView(generics.ListCreateAPIView):
+def quiz_etag(quiz_id, version, user, pooled=False):
+    # Admins and students get different payloads (correct answers are hidden from students),
+    # and every student of a pooled quiz sees their own draw
+    if user.is_admin:
+        variant = 'admin'
+    else:
+        variant = f'student-{user.id}' if pooled else 'student'
+    return f'"quiz-{quiz_id}-v{version}-{variant}"'
+
+def etag_matches(request, etag):
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+def set_etag(response, etag):
+    response['ETag'] = etag
+    response['Vary'] = 'Authorization'
+    return response
+
+class QuizListCreateView(ProjectedListMixin, generics.ListCreateAPIView):
     """
     List all quizzes or create a new quiz
     Normal users see only active quizzes, admins see all
     """
     serializer_class = QuizListSerializer
+    projection_class = QuizListProjection
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = QuizPagination
 
     def get_queryset(self):
         if self.request.user.is_admin:
-            return Quiz.objects.all().select_related('category', 'created_by')
-        return Quiz.objects.filter(is_active=True).select_related('category', 'created_by')
+            return Quiz.objects.all()
+        return Quiz.objects.filter(is_active=True)
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=resolve_user(self.request.user))
 
 class QuizRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -60,7 +106,36 @@ class QuizRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         if self.request.user.is_admin:
             return Quiz.objects.all().prefetch_related('questions')
-        return Quiz.objects.filter(is_active=True).prefetch_related('questions__quiz')
+        return Quiz.objects.filter(is_active=True).prefetch_related('questions')
+
+    def get_version(self):
+        """
+        (version, pool_size, created_at) of the quiz, without loading any questions
+        Returns None when the quiz isn't visible to the user
+        """
+        quizzes = Quiz.objects.all() if self.request.user.is_admin else Quiz.objects.filter(is_active=True)
+        return quizzes.filter(pk=self.kwargs['pk']).values_list('version', 'pool_size', 'created_at').first()
+
+    def retrieve(self, request, *args, **kwargs):
+        # The version is read before the quiz is serialized, so the ETag can only
+        # be older than the payload it's attached to - never newer
+        row = self.get_version()
+        etag = None
+        if row is not None:
+            version, pool_size, created_at = row
+            etag = quiz_etag(self.kwargs['pk'], version, request.user, pooled=bool(pool_size))
+            if etag_matches(request, etag):
+                return set_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+            if not request.user.is_admin:
+                # Students get the payload pre-rendered for this version
+                content = student_payload(self.kwargs['pk'], version, created_at, request.user.id)
+                if content is not None:
+                    return set_etag(HttpResponse(content, content_type='application/json'), etag)
+
+        response = super().retrieve(request, *args, **kwargs)
+        if etag is not None:
+            set_etag(response, etag)
+        return response
 
     def update(self, request, *args, **kwargs):
         # Only admin users can update quizzes
@@ -97,8 +172,46 @@ class QuestionListCreateView(generics.ListCreateAPIView):
         quiz = get_object_or_404(Quiz, id=quiz_id)
         serializer.save(quiz=quiz)
 
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # Warn about near-duplicates already in the bank - the question is still created
+        response.data['similar_questions'] = similar_questions(
+            response.data['question_text'], exclude_id=response.data['id']
+        )
+        return response
+
     
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_questions_view(request, quiz_id):
+    """
+    Bulk import questions into a quiz from a CSV or NDJSON file (admin only)
+    The file is uploaded as multipart field 'file' and processed as a stream
+    """
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {"detail": "Upload the questions as a 'file' field."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    file_type = detect_file_type(upload, request.data.get('file_type'))
+    if file_type is None:
+        return Response(
+            {"detail": "File must be CSV or NDJSON."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # An unreadable file still reports the rows imported before the broken line
+    report = import_questions(quiz, iter_upload_rows(upload, file_type))
+    return Response(
+        report,
+        status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+    )
+
 class QuestionRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a question (admin only)
@@ -114,6 +227,7 @@ def submit_quiz(request, quiz_id):
     """
     Submit answers for a quiz
     Calculates score automatically and prevents duplicate submissions
+    With QUIZ_ASYNC_SUBMISSIONS on, the attempt is queued and 202 is returned with a status URL
     """
     # Check if user is admin - admins shouldn't submit quizzes
     if request.user.is_admin:
@@ -124,9 +238,16 @@ def submit_quiz(request, quiz_id):
 
     # Get the quiz
     quiz = get_object_or_404(Quiz, id=quiz_id, is_active=True)
-    
-    # Check if user has already submitted this quiz
-    if QuizSubmission.objects.filter(user=request.user, quiz=quiz).exists():
+
+    # Timed quizzes are only taken through attempt sessions, which enforce the deadline
+    if quiz.time_limit_minutes:
+        return Response(
+            {"detail": "This quiz is timed. Start an attempt and finalize it instead."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Check if user has already submitted (or queued) this quiz
+    if already_submitted(request.user.id, quiz):
         return Response(
             {"detail": "You have already submitted this quiz."},
             status=status.HTTP_400_BAD_REQUEST
@@ -137,77 +258,335 @@ def submit_quiz(request, quiz_id):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    answers_data = serializer.validated_data['answers']
-    
-    # Get active questions for this quiz
-    questions = quiz.questions.filter(is_active=True)
-    question_ids = list(questions.values_list('id', flat=True))
-    
+    return submit_selections(request, quiz, collect_selections(serializer.validated_data['answers']))
+
+def already_submitted(user_id, quiz):
+    already_queued = PendingSubmission.objects.filter(
+        user_id=user_id, quiz=quiz
+    ).exclude(status=PendingSubmission.FAILED)
+    return QuizSubmission.objects.filter(user_id=user_id, quiz=quiz).exists() or already_queued.exists()
+
+def submit_selections(request, quiz, selections):
+    """
+    Check that every question is answered, then grade the selections (or queue them)
+    Shared by submit_quiz and attempt finalization
+    """
+    # Answer key for active questions (the user's draw for pooled quizzes), from the versioned cache
+    answer_key = load_answer_key(quiz, request.user.id)
+
     # Validate that all questions are answered
-    submitted_question_ids = [int(ans['question_id']) for ans in answers_data]
-    if set(submitted_question_ids) != set(question_ids):
+    if set(selections) != set(answer_key):
         return Response(
             {"detail": "You must answer all questions."},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Process submission
-    try:
-        with transaction.atomic():
-            # Create quiz submission
-            submission = QuizSubmission.objects.create(
-                user=request.user,
-                quiz=quiz,
-                total_questions=len(questions)
-            )
-            
-            correct_answers = 0
-            
-            # Create individual answers
-            for answer_data in answers_data:
-                question = get_object_or_404(Question, id=answer_data['question_id'])
-                
-                submission_answer = SubmissionAnswer.objects.create(
-                    submission=submission,
-                    question=question,
-                    selected_answer=answer_data['selected_answer']
-                )
-                
-                if submission_answer.is_correct:
-                    correct_answers += 1
-            
-            # Update submission score
-            submission.score = correct_answers
-            submission.save()
-            
+    # Queue the attempt for the grading worker
+    if getattr(settings, 'QUIZ_ASYNC_SUBMISSIONS', False):
+        try:
+            pending = enqueue_submission(resolve_user(request.user), quiz, selections)
+        except AlreadySubmitted:
             return Response(
-                QuizSubmissionSerializer(submission).data,
-                status=status.HTTP_201_CREATED
+                {"detail": "You have already submitted this quiz."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
+        data = PendingSubmissionSerializer(pending).data
+        data['status_url'] = request.build_absolute_uri(
+            reverse('pending-submission-detail', kwargs={'pk': pending.pk})
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    # Process submission
+    try:
+        submission = create_submission(resolve_user(request.user), quiz, answer_key, selections)
+        prefetch_submission_answers(submission)
+        return Response(
+            QuizSubmissionSerializer(submission).data,
+            status=status.HTTP_201_CREATED
+        )
+
     except Exception as e:
         return Response(
             {"detail": f"Error processing submission: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-class UserSubmissionsView(generics.ListAPIView):
+# Attempt Session Views
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_attempt_view(request, quiz_id):
+    """
+    Start an attempt session for a quiz, or resume the current one
+    Timed quizzes get a server-side deadline from their time limit
+    """
+    if request.user.is_admin:
+        return Response(
+            {"detail": "Admin users cannot submit quiz attempts."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    quiz = get_object_or_404(Quiz, id=quiz_id, is_active=True)
+    if already_submitted(request.user.id, quiz):
+        return Response(
+            {"detail": "You have already submitted this quiz."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    draft, created = start_attempt(request.user, quiz)
+    return Response(
+        AttemptSessionSerializer(draft).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+@api_view(['GET', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def attempt_detail(request, pk):
+    """
+    Get an attempt session with its draft answers, or autosave draft answers (PATCH)
+    Saved answers are merged into the draft; they're written to the database in batches
+    """
+    draft = get_draft(pk, request.user.id)
+    if draft is None:
+        return Response({"detail": "No AttemptSession matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'PATCH':
+        serializer = QuizAttemptSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        quiz = get_object_or_404(Quiz, id=draft.quiz_id, is_active=True)
+        selections = collect_selections(serializer.validated_data['answers'])
+        error = check_attempt_selections(quiz, request.user.id, selections)
+        if error is not None:
+            return error
+        try:
+            save_draft(draft, selections)
+        except AttemptClosed as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+
+    return Response(AttemptSessionSerializer(draft).data)
+
+def check_attempt_selections(quiz, user_id, selections):
+    """
+    Reject answers to questions outside the user's answer key (other quizzes,
+    inactive questions, questions not in the user's draw)
+    Returns a 400 response, or None when every answer belongs to the attempt
+    """
+    unknown = sorted(set(selections) - set(load_answer_key(quiz, user_id)))
+    if unknown:
+        return Response(
+            {"detail": f"These questions are not part of this attempt: {', '.join(map(str, unknown))}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return None
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_attempt(request, pk):
+    """
+    Submit an attempt session - the draft answers, plus any answers in the request body,
+    go through the same checks and grading as submit_quiz
+    """
+    draft = get_draft(pk, request.user.id)
+    if draft is None:
+        return Response({"detail": "No AttemptSession matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        draft.check_open()
+    except AttemptClosed as e:
+        if draft.status == AttemptSession.IN_PROGRESS:
+            close_attempt(draft, AttemptSession.EXPIRED)
+        return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+
+    quiz = get_object_or_404(Quiz, id=draft.quiz_id, is_active=True)
+    if request.data.get('answers'):
+        serializer = QuizAttemptSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        selections = collect_selections(serializer.validated_data['answers'])
+        error = check_attempt_selections(quiz, request.user.id, selections)
+        if error is not None:
+            return error
+        save_draft(draft, selections)
+
+    if already_submitted(request.user.id, quiz):
+        return Response(
+            {"detail": "You have already submitted this quiz."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    with transaction.atomic():
+        # Grade every stored answer, including ones autosaved through other workers
+        flush_draft(draft)
+        try:
+            draft.check_open()
+        except AttemptClosed as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        # Questions deactivated or removed since they were autosaved are left out,
+        # so a stale draft answer can't block the submission
+        answer_key = load_answer_key(quiz, request.user.id)
+        selections = {
+            question_id: selected for question_id, selected in draft.answers.items() if question_id in answer_key
+        }
+        response = submit_selections(request, quiz, selections)
+        if response.status_code == status.HTTP_201_CREATED:
+            close_attempt(draft, AttemptSession.SUBMITTED, submission_id=response.data['id'])
+        elif response.status_code == status.HTTP_202_ACCEPTED:
+            # Graded later by the worker
+            close_attempt(draft, AttemptSession.SUBMITTED)
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_quizzes(request):
+    """
+    Find quizzes by title, description or question text, best matches first
+    Every search term matches as a prefix; normal users only find active quizzes and questions
+    """
+    text = request.query_params.get('q', '').strip()
+    if not text:
+        return Response(
+            {"detail": "Provide a search query with ?q=."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response(
+            {"detail": "limit must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, 100))
+
+    quiz_ids = search_quiz_ids(text, include_inactive=request.user.is_admin, limit=limit)
+    quizzes = Quiz.objects.filter(id__in=quiz_ids).select_related('category', 'created_by').in_bulk()
+    return Response({
+        'query': text,
+        'results': QuizListSerializer([quizzes[quiz_id] for quiz_id in quiz_ids if quiz_id in quizzes], many=True).data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def quiz_leaderboard(request, quiz_id):
+    """
+    Top scorers of a quiz, read from the precomputed leaderboard
+    Use ?limit= to choose how many entries to return
+    """
+    quizzes = Quiz.objects.all() if request.user.is_admin else Quiz.objects.filter(is_active=True)
+    quiz = get_object_or_404(quizzes.only('id'), id=quiz_id)
+
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response(
+            {"detail": "limit must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, leaderboard_size()))
+
+    entries = top_entries(quiz.id, limit)
+    return Response({
+        'quiz': quiz.id,
+        'results': LeaderboardEntrySerializer(entries, many=True).data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_stats(request):
+    """
+    Dashboard totals of the current user, read from the precomputed progress rollup
+    """
+    progress = UserProgress.objects.select_related('best_category').filter(user_id=request.user.id).first()
+    if progress is None:
+        # No submissions yet
+        progress = UserProgress(user_id=request.user.id)
+    return Response(UserProgressSerializer(progress).data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def quiz_analytics(request, quiz_id):
+    """
+    Per-question item statistics for a quiz (admin only)
+    Computed from the precomputed answer counters
+    """
+    quiz = get_object_or_404(Quiz.objects.only('id'), id=quiz_id)
+    return Response({
+        'quiz': quiz.id,
+        'questions': item_statistics(quiz.id)
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """
+    Per-route latency histograms recorded by RequestMetricsMiddleware (admin only)
+    Covers the requests served by this process since it started
+    """
+    return Response({
+        'enabled': getattr(settings, 'QUIZ_REQUEST_METRICS', False),
+        'routes': metrics_registry.snapshot()
+    })
+
+class UserSubmissionsView(ProjectedListMixin, generics.ListAPIView):
     """
     List all quiz submissions for the current user
     """
     serializer_class = QuizSubmissionSerializer
+    projection_class = SubmissionProjection
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmissionPagination
 
     def get_queryset(self):
-        return QuizSubmission.objects.filter(user=self.request.user).select_related('quiz')
+        return QuizSubmission.objects.filter(user_id=self.request.user.id)
 
-class AllSubmissionsView(generics.ListAPIView):
+class AllSubmissionsView(ProjectedListMixin, generics.ListAPIView):
     """
     List all quiz submissions (admin only)
     """
-    queryset = QuizSubmission.objects.all().select_related('user', 'quiz')
+    queryset = QuizSubmission.objects.all()
     serializer_class = QuizSubmissionSerializer
+    projection_class = SubmissionProjection
     permission_classes = [IsAdminUser]
+    pagination_class = SubmissionPagination
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_submissions_view(request):
+    """
+    Stream all submissions as CSV or NDJSON (admin only)
+    ?file_type=csv|ndjson, ?answers=1 adds per-answer detail, ?quiz=<id> limits to one quiz
+    """
+    file_type = request.query_params.get('file_type', 'csv')
+    if file_type not in EXPORT_FORMATS:
+        return Response(
+            {"detail": "file_type must be one of: csv, ndjson"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    quiz_id = request.query_params.get('quiz')
+    if quiz_id is not None and not quiz_id.isdigit():
+        return Response(
+            {"detail": "quiz must be a quiz id."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    include_answers = request.query_params.get('answers') in ('1', 'true')
+    stream, content_type = export_submissions(file_type, include_answers, quiz_id and int(quiz_id))
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="submissions.{file_type}"'
+    return response
+
+class PendingSubmissionDetailView(generics.RetrieveAPIView):
+    """
+    Status of a queued submission
+    Users can only view their own queued submissions, admins can view all
+    """
+    serializer_class = PendingSubmissionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_admin:
+            return PendingSubmission.objects.all()
+        return PendingSubmission.objects.filter(user_id=self.request.user.id)
 
 class SubmissionDetailView(generics.RetrieveAPIView):
     """
@@ -220,4 +599,4 @@ class SubmissionDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         if self.request.user.is_admin:
             return QuizSubmission.objects.all().prefetch_related('answers__question')
-        return QuizSubmission.objects.filter(user=self.request.user).prefetch_related('answers__question')
\ No newline at end of file
+        return QuizSubmission.objects.filter(user_id=self.request.user.id).prefetch_related('answers__question')
\ No newline at end of file
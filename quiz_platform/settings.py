@@ -57,6 +57,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'quiz_app.middleware.RequestMetricsMiddleware',
+    'quiz_app.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'quiz_platform.urls'
@@ -89,6 +91,67 @@ DATABASES = {
     }
 }
 
+# PRAGMAs run on every new SQLite connection (see quiz_app/db.py)
+QUIZ_SQLITE_PRAGMAS = {}
+
+# Database profile: set QUIZ_DB_PROFILE=production for concurrent serving
+QUIZ_DB_PROFILE = os.environ.get('QUIZ_DB_PROFILE', 'development')
+if QUIZ_DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Busy timeout: seconds to wait for a lock before "database is locked"
+        'OPTIONS': {'timeout': 20},
+    })
+    QUIZ_SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # readers don't block the writer
+        'synchronous': 'NORMAL',  # safe with WAL, fsync only at checkpoints
+        'mmap_size': 268435456,  # 256 MiB
+        'temp_store': 'MEMORY',
+    }
+
+# Read replica: set QUIZ_DB_REPLICA to a database file kept in sync with the primary
+# (python manage.py sync_replica copies it locally)
+if os.environ.get('QUIZ_DB_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['QUIZ_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['quiz_app.routers.ReplicaRouter']
+
+# Reads only use the replica while its last sync_replica copy is at most this many
+# seconds old; a user's reads stay on the primary until the replica has their last write
+QUIZ_REPLICA_MAX_LAG = 60
+
+# Cache alias holding each user's last write time - must be shared by all workers
+QUIZ_REPLICA_PIN_CACHE = 'replica_pins'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Pre-rendered student quiz payloads (quiz_app/payloads.py). On disk, so they
+    # survive restarts and are shared by every worker process. Entries are keyed by
+    # quiz version and never expire - old versions are culled past MAX_ENTRIES
+    'quiz_payloads': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('QUIZ_PAYLOAD_CACHE_DIR', BASE_DIR / 'cache' / 'quiz_payloads'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Last write time per user for read-your-writes replica routing, shared by every
+    # worker process. Entries expire after QUIZ_REPLICA_MAX_LAG
+    'replica_pins': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('QUIZ_REPLICA_PIN_CACHE_DIR', BASE_DIR / 'cache' / 'replica_pins'),
+    },
+}
+
+# Cache alias holding the pre-rendered student quiz payloads
+QUIZ_PAYLOAD_CACHE = 'quiz_payloads'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,7 +198,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -152,5 +215,57 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Users loaded for views that need a model instance (claims-based auth skips the lookup)
+QUIZ_USER_CACHE_SIZE = 1024
+QUIZ_USER_CACHE_TTL = 30  # seconds
+
+# Threads hashing passwords for the async login view
+QUIZ_PASSWORD_HASH_WORKERS = 4
 
-CORS_ALLOW_ALL_ORIGINS = True  # Only for development
\ No newline at end of file
+
+CORS_ALLOW_ALL_ORIGINS = True  # Only for development
+
+# Quiz answer keys cached per process, keyed by quiz and validated by quiz version
+QUIZ_ANSWER_KEY_CACHE_SIZE = 256
+
+# How new submissions store their answers: 'rows' (one SubmissionAnswer per answer)
+# or 'packed' (binary columns on QuizSubmission, see quiz_app/packing.py)
+QUIZ_ANSWER_STORAGE = 'rows'
+
+# Queue submissions for the process_submissions worker instead of grading them in the request
+QUIZ_ASYNC_SUBMISSIONS = False
+
+# Number of entries kept in each precomputed quiz leaderboard
+QUIZ_LEADERBOARD_SIZE = 100
+
+# Attempt sessions: autosaved answers buffered per process and flushed in batches within
+# QUIZ_DRAFT_FLUSH_INTERVAL seconds; deadlines allow QUIZ_ATTEMPT_GRACE_SECONDS of network slack
+QUIZ_DRAFT_CACHE_SIZE = 10000
+QUIZ_DRAFT_FLUSH_INTERVAL = 30
+QUIZ_ATTEMPT_GRACE_SECONDS = 5
+
+# Estimated text similarity (0-1) above which questions are reported as near-duplicates
+QUIZ_SIMILARITY_THRESHOLD = 0.8
+
+# Secret mixed into per-student question pool draws (defaults to SECRET_KEY)
+# QUIZ_POOL_SECRET = '...'
+
+# Per-request SQL/timing instrumentation (Server-Timing header, metrics log, /api/metrics/)
+QUIZ_REQUEST_METRICS = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'quiz_app.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
\ No newline at end of file
@@ -16,11 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
-from rest_framework_simplejwt.views import TokenRefreshView
+from users.views import QuizTokenRefreshView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('users.urls')),
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token/refresh/', QuizTokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('quiz_app.urls')),
+    # Async views for ASGI deployments
+    path('api/async/auth/', include('users.async_urls')),
+    path('api/async/', include('quiz_app.async_urls')),
 ]
\ No newline at end of file
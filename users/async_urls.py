@@ -0,0 +1,7 @@
+# users/async_urls.py
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('login/', async_views.login, name='async-login'),
+]
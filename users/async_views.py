@@ -0,0 +1,104 @@
+# users/async_views.py
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse
+from rest_framework import exceptions, status
+from rest_framework.utils.encoders import JSONEncoder
+from .authentication import ClaimsJWTAuthentication, QuizRefreshToken
+from .serializers import UserLoginSerializer, UserSerializer
+
+# Password hashing is CPU-bound and sync-only; a bounded pool keeps slow logins
+# from occupying the event loop or spawning unbounded threads
+password_hashers = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'QUIZ_PASSWORD_HASH_WORKERS', 4),
+    thread_name_prefix='password-hash'
+)
+
+
+def api_response(data, status=status.HTTP_200_OK):
+    """
+    JSON response encoded like DRF's JSONRenderer
+    """
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def async_api_view(methods, authenticated=True):
+    """
+    Decorator for async API views that don't go through DRF's sync request cycle
+    Parses JSON bodies into request.data, authenticates the JWT into request.user
+    and renders API exceptions the way DRF does
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return api_response(
+                    {"detail": f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+            authentication = ClaimsJWTAuthentication()
+            try:
+                result = await authentication.aauthenticate(request)
+                request.user = result[0] if result else None
+                if authenticated and request.user is None:
+                    raise exceptions.NotAuthenticated()
+                request.data = parse_json_body(request)
+                return await view(request, *args, **kwargs)
+            except Http404 as exc:
+                return api_response({"detail": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+            except exceptions.APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+                response = api_response(detail, status=exc.status_code)
+                if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                    response['WWW-Authenticate'] = authentication.authenticate_header(request)
+                return response
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def parse_json_body(request):
+    if request.method not in ('POST', 'PUT', 'PATCH') or not request.body:
+        return {}
+    try:
+        return json.loads(request.body)
+    except ValueError as e:
+        raise exceptions.ParseError(f'JSON parse error - {str(e)}')
+
+
+def validate_credentials(serializer):
+    """
+    Run the login serializer on a hashing worker thread
+    The worker thread owns its database connection, so it is released here
+    """
+    try:
+        return serializer.is_valid()
+    finally:
+        close_old_connections()
+
+
+@async_api_view(['POST'], authenticated=False)
+async def login(request):
+    """
+    Login user and return JWT tokens
+    Password hashing runs on the bounded password_hashers pool
+    """
+    serializer = UserLoginSerializer(data=request.data)
+    is_valid = await sync_to_async(
+        validate_credentials, thread_sensitive=False, executor=password_hashers
+    )(serializer)
+    if not is_valid:
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    user = serializer.validated_data['user']
+    refresh = QuizRefreshToken.for_user(user)
+    return api_response({
+        'user': UserSerializer(user).data,
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    })
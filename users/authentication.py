@@ -0,0 +1,126 @@
+# users/authentication.py
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import User
+
+
+class QuizRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the username and is_admin claims
+    Access tokens derived from it copy the claims, so requests can be
+    authorized without loading the user
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+
+def set_user_claims(token, user):
+    token['username'] = user.username
+    token['is_admin'] = user.is_admin
+
+
+class ClaimsUser(TokenUser):
+    """
+    Lightweight request user built from token claims - no database access
+    Use resolve_user() where a real User instance is needed
+    """
+    @cached_property
+    def is_admin(self):
+        return bool(self.token.get('is_admin', False))
+
+    def __str__(self):
+        return f"{self.username} ({'Admin' if self.is_admin else 'User'})"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the username/is_admin claims instead of loading the user
+    Tokens issued before the claims existed fall back to the database lookup.
+    Deactivating a user or changing is_admin takes effect when the access token
+    expires, because tokens are only re-issued from the database on refresh
+    """
+    def get_user(self, validated_token):
+        if not has_user_claims(validated_token):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views - only tokens without claims touch the database
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if has_user_claims(validated_token):
+            return ClaimsUser(validated_token), validated_token
+        user = await sync_to_async(super().get_user)(validated_token)
+        return user, validated_token
+
+
+def has_user_claims(token):
+    return 'is_admin' in token and 'username' in token
+
+
+class UserCache:
+    """
+    Small LRU of User instances with a short time-to-live
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._data.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user):
+        with self._lock:
+            self._data[user.pk] = (time.monotonic() + self.ttl, user)
+            self._data.move_to_end(user.pk)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserCache(
+    getattr(settings, 'QUIZ_USER_CACHE_SIZE', 1024),
+    getattr(settings, 'QUIZ_USER_CACHE_TTL', 30)
+)
+
+
+def resolve_user(user):
+    """
+    Return a User model instance for the request user
+    Claims-based users are loaded through the short-TTL cache
+    """
+    if isinstance(user, User):
+        return user
+    instance = user_cache.get(user.id)
+    if instance is None:
+        instance = User.objects.get(**{api_settings.USER_ID_FIELD: user.id})
+        user_cache.set(instance)
+    return instance
@@ -12,4 +12,9 @@ class User(AbstractUser):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.username} ({'Admin' if self.is_admin else 'User'})"
\ No newline at end of file
+        return self.display_name(self.username, self.is_admin)
+
+    @staticmethod
+    def display_name(username, is_admin):
+        # Also used by list projections that render users from values() rows
+        return f"{username} ({'Admin' if is_admin else 'User'})"
\ No newline at end of file
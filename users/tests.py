@@ -1,3 +1,50 @@
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import ClaimsJWTAuthentication, ClaimsUser, QuizRefreshToken, resolve_user, user_cache
+from .models import User
 
-# Create your tests here.
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='student', password='pass12345')
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_claims_token_needs_no_user_lookup(self):
+        token = QuizRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.username, user.is_admin), (self.user.id, 'student', False))
+        self.assertEqual(str(user), str(self.user))
+
+    def test_token_without_claims_loads_the_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertEqual(user, self.user)
+
+    def test_resolve_user_caches_instances(self):
+        claims_user = self.authenticate(QuizRefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_user(claims_user), self.user)
+            self.assertEqual(resolve_user(claims_user), self.user)
+
+    def test_login_and_refresh_issue_current_claims(self):
+        response = self.client.post('/api/auth/login/', {'username': 'student', 'password': 'pass12345'})
+        self.assertFalse(AccessToken(response.json()['tokens']['access'])['is_admin'])
+
+        self.user.is_admin = True
+        self.user.save()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': response.json()['tokens']['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(AccessToken(response.json()['access'])['is_admin'])
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': response.json()['refresh']})
+        self.assertEqual(response.status_code, 401)
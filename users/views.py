@@ -3,9 +3,12 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+from .authentication import QuizRefreshToken, resolve_user
 from .models import User
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .serializers import (
+    UserRegistrationSerializer, UserLoginSerializer, UserSerializer, QuizTokenRefreshSerializer
+)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -16,7 +19,7 @@ def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = QuizRefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user).data,
             'tokens': {
@@ -35,7 +38,7 @@ def login(request):
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = QuizRefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user).data,
             'tokens': {
@@ -53,4 +56,10 @@ class UserProfileView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
\ No newline at end of file
+        return resolve_user(self.request.user)
+
+class QuizTokenRefreshView(TokenRefreshView):
+    """
+    Refresh JWT tokens, re-reading the user claims
+    """
+    serializer_class = QuizTokenRefreshSerializer
\ No newline at end of file